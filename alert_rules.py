@@ -0,0 +1,234 @@
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# ==============================================================================
+# SLIDING-WINDOW ALERT RULES
+# Every log line is fed to AlertEngine.observe(). Counts and latencies are kept
+# in time-bucketed ring buffers with running totals, so recording an event and
+# evaluating the rules that care about it costs O(1) regardless of traffic.
+# Repeated alerts for the same rule and service are held back for a cooldown.
+# ==============================================================================
+
+
+class RingCounter:
+    """Number of events in the trailing ``window`` seconds, in ``resolution``-second slots."""
+
+    def __init__(self, window: float, resolution: float = 1.0):
+        self.resolution = resolution
+        self.slots = max(1, int(math.ceil(window / resolution)))
+        self._counts = [0] * self.slots
+        self._head = None  # absolute slot number of the newest slot
+        self._total = 0
+
+    def _advance(self, slot: int):
+        if self._head is None:
+            self._head = slot
+            return
+        if slot <= self._head:
+            return
+        # Clear every slot we skipped over (at most one full lap)
+        for s in range(self._head + 1, min(slot, self._head + self.slots) + 1):
+            i = s % self.slots
+            self._total -= self._counts[i]
+            self._counts[i] = 0
+        self._head = slot
+
+    def add(self, now: float, n: int = 1):
+        slot = int(now // self.resolution)
+        self._advance(slot)
+        if slot <= self._head - self.slots:
+            return  # Older than the window
+        self._counts[slot % self.slots] += n
+        self._total += n
+
+    def total(self, now: float) -> int:
+        self._advance(int(now // self.resolution))
+        return self._total
+
+
+class RingHistogram:
+    """Log-bucketed latency histogram over the trailing ``window`` seconds.
+
+    Bins grow by ``growth`` (10% by default), so a percentile is within about
+    5% of the true value and costs O(bins) to read, independent of volume.
+    """
+
+    def __init__(self, window: float, resolution: float = 5.0,
+                 min_value: float = 0.001, max_value: float = 600.0, growth: float = 1.1):
+        self.resolution = resolution
+        self.slots = max(1, int(math.ceil(window / resolution)))
+        self.min_value = min_value
+        self._log_growth = math.log(growth)
+        self.bins = int(math.ceil(math.log(max_value / min_value) / self._log_growth)) + 2
+        self._slot_bins: List[Optional[List[int]]] = [None] * self.slots
+        self._totals = [0] * self.bins
+        self._count = 0
+        self._head = None
+        self._growth = growth
+
+    def _bin(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        return min(self.bins - 1, 1 + int(math.log(value / self.min_value) / self._log_growth))
+
+    def _value(self, b: int) -> float:
+        """Geometric midpoint of bin ``b``."""
+        return self.min_value * self._growth ** max(0.0, b - 0.5)
+
+    def _advance(self, slot: int):
+        if self._head is None:
+            self._head = slot
+            return
+        if slot <= self._head:
+            return
+        for s in range(self._head + 1, min(slot, self._head + self.slots) + 1):
+            i = s % self.slots
+            old = self._slot_bins[i]
+            if old is not None:
+                for b, n in enumerate(old):
+                    if n:
+                        self._totals[b] -= n
+                        self._count -= n
+                self._slot_bins[i] = None
+        self._head = slot
+
+    def add(self, now: float, value: float):
+        slot = int(now // self.resolution)
+        self._advance(slot)
+        if slot <= self._head - self.slots:
+            return
+        i = slot % self.slots
+        if self._slot_bins[i] is None:
+            self._slot_bins[i] = [0] * self.bins
+        b = self._bin(value)
+        self._slot_bins[i][b] += 1
+        self._totals[b] += 1
+        self._count += 1
+
+    def quantile(self, now: float, q: float) -> Optional[float]:
+        self._advance(int(now // self.resolution))
+        if not self._count:
+            return None
+        rank = q * self._count
+        seen = 0
+        for b, n in enumerate(self._totals):
+            seen += n
+            if seen >= rank:
+                return self._value(b)
+        return self._value(self.bins - 1)
+
+    def count(self, now: float) -> int:
+        self._advance(int(now // self.resolution))
+        return self._count
+
+
+@dataclass
+class Rule:
+    """Fire when ``metric`` over the last ``window`` seconds exceeds ``threshold``.
+
+    ``metric`` is "count" (lines at ``level``) or a latency percentile such
+    as "p95" (of the ``latency`` field). ``service`` "*" matches every service.
+    """
+    name: str
+    threshold: float
+    window: float
+    metric: str = "count"
+    level: Optional[str] = None
+    service: str = "*"
+    cooldown: float = 60.0
+    min_samples: int = 1
+
+    @property
+    def quantile(self) -> float:
+        return float(self.metric[1:]) / 100
+
+
+@dataclass
+class Alert:
+    rule: Rule
+    service: str
+    value: float
+    suppressed: int
+    message: Optional[str]
+
+    def describe(self) -> str:
+        if self.rule.metric == "count":
+            what = f"{int(self.value)} {self.rule.level} lines in {int(self.rule.window)}s"
+        else:
+            what = f"{self.rule.metric} latency {self.value:.3f}s over {int(self.rule.window)}s"
+        text = f"[{self.rule.name}] {what} (threshold {self.rule.threshold})"
+        if self.suppressed:
+            text += f", {self.suppressed} repeats suppressed"
+        return text
+
+
+DEFAULT_RULES = [
+    Rule("first-error", threshold=0, window=60, level="ERROR", cooldown=60),
+    Rule("error-burst", threshold=10, window=60, level="ERROR", cooldown=120),
+    Rule("warning-burst", threshold=20, window=60, level="WARNING", cooldown=120),
+    Rule("slow-p95", threshold=1.5, window=300, metric="p95", cooldown=300, min_samples=5),
+]
+
+
+class AlertEngine:
+    def __init__(self, rules: Optional[List[Rule]] = None):
+        self.rules = rules if rules is not None else list(DEFAULT_RULES)
+        self._counters: Dict[Tuple[str, str, float], RingCounter] = {}
+        self._histograms: Dict[Tuple[str, float], RingHistogram] = {}
+        # (rule name, service) -> [last fired at, repeats held back since]
+        self._fired: Dict[Tuple[str, str], List[float]] = {}
+
+    def observe(self, service: str, level: str, latency: Optional[float] = None,
+                message: Optional[str] = None, now: Optional[float] = None) -> List[Alert]:
+        """Record one log line and return any alerts it triggers."""
+        now = time.time() if now is None else now
+        has_latency = isinstance(latency, (int, float)) and latency == latency
+        # Rules over the same window share a buffer; record the line in each buffer once
+        recorded = set()
+        alerts = []
+        for rule in self.rules:
+            if rule.service != "*" and rule.service != service:
+                continue
+
+            if rule.metric == "count":
+                if level != rule.level:
+                    continue
+                key = (service, level, rule.window)
+                counter = self._counters.get(key)
+                if counter is None:
+                    counter = self._counters[key] = RingCounter(rule.window)
+                if key not in recorded:
+                    counter.add(now)
+                    recorded.add(key)
+                value = counter.total(now)
+            else:
+                if not has_latency:
+                    continue
+                key = (service, rule.window)
+                hist = self._histograms.get(key)
+                if hist is None:
+                    hist = self._histograms[key] = RingHistogram(rule.window)
+                if key not in recorded:
+                    hist.add(now, latency)
+                    recorded.add(key)
+                if hist.count(now) < rule.min_samples:
+                    continue
+                value = hist.quantile(now, rule.quantile)
+
+            if value is not None and value > rule.threshold:
+                alert = self._fire(rule, service, value, message, now)
+                if alert:
+                    alerts.append(alert)
+        return alerts
+
+    def _fire(self, rule: Rule, service: str, value: float, message: Optional[str],
+              now: float) -> Optional[Alert]:
+        state = self._fired.get((rule.name, service))
+        if state is not None and now - state[0] < rule.cooldown:
+            state[1] += 1
+            return None
+        suppressed = int(state[1]) if state is not None else 0
+        self._fired[(rule.name, service)] = [now, 0]
+        return Alert(rule, service, value, suppressed, message)
@@ -1,40 +1,196 @@
 import os
 import json
 import time
+import select
+import struct
+import ctypes
+import ctypes.util
+import sys
 from pathlib import Path
 
+from alert_rules import AlertEngine, DEFAULT_RULES
+
 # Paths to the shared logs
 LOG_DIR = Path("./shared-logs")
 
+# How often to look for changes when inotify is unavailable (seconds)
+POLL_INTERVAL = 0.5
+# How long to wait before checking again for a missing log folder (seconds)
+MISSING_DIR_RETRY = 2.0
+# Leading bytes compared on every read to notice a file truncated and refilled
+HEAD_BYTES = 64
+
+# ==============================================================================
+# INOTIFY (Linux) - wakes us up as soon as a log file is written
+# Falls back to offset polling on other platforms or if inotify is unavailable.
+# ==============================================================================
+IN_MODIFY = 0x00000002
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    def __init__(self, directory: Path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_MODIFY | IN_CREATE | IN_MOVED_TO | IN_DELETE
+        if libc.inotify_add_watch(self.fd, str(directory).encode(), mask) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout: float) -> set:
+        """Names of files that changed, or an empty set after ``timeout`` seconds."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        names = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return names
+        pos = 0
+        while pos + _EVENT.size <= len(data):
+            _, _, _, length = _EVENT.unpack_from(data, pos)
+            pos += _EVENT.size
+            names.add(data[pos:pos + length].rstrip(b"\0").decode(errors="replace"))
+            pos += length
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+# ==============================================================================
+# LOG TAILER
+# Remembers a byte offset per file and only reads what was appended since the
+# last look, so cost tracks new log volume rather than total file size.
+# ==============================================================================
+class LogTailer:
+    def __init__(self, log_dir: Path, from_start: bool = False):
+        self.log_dir = Path(log_dir)
+        self.from_start = from_start
+        # path -> [open file, inode, partial trailing line, first bytes of the file]
+        self._files = {}
+        self._watcher = None
+        self._started = False
+
+    def _watch(self):
+        if self._watcher is None and sys.platform.startswith("linux"):
+            try:
+                self._watcher = _Inotify(self.log_dir)
+            except (OSError, AttributeError):
+                self._watcher = False  # Don't retry; fall back to polling
+        return self._watcher or None
+
+    @staticmethod
+    def _drain(state):
+        """Read everything appended to an open file and split off complete lines."""
+        f = state[0]
+        pos = f.tell()
+        if pos and (os.fstat(f.fileno()).st_size < pos
+                    or os.pread(f.fileno(), len(state[3]), 0) != state[3]):
+            # Truncated (and possibly rewritten) in place: start over from the top
+            f.seek(0)
+            state[2] = state[3] = b""
+        if len(state[3]) < HEAD_BYTES:
+            state[3] = os.pread(f.fileno(), HEAD_BYTES, 0)
+        data = f.read()
+        if not data:
+            return []
+        lines = (state[2] + data).split(b"\n")
+        state[2] = lines.pop()
+        return [line.decode(errors="replace") for line in lines if line.strip()]
+
+    def _read_new(self, path: Path):
+        """Complete lines appended to ``path`` since the last read."""
+        try:
+            inode = path.stat().st_ino
+        except FileNotFoundError:
+            inode = None
+
+        lines = []
+        state = self._files.get(path)
+        if state is not None and state[1] != inode:
+            # Rotated or deleted: the handle still points at the old file, so
+            # finish it off before moving to the new one
+            lines.extend(self._drain(state))
+            state[0].close()
+            del self._files[path]
+            state = None
+        if inode is None:
+            return lines
+
+        if state is None:
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                return lines
+            # Files that exist at startup are tailed from the end; new ones from the start
+            if not (self.from_start or self._started):
+                f.seek(0, os.SEEK_END)
+            state = self._files[path] = [f, inode, b"", b""]
+
+        lines.extend(self._drain(state))
+        return lines
+
+    def lines(self):
+        """Yield (service_name, line) for every new log line, forever."""
+        while True:
+            if not self.log_dir.exists():
+                time.sleep(MISSING_DIR_RETRY)
+                continue
+
+            watcher = self._watch()
+            if not self._started:
+                for log_file in self.log_dir.glob("*.log"):
+                    for line in self._read_new(log_file):
+                        yield log_file.stem, line
+                self._started = True
+                continue
+
+            if watcher:
+                changed = watcher.wait(POLL_INTERVAL)
+                if "" in changed:
+                    # Queue overflow (no file name): look at every file
+                    targets = list(self.log_dir.glob("*.log"))
+                else:
+                    targets = [self.log_dir / name for name in changed if name.endswith(".log")]
+            else:
+                time.sleep(POLL_INTERVAL)
+                targets = list(self.log_dir.glob("*.log"))
+
+            for log_file in targets:
+                for line in self._read_new(log_file):
+                    yield log_file.stem, line
+
+
 def scan_logs():
     print("\n" + "="*50)
     print("🚀 INCIDENT COMMAND DASHBOARD - MONITORING SERVICES")
     print("="*50 + "\n")
 
-    while True:
-        if not LOG_DIR.exists():
+    engine = AlertEngine(DEFAULT_RULES)
+    tailer = LogTailer(LOG_DIR)
+    for service_name, line in tailer.lines():
+        try:
+            log = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(log, dict):
             continue
 
-        for log_file in LOG_DIR.glob("*.log"):
-            service_name = log_file.stem
-            with open(log_file, 'r') as f:
-                # Read the last line (the most recent event)
-                lines = f.readlines()
-                if not lines: continue
-                
-                try:
-                    last_log = json.loads(lines[-1])
-                    level = last_log.get("level", "INFO")
-                    
-                    if level in ["ERROR", "WARNING"]:
-                        print(f"🚨 ALERT: {service_name.upper()} is reporting {level}!")
-                        print(f"   Message: {last_log.get('message')}")
-                        print(f"   👉 ACTION: Copy this to your MCP Client: ")
-                        print(f"      'Investigate {service_name} and resolve the root cause.'\n")
-                except:
-                    continue
-        
-        time.sleep(3) # Check every 3 seconds
+        level = log.get("level", "INFO")
+        for alert in engine.observe(service_name, level, log.get("latency"), log.get("message")):
+            print(f"🚨 ALERT: {service_name.upper()} {alert.describe()}")
+            print(f"   Latest message: {alert.message}")
+            print("   👉 ACTION: Copy this to your MCP Client: ")
+            print(f"      'Investigate {service_name} and resolve the root cause.'\n", flush=True)
 
 if __name__ == "__main__":
-    scan_logs()
\ No newline at end of file
+    scan_logs()
@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# ==============================================================================
+# ANALYST BENCHMARK SUITE
+# Runs the Log Analyst tools in-process against a synthetic corpus (see
+# generate_logs.py) and the alerts dashboard's tail + rule pipeline, recording
+# wall time, peak RSS and lines/sec per step. Each mode runs in its own
+# process so peak RSS is not shared. Results are written as JSON and can be
+# compared against an earlier run.
+#
+#   python benchmarks/bench_analyst.py --size 100MB
+#   python benchmarks/bench_analyst.py --corpus /tmp/corpus --compare benchmarks/results/baseline.json
+# ==============================================================================
+
+BENCH_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = BENCH_DIR.parent
+ANALYST_DIR = PROJECT_ROOT / "mcp-servers" / "log-analyst"
+MODES = ("memory", "store", "streaming", "dashboard")
+# Slower than the baseline by more than this fraction counts as a regression
+DEFAULT_THRESHOLD = 0.20
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class Steps:
+    def __init__(self):
+        self.results = {}
+
+    def run(self, name: str, fn, lines: int = None):
+        began = time.perf_counter()
+        value = fn()
+        seconds = time.perf_counter() - began
+        result = {"seconds": round(seconds, 4), "peak_rss_mb": _peak_rss_mb()}
+        if lines:
+            result["lines_per_sec"] = round(lines / seconds) if seconds else None
+        self.results[name] = result
+        return value
+
+
+# ==============================================================================
+# CHILD PROCESSES (one per mode)
+# ==============================================================================
+def bench_analyst(mode: str, corpus: Path, manifest: dict) -> dict:
+    os.environ["LOG_DIR"] = str(corpus)
+    os.environ["LOG_STORE_DIR"] = tempfile.mkdtemp(prefix="bench-store-")
+    os.environ["LOG_STREAMING"] = "on" if mode == "streaming" else "off"
+    os.environ["LOG_STORE"] = "on" if mode == "store" else "off"
+    sys.path.insert(0, str(ANALYST_DIR))
+
+    steps = Steps()
+    server = steps.run("import", lambda: __import__("server"))
+    steps.run("ingest", server._refresh, lines=manifest["lines"])
+    tool = _blocking_tools(server)
+
+    # Query relative to the end of the corpus rather than "now"
+    end = manifest["end"]
+    minutes = int((datetime.fromisoformat(end) - datetime.fromisoformat(manifest["start"])).total_seconds() // 60)
+    services = [name[:-len(".log")] for name in manifest["files"]]
+    for service in services:
+        steps.run(f"get_error_stats:{service}", lambda: tool.get_error_stats(service))
+    steps.run("get_error_stats:warm", lambda: tool.get_error_stats(services[0]))
+    steps.run("get_log_patterns", lambda: tool.get_log_patterns("payment-service"))
+    steps.run("get_error_timeseries", lambda: tool.get_error_timeseries(
+        "payment-service", minutes=minutes, bucket="5min", end_time=end))
+    steps.run("get_latency_percentiles", lambda: tool.get_latency_percentiles(
+        "inventory-service", minutes=minutes, bucket="1h", end_time=end))
+    steps.run("get_slow_traces", lambda: tool.get_slow_traces(minutes=minutes, end_time=end))
+
+    trace_id = _first_trace_id(corpus / "payment-service.log")
+    if trace_id:
+        steps.run("get_trace", lambda: tool.get_trace(trace_id))
+    return steps.results
+
+
+def _blocking_tools(server):
+    """The server's tools as plain blocking calls, without the @offload thread hop."""
+    class Tools:
+        def __getattr__(self, name):
+            fn = getattr(server, name)
+            return getattr(fn, "__wrapped__", fn)
+    return Tools()
+
+
+def _first_trace_id(path: Path):
+    try:
+        with open(path) as f:
+            return json.loads(f.readline()).get("trace_id")
+    except (OSError, ValueError):
+        return None
+
+
+def bench_dashboard(corpus: Path, manifest: dict) -> dict:
+    """Tail every file from the start and feed each line to the alert rules, as scan_logs does."""
+    sys.path.insert(0, str(PROJECT_ROOT))
+    steps = Steps()
+    dashboard = steps.run("import", lambda: __import__("alerts_dashboard"))
+
+    def consume():
+        engine = dashboard.AlertEngine(dashboard.DEFAULT_RULES)
+        tailer = dashboard.LogTailer(corpus, from_start=True)
+        expected, seen, alerts = manifest["lines"], 0, 0
+        for service_name, line in tailer.lines():
+            log = json.loads(line)
+            alerts += len(engine.observe(service_name, log.get("level", "INFO"),
+                                         log.get("latency"), log.get("message")))
+            seen += 1
+            if seen >= expected:
+                break
+        return alerts
+
+    steps.run("tail_and_alert", consume, lines=manifest["lines"])
+    return steps.results
+
+
+def child(mode: str, corpus: Path):
+    manifest = json.loads((corpus / "corpus.json").read_text())
+    # Tools print debug lines; keep stdout for the result
+    stdout, sys.stdout = sys.stdout, sys.stderr
+    try:
+        results = bench_dashboard(corpus, manifest) if mode == "dashboard" else bench_analyst(mode, corpus, manifest)
+    finally:
+        sys.stdout = stdout
+    print(json.dumps(results))
+
+
+# ==============================================================================
+# DRIVER
+# ==============================================================================
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_suite(corpus: Path, modes) -> dict:
+    manifest = json.loads((corpus / "corpus.json").read_text())
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "corpus": {"path": str(corpus), "bytes": manifest["bytes"], "lines": manifest["lines"],
+                   "seed": manifest["seed"]},
+        "modes": {},
+    }
+    for mode in modes:
+        print(f"⏱️  {mode} ...", file=sys.stderr, flush=True)
+        proc = subprocess.run([sys.executable, __file__, "--child", mode, "--corpus", str(corpus)],
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            report["modes"][mode] = {"error": proc.stderr.strip().splitlines()[-1:]}
+            continue
+        report["modes"][mode] = json.loads(proc.stdout.strip().splitlines()[-1])
+    return report
+
+
+def print_report(report: dict, baseline: dict = None, threshold: float = DEFAULT_THRESHOLD) -> int:
+    """Print every step (with the change vs ``baseline``); return the number of regressions."""
+    corpus = report["corpus"]
+    print(f"\n📊 {corpus['lines']:,} lines, {corpus['bytes'] / 1024 ** 2:.1f} MB, commit {report['commit']}")
+    regressions = 0
+    for mode, steps in report["modes"].items():
+        print(f"\n[{mode}]")
+        if "error" in steps:
+            print(f"  ❌ {steps['error']}")
+            continue
+        for name, r in steps.items():
+            line = f"  {name:38s} {r['seconds']:9.3f}s  {r['peak_rss_mb']:8.1f} MB"
+            if r.get("lines_per_sec"):
+                line += f"  {r['lines_per_sec']:>10,} lines/s"
+            old = (baseline or {}).get("modes", {}).get(mode, {}).get(name)
+            if old and old.get("seconds"):
+                change = r["seconds"] / old["seconds"] - 1
+                line += f"  {change:+.0%}"
+                # Ignore noise on very fast steps
+                if change > threshold and r["seconds"] > 0.05:
+                    line += "  ⚠️ REGRESSION"
+                    regressions += 1
+            print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Log Analyst tools and the alerts dashboard.")
+    parser.add_argument("--corpus", help="Corpus directory from generate_logs.py (generated if missing)")
+    parser.add_argument("--size", default="100MB", help="Corpus size to generate when --corpus has none")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Comma-separated subset of {', '.join(MODES)}")
+    parser.add_argument("--out", default=str(BENCH_DIR / "results"), help="Directory for the JSON result")
+    parser.add_argument("--compare", help="Earlier result JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Slowdown fraction that counts as a regression")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    corpus = Path(args.corpus or BENCH_DIR / "corpus" / args.size.lower())
+    if args.child:
+        return child(args.child, corpus)
+
+    if not (corpus / "corpus.json").exists():
+        from generate_logs import generate, parse_size
+        print(f"📝 Generating {args.size} corpus in {corpus}", file=sys.stderr)
+        generate(corpus, parse_size(args.size))
+
+    report = run_suite(corpus, [m.strip() for m in args.modes.split(",") if m.strip()])
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    path = out / f"{datetime.now():%Y%m%d-%H%M%S}-{report['commit']}.json"
+    path.write_text(json.dumps(report, indent=2))
+
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    regressions = print_report(report, baseline, args.threshold)
+    print(f"\n💾 Saved {path}")
+    if regressions:
+        print(f"⚠️  {regressions} step(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
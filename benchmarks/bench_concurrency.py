@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+# ==============================================================================
+# CONCURRENCY BENCHMARK
+# Starts one MCP server over stdio, as an MCP client would, and calls the same
+# tool N times: first one after another, then all at once. A server whose tools
+# block its event loop answers the parallel batch in about the sequential time.
+# A non-blocking one answers it in about the time of its slowest single call.
+# A first parallel batch on the fresh server checks that cold calls do not
+# race on lazy start-up (any failed call aborts the run).
+#
+#   python benchmarks/bench_concurrency.py                      # 8 x pg_sleep(1) on the Database Inspector
+#   python benchmarks/bench_concurrency.py --scenario log-stats -n 16
+#   python benchmarks/bench_concurrency.py --server log-analyst --tool get_error_stats \
+#       --args '{"service_name": "payment"}'
+# ==============================================================================
+
+BENCH_DIR = Path(__file__).resolve().parent
+SERVERS_DIR = BENCH_DIR.parent / "mcp-servers"
+SERVERS = {
+    "log-analyst": SERVERS_DIR / "log-analyst" / "server.py",
+    "database-inspector": SERVERS_DIR / "database-inspector" / "src" / "server.py",
+    "github-sentinel": SERVERS_DIR / "github-sentinel" / "src" / "server.py",
+    "notification-service": SERVERS_DIR / "notification-service" / "server.py",
+}
+# name -> (server, tool, arguments, extra environment)
+SCENARIOS = {
+    "db-sleep": ("database-inspector", "run_read_query", {"query": "SELECT pg_sleep(1)"}, {}),
+    "db-performance": ("database-inspector", "check_performance", {}, {}),
+    "log-stats": ("log-analyst", "get_error_stats", {"service_name": "payment"}, {}),
+    "commits": ("github-sentinel", "check_recent_commits", {"limit": 5}, {}),
+}
+# A parallel batch slower than this multiple of its slowest call is reported as serialised.
+# Calls shorter than MIN_CALL_SECONDS are not judged: stdio round-trips dominate them.
+OVERLAP_THRESHOLD = 1.5
+MIN_CALL_SECONDS = 0.05
+
+
+async def _timed_call(session: ClientSession, tool: str, arguments: dict) -> float:
+    began = time.perf_counter()
+    result = await session.call_tool(tool, arguments)
+    seconds = time.perf_counter() - began
+    if result.isError:
+        text = "".join(getattr(block, "text", "") for block in result.content)
+        raise RuntimeError(f"{tool} failed: {text[:300]}")
+    return seconds
+
+
+async def run_benchmark(server: str, tool: str, arguments: dict, n: int, env: dict) -> dict:
+    script = SERVERS[server]
+    params = StdioServerParameters(command=sys.executable, args=[str(script)], cwd=str(script.parent),
+                                   env={**os.environ, **env})
+    with open(os.devnull, "w") as errlog:
+        async with stdio_client(params, errlog=errlog) as (read, write), ClientSession(read, write) as session:
+            started = time.perf_counter()
+            await session.initialize()
+            ready = time.perf_counter() - started
+            # Cold round: the first calls of a fresh server race on lazy imports,
+            # pool creation and first ingestion
+            began = time.perf_counter()
+            cold = await asyncio.gather(*(_timed_call(session, tool, arguments) for _ in range(n)))
+            cold_wall = time.perf_counter() - began
+
+            # Warm-up: connection pools, ingestion and caches are filled before timing
+            warmup = await _timed_call(session, tool, arguments)
+
+            began = time.perf_counter()
+            sequential = [await _timed_call(session, tool, arguments) for _ in range(n)]
+            sequential_wall = time.perf_counter() - began
+
+            began = time.perf_counter()
+            parallel = await asyncio.gather(*(_timed_call(session, tool, arguments) for _ in range(n)))
+            parallel_wall = time.perf_counter() - began
+
+    slowest_single = max(sequential)
+    return {
+        "server": server,
+        "tool": tool,
+        "arguments": arguments,
+        "calls": n,
+        "startup_seconds": round(ready, 3),
+        "cold_parallel": {"wall_seconds": round(cold_wall, 4),
+                          "slowest_call": round(max(cold), 4)},
+        "warmup_seconds": round(warmup, 4),
+        "sequential": {"wall_seconds": round(sequential_wall, 4),
+                       "median_call": round(statistics.median(sequential), 4),
+                       "slowest_call": round(slowest_single, 4)},
+        "parallel": {"wall_seconds": round(parallel_wall, 4),
+                     "median_call": round(statistics.median(parallel), 4),
+                     "slowest_call": round(max(parallel), 4)},
+        "speedup": round(sequential_wall / parallel_wall, 2) if parallel_wall else None,
+        "parallel_vs_slowest_single": round(parallel_wall / slowest_single, 2) if slowest_single else None,
+    }
+
+
+def print_report(report: dict):
+    print(f"\n⚡ {report['server']} · {report['tool']} × {report['calls']}")
+    print(f"   start-up {report['startup_seconds']:.2f}s, cold parallel batch "
+          f"{report['cold_parallel']['wall_seconds']:.3f}s, warm-up call {report['warmup_seconds']:.3f}s")
+    for mode in ("sequential", "parallel"):
+        r = report[mode]
+        print(f"   {mode:<11} wall {r['wall_seconds']:8.3f}s   median call {r['median_call']:.3f}s"
+              f"   slowest {r['slowest_call']:.3f}s")
+    ratio = report["parallel_vs_slowest_single"]
+    print(f"   speedup ×{report['speedup']}, parallel wall = {ratio}× the slowest single call")
+    if report["sequential"]["median_call"] < MIN_CALL_SECONDS:
+        print(f"   (calls under {MIN_CALL_SECONDS * 1000:.0f}ms: transport overhead dominates, overlap not judged)")
+    elif ratio and ratio > OVERLAP_THRESHOLD:
+        print(f"⚠️  Parallel calls did not overlap (more than {OVERLAP_THRESHOLD}× the slowest call). "
+              f"Check for blocking tools, or a pool smaller than -n (DB_POOL_SIZE, MCP_TOOL_THREADS).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sequential and parallel tool calls on one MCP server.")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="db-sleep", help="Preset server/tool/arguments")
+    parser.add_argument("--server", choices=SERVERS, help="Override the scenario's server")
+    parser.add_argument("--tool", help="Override the scenario's tool")
+    parser.add_argument("--args", help="Override the scenario's tool arguments (JSON object)")
+    parser.add_argument("-n", type=int, default=8, help="Calls per batch")
+    parser.add_argument("--out", help="Write the result as JSON to this file")
+    args = parser.parse_args()
+
+    server, tool, arguments, env = SCENARIOS[args.scenario]
+    server = args.server or server
+    tool = args.tool or tool
+    arguments = json.loads(args.args) if args.args else arguments
+    # Give the pools enough room for the whole batch, unless set explicitly
+    env = {"DB_POOL_SIZE": str(args.n), "MCP_TOOL_THREADS": str(max(args.n, 16)), **env}
+    env = {k: v for k, v in env.items() if k not in os.environ}
+
+    report = asyncio.run(run_benchmark(server, tool, arguments, args.n, env))
+    print_report(report)
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+        print(f"\n💾 Saved {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from bench_concurrency import SERVERS, SERVERS_DIR
+
+# ==============================================================================
+# START-UP BENCHMARK
+# Measures what an MCP host waits for on every (re)connect: spawning the
+# server, the initialize handshake and the first list_tools. Each run starts
+# a fresh process over stdio. With --attach, the servers are reached through
+# shared/attach.py: the first run starts the warm daemon, later runs attach
+# to it (daemons run in a private MCP_DAEMON_DIR and are stopped at the end).
+#
+#   python benchmarks/bench_startup.py
+#   python benchmarks/bench_startup.py --runs 10 --attach
+#   python benchmarks/bench_startup.py --servers log-analyst --out startup.json
+# ==============================================================================
+
+SERVERS = {**SERVERS, "incident-orchestrator": SERVERS_DIR / "incident-orchestrator" / "server.py"}
+ATTACH = SERVERS_DIR / "shared" / "attach.py"
+
+
+async def time_to_ready(script: Path, attach: bool, env: dict) -> float:
+    args = [str(ATTACH), str(script)] if attach else [str(script)]
+    params = StdioServerParameters(command=sys.executable, args=args, cwd=str(script.parent), env=env)
+    began = time.perf_counter()
+    with open(os.devnull, "w") as errlog:
+        async with stdio_client(params, errlog=errlog) as (read, write), ClientSession(read, write) as session:
+            await session.initialize()
+            await session.list_tools()
+            return time.perf_counter() - began
+
+
+async def run_benchmark(servers, runs: int, attach: bool, env: dict) -> dict:
+    results = {}
+    for server in servers:
+        times = [await time_to_ready(SERVERS[server], attach, env) for _ in range(runs)]
+        # With --attach the first run starts the daemon: report it apart
+        cold, warm = (times[0], times[1:]) if attach and runs > 1 else (None, times)
+        results[server] = {
+            "runs": len(warm),
+            "median_seconds": round(statistics.median(warm), 3),
+            "min_seconds": round(min(warm), 3),
+            "max_seconds": round(max(warm), 3),
+            "daemon_start_seconds": round(cold, 3) if cold is not None else None,
+        }
+    return results
+
+
+def print_report(results: dict, attach: bool):
+    mode = "attach to warm daemon" if attach else "cold stdio start"
+    print(f"\n🚀 Time to ready (initialize + list_tools), {mode}")
+    for server, r in results.items():
+        line = (f"   {server:<22} median {r['median_seconds']:6.3f}s   min {r['min_seconds']:6.3f}s"
+                f"   max {r['max_seconds']:6.3f}s   ({r['runs']} runs)")
+        if r["daemon_start_seconds"] is not None:
+            line += f"   daemon start {r['daemon_start_seconds']:.3f}s"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how long each MCP server takes to become ready.")
+    parser.add_argument("--servers", nargs="+", choices=SERVERS, default=list(SERVERS), help="Servers to measure")
+    parser.add_argument("--runs", type=int, default=5, help="Starts per server")
+    parser.add_argument("--attach", action="store_true", help="Connect through shared/attach.py (warm daemons)")
+    parser.add_argument("--out", help="Write the result as JSON to this file")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    with tempfile.TemporaryDirectory(prefix="mcp-daemons-") as daemon_dir:
+        if args.attach:
+            env["MCP_DAEMON_DIR"] = daemon_dir
+        try:
+            results = asyncio.run(run_benchmark(args.servers, args.runs, args.attach, env))
+        finally:
+            if args.attach:
+                for server in args.servers:
+                    subprocess.run([sys.executable, str(ATTACH), str(SERVERS[server]), "--stop"],
+                                   env=env, stdout=subprocess.DEVNULL)
+
+    print_report(results, args.attach)
+    if args.out:
+        Path(args.out).write_text(json.dumps({"attach": args.attach, "servers": results}, indent=2))
+        print(f"\n💾 Saved {args.out}")
+
+
+if __name__ == "__main__":
+    main()
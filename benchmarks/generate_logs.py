@@ -0,0 +1,160 @@
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# ==============================================================================
+# SYNTHETIC LOG CORPUS
+# Writes payment/inventory/auth logs in the same JSON schema the services emit
+# (see services/common/structured_logging.py), with timestamps spread over a
+# time span ending now and a few injected incident bursts. Line content is
+# deterministic for a given --seed; a corpus.json manifest records the time
+# span, incident windows and line counts per file.
+#
+#   python benchmarks/generate_logs.py --size 100MB --out /tmp/corpus
+# ==============================================================================
+
+# Share of the corpus (bytes) per service
+MIX = {"payment-service": 0.5, "inventory-service": 0.3, "auth-service": 0.2}
+WRITE_BUFFER = 4 * 1024 * 1024
+UNITS = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().upper()
+    for unit, factor in UNITS.items():
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * factor)
+    return int(text)
+
+
+def _trace_id(rng: random.Random) -> str:
+    h = "%032x" % rng.getrandbits(128)
+    return f"{h[:8]}-{h[8:12]}-4{h[13:16]}-{h[16:20]}-{h[20:]}"
+
+
+# Each line function takes (rng, in_incident) and returns the record fields after
+# "timestamp"; they mirror the log_event / logger calls in services/*/main.py.
+def payment_line(rng: random.Random, incident: bool) -> dict:
+    trace_id = _trace_id(rng)
+    if rng.random() < (0.45 if incident else 0.01):
+        host = rng.choice(["production_db", "production_db_replica"])
+        return {"level": "ERROR", "service": "payment-service", "environment": "production",
+                "message": f"DatabaseConnection: Connection refused to '{host}' after {rng.randint(1, 5)} retries",
+                "trace_id": trace_id, "component": "db-connector", "error_code": "db_connection_refused"}
+    latency_ms = int(rng.lognormvariate(4.8, 0.4))
+    return {"level": "INFO", "service": "payment-service", "environment": "production",
+            "message": f"Transaction {trace_id} processed successfully in {latency_ms}ms",
+            "trace_id": trace_id, "component": "payment-core"}
+
+
+def inventory_line(rng: random.Random, incident: bool) -> dict:
+    delay = rng.uniform(1.0, 6.0) if incident and rng.random() < 0.6 else rng.uniform(0.1, 2.0)
+    if delay > 1.5:
+        return {"level": "WARNING", "service": "inventory-service",
+                "message": f"Slow database query detected: {delay}s", "latency": delay}
+    return {"level": "INFO", "service": "inventory-service",
+            "message": "Inventory check completed", "stock_status": "in_stock"}
+
+
+def auth_line(rng: random.Random, incident: bool) -> dict:
+    if rng.random() < (0.7 if incident else 0.05):
+        return {"level": "ERROR", "service": "auth-service",
+                "message": "Configuration Error: Issuer Mismatch", "error_code": "invalid_issuer_config"}
+    return {"level": "INFO", "service": "auth-service",
+            "message": "Token validated successfully", "user_id": rng.randint(1000, 9999)}
+
+
+LINES = {"payment-service": payment_line, "inventory-service": inventory_line, "auth-service": auth_line}
+
+
+def incident_windows(rng: random.Random, span: float, count: int):
+    """``count`` (start, end) offsets into the span, each 2-5 minutes long."""
+    windows = []
+    for _ in range(count):
+        length = rng.uniform(120, 300)
+        start = rng.uniform(0, max(0.0, span - length))
+        windows.append((start, start + length))
+    return sorted(windows)
+
+
+def write_service(path: Path, service: str, target_bytes: int, start: datetime, span: float,
+                  incidents, rng: random.Random) -> dict:
+    """Append lines until the file reaches ``target_bytes``; timestamps advance with progress."""
+    make = LINES[service]
+    encode = json.JSONEncoder().encode
+    written = lines = errors = 0
+    buffer = []
+    buffered = 0
+    base = start.timestamp()
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target_bytes:
+            offset = span * written / target_bytes
+            incident = any(a <= offset < b for a, b in incidents)
+            fields = make(rng, incident)
+            ts = datetime.fromtimestamp(base + offset, tz=timezone.utc)
+            line = encode({"timestamp": ts.isoformat(timespec="microseconds").replace("+00:00", "Z"),
+                           **fields}) + "\n"
+            buffer.append(line)
+            buffered += len(line)
+            written += len(line)
+            lines += 1
+            if fields["level"] == "ERROR":
+                errors += 1
+            if buffered >= WRITE_BUFFER:
+                f.write("".join(buffer))
+                buffer, buffered = [], 0
+        f.write("".join(buffer))
+    return {"bytes": written, "lines": lines, "errors": errors}
+
+
+def generate(out: Path, size: int, hours: float = 24.0, incidents: int = 3, seed: int = 42,
+             end: datetime = None) -> dict:
+    """Write one log file per service under ``out`` and return the manifest."""
+    out.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    end = end or datetime.now(timezone.utc)
+    span = hours * 3600
+    start = end - timedelta(seconds=span)
+    windows = incident_windows(rng, span, incidents)
+    files = {}
+    for service, share in MIX.items():
+        files[f"{service}.log"] = write_service(out / f"{service}.log", service, int(size * share),
+                                                start, span, windows, random.Random(rng.random()))
+    manifest = {
+        "seed": seed,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "incidents": [
+            {"start": (start + timedelta(seconds=a)).isoformat(), "end": (start + timedelta(seconds=b)).isoformat()}
+            for a, b in windows
+        ],
+        "bytes": sum(f["bytes"] for f in files.values()),
+        "lines": sum(f["lines"] for f in files.values()),
+        "files": files,
+    }
+    (out / "corpus.json").write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic service log corpus.")
+    parser.add_argument("--size", default="10MB", help="Total corpus size, e.g. 10MB, 1GB, 10GB")
+    parser.add_argument("--out", default="benchmarks/corpus", help="Output directory")
+    parser.add_argument("--hours", type=float, default=24.0, help="Time span covered by the logs")
+    parser.add_argument("--incidents", type=int, default=3, help="Number of injected incident bursts")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    began = time.perf_counter()
+    manifest = generate(Path(args.out), parse_size(args.size), args.hours, args.incidents, args.seed)
+    elapsed = time.perf_counter() - began
+    print(f"✅ Wrote {manifest['lines']:,} lines ({manifest['bytes'] / UNITS['MB']:.1f} MB) to {args.out} "
+          f"in {elapsed:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+# ==============================================================================
+# OPEN-LOOP LOAD GENERATOR
+# Requests are scheduled on a fixed arrival timeline (the target RPS), not sent
+# when the previous one finishes. A slow service therefore builds up a queue
+# instead of quietly lowering the request rate, and latency is measured from
+# when each request *should* have been sent, so stalls are not hidden
+# (coordinated omission).
+#
+#   python load_generator.py mixed --rps 50 --duration 60
+#   python load_generator.py payment --stages "10->300:120,300:60" --max-in-flight 500
+#   python load_generator.py auth --burst 5          # quick failure trigger
+# ==============================================================================
+
+SERVICES = {
+    "payment": "http://localhost:8080/process-transaction",
+    "inventory": "http://localhost:8081/check-stock",
+    "auth": "http://localhost:8082/validate",
+}
+
+# Scenario -> {service: weight}
+SCENARIOS = {
+    "payment": {"payment": 1},
+    "inventory": {"inventory": 1},
+    "auth": {"auth": 1},
+    "mixed": {"payment": 5, "inventory": 3, "auth": 2},
+}
+
+
+@dataclass
+class Stage:
+    start_rps: float
+    end_rps: float
+    seconds: float
+
+    def rate(self, t: float) -> float:
+        """Target RPS ``t`` seconds into the stage (linear ramp)."""
+        if self.seconds <= 0:
+            return self.end_rps
+        return self.start_rps + (self.end_rps - self.start_rps) * min(1.0, t / self.seconds)
+
+    def time_at(self, n: float) -> float:
+        """Seconds into the stage by which ``n`` requests are due (inf if never).
+
+        Inverts the expected count start_rps*t + (end_rps-start_rps)*t^2/(2*seconds).
+        """
+        a = self.start_rps
+        c = (self.end_rps - a) / (2 * self.seconds) if self.seconds > 0 else 0.0
+        disc = a * a + 4 * c * n
+        if disc < 0:
+            return math.inf
+        denom = a + math.sqrt(disc)
+        return 2 * n / denom if denom > 0 else math.inf
+
+
+def parse_stages(spec: str) -> List[Stage]:
+    """"10->200:60,200:30" -> ramp 10..200 RPS over 60s, then hold 200 RPS for 30s."""
+    stages = []
+    for part in spec.split(","):
+        rates, _, seconds = part.strip().rpartition(":")
+        start, _, end = rates.partition("->")
+        stages.append(Stage(float(start), float(end or start), float(seconds)))
+    return stages
+
+
+def percentile(sorted_values, q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+@dataclass
+class Recorder:
+    """Latencies (seconds, measured from the scheduled send time) and outcomes for one target."""
+    latencies: array = field(default_factory=lambda: array("d"))
+    statuses: Dict[str, int] = field(default_factory=dict)
+    errors: int = 0
+    late: int = 0  # waited for a free connection slot before it could be sent
+
+    def record(self, latency: float, status: str, failed: bool):
+        self.latencies.append(latency)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if failed:
+            self.errors += 1
+
+    def summary(self, elapsed: float) -> dict:
+        values = sorted(self.latencies)
+        count = len(values)
+        return {
+            "requests": count,
+            "rps": round(count / elapsed, 1) if elapsed else None,
+            "errors": self.errors,
+            "error_rate": round(self.errors / count, 4) if count else None,
+            "late": self.late,
+            "p50": _ms(percentile(values, 0.50)),
+            "p90": _ms(percentile(values, 0.90)),
+            "p99": _ms(percentile(values, 0.99)),
+            "max": _ms(values[-1] if values else None),
+            "status_codes": dict(sorted(self.statuses.items())),
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+class LoadGenerator:
+    def __init__(self, mix: Dict[str, float], stages: List[Stage], max_in_flight: int = 256,
+                 timeout: float = 10.0, poisson: bool = True, report_every: float = 5.0,
+                 urls: Optional[Dict[str, str]] = None, burst: Optional[int] = None):
+        self.burst = burst
+        self.urls = urls or SERVICES
+        self.targets = list(mix)
+        self.weights = [mix[name] for name in self.targets]
+        self.stages = stages
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.poisson = poisson
+        self.report_every = report_every
+        self.results = {name: Recorder() for name in self.targets}
+        # Rolling numbers for the progress line, reset every report
+        self._window: List[Tuple[float, bool]] = []
+        self._in_flight = 0
+
+    def _schedule(self):
+        """Yield (scheduled send time relative to start, target) following the stages."""
+        if self.burst:
+            for _ in range(self.burst):
+                yield 0.0, random.choices(self.targets, self.weights)[0]
+            return
+        offset = 0.0
+        for stage in self.stages:
+            # Space requests evenly (Poisson: exponentially) in expected count and map
+            # each back to time, so a ramp up from 0 RPS fills in from its first second
+            n = 0.0
+            while True:
+                n += random.expovariate(1.0) if self.poisson else 1.0
+                t = stage.time_at(n)
+                if t >= stage.seconds:
+                    break
+                yield offset + t, random.choices(self.targets, self.weights)[0]
+            offset += stage.seconds
+
+    async def _send(self, client: httpx.AsyncClient, slots: asyncio.Semaphore, target: str,
+                    scheduled: float):
+        recorder = self.results[target]
+        if slots.locked():
+            recorder.late += 1
+        async with slots:
+            self._in_flight += 1
+            try:
+                response = await client.get(self.urls[target])
+                status, failed = str(response.status_code), response.status_code >= 400
+            except httpx.HTTPError as e:
+                status, failed = type(e).__name__, True
+            finally:
+                self._in_flight -= 1
+        latency = time.perf_counter() - scheduled
+        recorder.record(latency, status, failed)
+        self._window.append((latency, failed))
+
+    async def _report(self, started: float):
+        last = started
+        while True:
+            await asyncio.sleep(self.report_every)
+            now = time.perf_counter()
+            window, self._window = self._window, []
+            values = sorted(latency for latency, _ in window)
+            errors = sum(1 for _, failed in window if failed)
+            target = self._target_rate(now - started)
+            print(f"[{now - started:6.1f}s] target {target:7.1f} rps | done {len(window) / (now - last):7.1f} rps"
+                  f" | in flight {self._in_flight:4d} | p50 {_ms(percentile(values, 0.5))} ms"
+                  f" | p99 {_ms(percentile(values, 0.99))} ms | errors {errors}", flush=True)
+            last = now
+
+    def _target_rate(self, t: float) -> float:
+        for stage in self.stages:
+            if t < stage.seconds:
+                return stage.rate(t)
+            t -= stage.seconds
+        return 0.0
+
+    async def run(self) -> dict:
+        limits = httpx.Limits(max_connections=self.max_in_flight,
+                              max_keepalive_connections=self.max_in_flight)
+        slots = asyncio.Semaphore(self.max_in_flight)
+        tasks = set()
+        async with httpx.AsyncClient(limits=limits, timeout=self.timeout) as client:
+            started = time.perf_counter()
+            reporter = asyncio.ensure_future(self._report(started)) if self.report_every else None
+            for at, target in self._schedule():
+                delay = started + at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                task = asyncio.ensure_future(self._send(client, slots, target, started + at))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - started
+            if reporter:
+                reporter.cancel()
+
+        return {
+            "elapsed_s": round(elapsed, 1),
+            "targets": {name: rec.summary(elapsed) for name, rec in self.results.items()},
+        }
+
+
+def print_summary(summary: dict):
+    print("\n" + "=" * 50)
+    print(f"📊 LOAD TEST SUMMARY ({summary['elapsed_s']}s)")
+    print("=" * 50)
+    for name, s in summary["targets"].items():
+        print(f"{name:10s} {s['requests']:7d} req  {s['rps'] or 0:7.1f} rps  "
+              f"errors {s['errors']} ({(s['error_rate'] or 0) * 100:.1f}%)  late {s['late']}")
+        print(f"{'':10s} p50 {s['p50']} ms  p90 {s['p90']} ms  p99 {s['p99']} ms  max {s['max']} ms")
+        print(f"{'':10s} status {s['status_codes']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load generator for the platform services.")
+    parser.add_argument("scenario", choices=sorted(SCENARIOS), help="Which services to hit")
+    parser.add_argument("--rps", type=float, default=10, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to hold --rps")
+    parser.add_argument("--ramp", type=float, default=0, help="Seconds to ramp from 0 up to --rps first")
+    parser.add_argument("--stages", help='Load profile, overrides --rps/--duration/--ramp: "10->200:60,200:30"')
+    parser.add_argument("--burst", type=int, help="Send N requests as fast as allowed and stop")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Concurrency (and connection pool) limit")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout (seconds)")
+    parser.add_argument("--uniform", action="store_true", help="Evenly spaced arrivals instead of Poisson")
+    parser.add_argument("--report-every", type=float, default=5.0, help="Progress line interval; 0 disables")
+    parser.add_argument("--json", action="store_true", help="Print the final summary as JSON")
+    args = parser.parse_args()
+
+    if args.stages:
+        stages = parse_stages(args.stages)
+    else:
+        stages = ([Stage(0, args.rps, args.ramp)] if args.ramp else []) + [Stage(args.rps, args.rps, args.duration)]
+
+    generator = LoadGenerator(SCENARIOS[args.scenario], stages, max_in_flight=args.max_in_flight,
+                              timeout=args.timeout, poisson=not args.uniform,
+                              report_every=0 if args.burst else args.report_every, burst=args.burst)
+    if args.burst:
+        print(f"🧨 Sending {args.burst} requests to '{args.scenario}'", file=sys.stderr)
+    else:
+        print(f"🚀 Load generator: scenario '{args.scenario}', "
+              f"{sum(s.seconds for s in stages):.0f}s, up to {max(s.end_rps for s in stages):.0f} rps", file=sys.stderr)
+    summary = asyncio.run(generator.run())
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
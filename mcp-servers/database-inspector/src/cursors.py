@@ -0,0 +1,155 @@
+import json
+import secrets
+import threading
+import time
+from typing import Dict, Optional
+
+from instrumentation import span
+from lazy import lazy_import
+
+# Loaded on first use, so the server answers the MCP handshake without it
+psycopg2 = lazy_import("psycopg2")
+
+# ==============================================================================
+# PAGED READ QUERIES
+# run_read_query opens a server-side (named) cursor inside a READ ONLY
+# transaction and returns one page at a time, so only a page of rows ever
+# sits in this process and in the agent's context. If more rows remain, the
+# cursor stays open on its pooled connection under a page token until it is
+# read to the end, reaches ``max_rows``, or sits unused for ``ttl`` seconds.
+# Postgres enforces the time limits itself too (statement_timeout per call,
+# idle_in_transaction_session_timeout) in case this process goes away.
+# ==============================================================================
+
+# Longer text values are cut to keep pages small
+MAX_CELL_CHARS = 500
+
+
+class _OpenCursor:
+    __slots__ = ("conn", "cursor", "columns", "pending", "rows_read", "expires")
+
+    def __init__(self, conn, cursor):
+        self.conn = conn
+        self.cursor = cursor
+        self.columns = None
+        self.pending = None  # the row fetched beyond the last page
+        self.rows_read = 0
+        self.expires = 0.0
+
+
+def _cell(value):
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    text = value if isinstance(value, str) else str(value)
+    if len(text) > MAX_CELL_CHARS:
+        return text[:MAX_CELL_CHARS] + f"...(+{len(text) - MAX_CELL_CHARS} chars)"
+    return text
+
+
+class CursorRegistry:
+    def __init__(self, pool, ttl: float = 120.0, max_open: int = 2, max_rows: int = 10_000):
+        self.pool = pool
+        self.ttl = ttl
+        # Each open cursor pins a pooled connection; keep most of the pool free
+        self.max_open = max_open
+        # Total rows one query may return across all of its pages
+        self.max_rows = max_rows
+        self._open: Dict[str, _OpenCursor] = {}
+        self._lock = threading.Lock()
+
+    def _close(self, state: _OpenCursor):
+        broken = False
+        try:
+            state.cursor.close()
+            state.conn.rollback()
+        except psycopg2.Error:
+            broken = True
+        self.pool.release(state.conn, broken)
+
+    def _expire(self, room: int = 0):
+        """Close cursors past their TTL, and the oldest ones so ``room`` more fit under ``max_open``."""
+        now = time.monotonic()
+        with self._lock:
+            stale = [t for t, s in self._open.items() if s.expires < now]
+            by_age = sorted((s.expires, t) for t, s in self._open.items() if t not in stale)
+            stale += [t for _, t in by_age[:max(0, len(by_age) - self.max_open + room)]]
+            states = [self._open.pop(t) for t in stale]
+        for state in states:
+            self._close(state)
+
+    def start(self, query: str, page_size: int, timeout_ms: int) -> dict:
+        self._expire(room=1)
+        conn = self.pool.acquire()
+        try:
+            conn.autocommit = False
+            with conn.cursor() as setup:
+                setup.execute("SET TRANSACTION READ ONLY")
+                setup.execute("SELECT set_config('statement_timeout', %s, true), "
+                              "set_config('idle_in_transaction_session_timeout', %s, true)",
+                              (str(int(timeout_ms)), str(int(self.ttl * 1000))))
+            cursor = conn.cursor(name=f"read_query_{secrets.token_hex(6)}")
+            cursor.execute(query)
+        except Exception:
+            try:
+                conn.rollback()
+                self.pool.release(conn)
+            except psycopg2.Error:
+                self.pool.release(conn, broken=True)
+            raise
+        return self._page(None, _OpenCursor(conn, cursor), page_size)
+
+    def next(self, token: str, page_size: int, timeout_ms: int) -> Optional[dict]:
+        self._expire()
+        with self._lock:
+            state = self._open.pop(token, None)
+        if state is None:
+            return None
+        try:
+            with state.conn.cursor() as setup:
+                setup.execute("SELECT set_config('statement_timeout', %s, true)", (str(int(timeout_ms)),))
+        except Exception:
+            self._close(state)
+            raise
+        return self._page(token, state, page_size)
+
+    def _page(self, token: Optional[str], state: _OpenCursor, page_size: int) -> dict:
+        page_size = max(0, min(page_size, self.max_rows - state.rows_read))
+        try:
+            # One extra row tells us whether another page exists
+            with span("fetch"):
+                rows = state.cursor.fetchmany(page_size + 1 - (state.pending is not None))
+            if state.pending is not None:
+                rows.insert(0, state.pending)
+            if state.columns is None:
+                state.columns = [col[0] for col in state.cursor.description or []]
+        except Exception:
+            self._close(state)
+            raise
+
+        more = len(rows) > page_size
+        state.pending = rows[page_size] if more else None
+        page = rows[:page_size]
+        first_row = state.rows_read
+        state.rows_read += len(page)
+
+        result = {
+            "columns": state.columns,
+            "rows": [[_cell(v) for v in row] for row in page],
+            "row_range": [first_row, state.rows_read],
+        }
+        if more and state.rows_read >= self.max_rows:
+            result["truncated"] = f"Stopped at the {self.max_rows}-row limit; add a WHERE or LIMIT clause."
+            self._close(state)
+        elif more:
+            token = token or secrets.token_urlsafe(8)
+            state.expires = time.monotonic() + self.ttl
+            with self._lock:
+                self._open[token] = state
+            result["next_page_token"] = token
+        else:
+            self._close(state)
+        return result
+
+    @staticmethod
+    def encode(result: dict) -> str:
+        return json.dumps(result, separators=(",", ":"), default=str)
@@ -0,0 +1,94 @@
+from typing import Dict, List
+
+# ==============================================================================
+# BLOCKING CHAINS
+# One query returns every session that is waiting on a lock or holding one
+# that others wait for (pg_blocking_pids), along with the lock each waiter is
+# stuck on. The blocking graph is then assembled here: root blockers are
+# sessions that block others but are not waiting themselves, and each gets
+# the tree of sessions queued behind it.
+# ==============================================================================
+
+BLOCKING_SQL = """
+    WITH sessions AS (
+        SELECT pid, usename, application_name, state, wait_event_type, wait_event,
+               pg_blocking_pids(pid) AS blocked_by,
+               extract(epoch FROM clock_timestamp() - query_start) AS query_seconds,
+               extract(epoch FROM clock_timestamp() - xact_start) AS xact_seconds,
+               left(query, 300) AS query
+        FROM pg_stat_activity
+        WHERE backend_type = 'client backend' AND pid <> pg_backend_pid()
+    )
+    SELECT s.*,
+           (SELECT string_agg(DISTINCT l.mode || ' on ' || coalesce(l.relation::regclass::text, l.locktype), ', ')
+              FROM pg_locks l
+             WHERE l.pid = s.pid AND NOT l.granted) AS waiting_for
+    FROM sessions s
+    WHERE cardinality(s.blocked_by) > 0
+       OR s.pid IN (SELECT unnest(blocked_by) FROM sessions);
+"""
+
+
+def _round(value):
+    return None if value is None else round(float(value), 1)
+
+
+def build_chains(rows: List[dict], max_depth: int = 10) -> dict:
+    """Turn BLOCKING_SQL rows into root blockers with their waiter trees, worst first."""
+    sessions = {row["pid"]: row for row in rows}
+    waiters: Dict[int, List[int]] = {}
+    for row in rows:
+        for blocker in row["blocked_by"] or []:
+            waiters.setdefault(blocker, []).append(row["pid"])
+
+    def describe(pid: int) -> dict:
+        row = sessions.get(pid, {"pid": pid})
+        return {
+            "pid": pid,
+            "state": row.get("state"),
+            "user": row.get("usename"),
+            "application": row.get("application_name") or None,
+            "wait_event": ":".join(filter(None, [row.get("wait_event_type"), row.get("wait_event")])) or None,
+            "waiting_for": row.get("waiting_for"),
+            "query_seconds": _round(row.get("query_seconds")),
+            "xact_seconds": _round(row.get("xact_seconds")),
+            "query": row.get("query"),
+        }
+
+    def tree(pid: int, seen: set, depth: int) -> dict:
+        node = describe(pid)
+        children = [w for w in waiters.get(pid, []) if w not in seen]
+        if children and depth < max_depth:
+            seen.update(children)
+            node["blocking"] = [tree(w, seen, depth + 1) for w in children]
+        return node
+
+    def behind(pid: int) -> set:
+        found, stack = set(), [pid]
+        while stack:
+            for w in waiters.get(stack.pop(), []):
+                if w not in found and w != pid:
+                    found.add(w)
+                    stack.append(w)
+        return found
+
+    blocked = {row["pid"] for row in rows if row["blocked_by"]}
+    # Sessions that block others without waiting themselves. Blockers that are
+    # also waiting only form roots when they sit in a cycle (a deadlock not yet broken).
+    roots = [pid for pid in waiters if pid not in blocked]
+    if not roots and waiters:
+        roots = [max(waiters, key=lambda p: len(behind(p)))]
+
+    chains = []
+    for pid in roots:
+        queued = behind(pid)
+        waits = [sessions[w]["query_seconds"] for w in queued
+                 if w in sessions and sessions[w]["query_seconds"] is not None]
+        chains.append({
+            "root_pid": pid,
+            "sessions_waiting": len(queued),
+            "longest_wait_seconds": _round(max(waits)) if waits else None,
+            "tree": tree(pid, {pid}, 0),
+        })
+    chains.sort(key=lambda c: (c["sessions_waiting"], c["longest_wait_seconds"] or 0), reverse=True)
+    return {"blocked_sessions": len(blocked), "root_blockers": chains}
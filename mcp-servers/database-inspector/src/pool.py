@@ -0,0 +1,177 @@
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+
+from instrumentation import span
+from lazy import lazy_import
+
+# Loaded on first use, so the server answers the MCP handshake without it
+psycopg2 = lazy_import("psycopg2")
+
+# ==============================================================================
+# CONNECTION POOL
+# A small bounded pool so tool calls reuse open connections instead of paying
+# TCP + auth on every call (and failing outright when the database is out of
+# connection slots). Idle connections are checked with SELECT 1 before reuse
+# and replaced if the backend went away. One extra connection is opened up
+# front and kept aside for remediation (terminate_query), so it still works
+# when every pooled connection is busy or the server refuses new ones.
+# ==============================================================================
+
+
+class PoolTimeout(RuntimeError):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, config: dict, maxconn: int = 4, acquire_timeout: float = 5.0,
+                 validate_after: float = 1.0, max_idle: float = 300.0, reserve: bool = True):
+        self.config = config
+        self.maxconn = maxconn
+        self.acquire_timeout = acquire_timeout
+        # Connections idle for longer than this are pinged before being handed out
+        self.validate_after = validate_after
+        # ... and closed if idle longer than this
+        self.max_idle = max_idle
+        self._idle = deque()  # (connection, returned at)
+        self._size = 0  # open pooled connections, idle or in use
+        self._cond = threading.Condition()
+        self._reserved = None
+        self._reserved_lock = threading.Lock()
+        if reserve:
+            try:
+                self._reserved = self._connect()
+            except RuntimeError as e:
+                print(f"DEBUG: Could not open the reserved connection yet: {e}", file=sys.stderr)
+
+    def _connect(self):
+        try:
+            conn = psycopg2.connect(**self.config)
+        except psycopg2.Error as e:
+            raise RuntimeError(f"Failed to connect to database: {str(e)}")
+        # Inspection queries never need to hold a transaction open between calls
+        conn.autocommit = True
+        return conn
+
+    @staticmethod
+    def _alive(conn) -> bool:
+        if conn.closed:
+            return False
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except psycopg2.Error:
+            return False
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def acquire(self, timeout: Optional[float] = None):
+        """Take a healthy connection, opening one if the pool has room; wait up to ``timeout``."""
+        with span("pool_acquire"):
+            return self._acquire(timeout)
+
+    def _acquire(self, timeout: Optional[float]):
+        deadline = time.monotonic() + (self.acquire_timeout if timeout is None else timeout)
+        while True:
+            with self._cond:
+                while not self._idle and self._size >= self.maxconn:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(
+                            f"Timed out waiting for a database connection ({self.maxconn} in use)")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    conn, returned = self._idle.pop()
+                else:
+                    conn, returned = None, None
+                    self._size += 1
+
+            if conn is None:
+                try:
+                    with span("connect"):
+                        return self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+
+            idle = time.monotonic() - returned
+            fresh = idle <= self.validate_after and not conn.closed
+            if idle <= self.max_idle and (fresh or self._alive(conn)):
+                return conn
+            # Stale or terminated backend: drop it and try again
+            self._discard(conn)
+
+    def release(self, conn, broken: bool = False):
+        if not broken and not conn.closed:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                conn.autocommit = True
+            except psycopg2.Error:
+                broken = True
+        if broken or conn.closed:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def _discard(self, conn):
+        self._close(conn)
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """``with pool.connection() as conn:`` - returned to the pool afterwards."""
+        conn = self.acquire(timeout)
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.release(conn, broken)
+
+    @contextmanager
+    def reserved(self):
+        """The connection kept aside for remediation; reconnected if it was lost."""
+        with self._reserved_lock:
+            if self._reserved is None or not self._alive(self._reserved):
+                if self._reserved is not None:
+                    self._close(self._reserved)
+                self._reserved = None
+                self._reserved = self._connect()
+            yield self._reserved
+
+    def status(self) -> dict:
+        with self._cond:
+            return {
+                "max": self.maxconn,
+                "open": self._size,
+                "idle": len(self._idle),
+                "reserved": self._reserved is not None and not self._reserved.closed,
+            }
+
+    def close(self):
+        with self._cond:
+            while self._idle:
+                self._close(self._idle.pop()[0])
+                self._size -= 1
+        with self._reserved_lock:
+            if self._reserved is not None:
+                self._close(self._reserved)
+                self._reserved = None
@@ -0,0 +1,272 @@
+import sys
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional
+
+from lazy import lazy_import
+from pgsql import fingerprint
+
+# Loaded on first use, so the server answers the MCP handshake without it
+psycopg2 = lazy_import("psycopg2")
+
+# ==============================================================================
+# ACTIVITY SAMPLER
+# A background thread snapshots the non-idle sessions in pg_stat_activity
+# every ``interval`` seconds over its own connection (one cheap catalog read
+# per tick). Samples go into fixed-size ring buffers of typed arrays, so
+# memory is set up front and old history is overwritten in place. Strings
+# (wait events, query fingerprints) are interned to small integer ids,
+# which are freed again once no row in the ring refers to them.
+# ==============================================================================
+
+SAMPLE_SQL = """
+    SELECT pid, state, wait_event_type, wait_event,
+           extract(epoch FROM clock_timestamp() - query_start) AS query_seconds,
+           left(query, 1000) AS query
+    FROM pg_stat_activity
+    WHERE state <> 'idle' AND backend_type = 'client backend' AND pid <> pg_backend_pid();
+"""
+
+class _Interner:
+    """str <-> small int, bounded and reference counted.
+
+    Each ``id`` call is one reference; ``release`` drops one when the ring row
+    holding it is overwritten. Ids nobody references any more are reused, so
+    only the strings still in the history count against ``limit``. Past it,
+    new strings map to a shared "(other)" id and are counted in ``overflow``.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.ids: Dict[str, int] = {}
+        self.values: List[str] = []
+        self.examples: List[str] = []
+        self.refs: List[int] = []
+        self.overflow = 0
+        self._free: List[int] = []
+
+    def id(self, value: str, example: str = "") -> int:
+        i = self.ids.get(value)
+        if i is None:
+            if not self._free and len(self.values) >= self.limit:
+                # One slot past the limit, taken by the first overflow
+                self.overflow += 1
+                value, example = "(other)", ""
+                i = self.ids.get(value)
+            if i is None:
+                if self._free:
+                    i = self._free.pop()
+                    self.values[i], self.examples[i] = value, example
+                else:
+                    i = len(self.values)
+                    self.values.append(value)
+                    self.examples.append(example)
+                    self.refs.append(0)
+                self.ids[value] = i
+        self.refs[i] += 1
+        return i
+
+    def release(self, i: int):
+        self.refs[i] -= 1
+        if self.refs[i] == 0:
+            del self.ids[self.values[i]]
+            self._free.append(i)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class Ring:
+    """Parallel typed arrays used as one circular buffer of records."""
+
+    def __init__(self, capacity: int, **columns: str):
+        self.capacity = capacity
+        self.columns = {name: array(code, [0]) * capacity for name, code in columns.items()}
+        self.start = 0  # physical index of the oldest record
+        self.size = 0
+
+    def append(self, **values):
+        i = (self.start + self.size) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+        for name, value in values.items():
+            self.columns[name][i] = value
+
+    def since(self, ts: float, column: str = "ts") -> range:
+        """Logical indexes of records with ``column`` >= ts (records are in time order)."""
+        col = self.columns[column]
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if col[(self.start + mid) % self.capacity] < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return range(lo, self.size)
+
+    def get(self, column: str, i: int):
+        return self.columns[column][(self.start + i) % self.capacity]
+
+
+STATES = ["active", "idle in transaction", "idle in transaction (aborted)", "fastpath function call",
+          "disabled", "other"]
+
+
+class ActivitySampler:
+    def __init__(self, config: dict, interval: float = 1.0, max_rows: int = 100_000,
+                 max_samples: int = 86_400):
+        self.config = config
+        self.interval = interval
+        # One record per tick ...
+        self.samples = Ring(max_samples, ts="d", active="H", waiting="H", idle_in_xact="H")
+        # ... and one per non-idle session in that tick
+        self.rows = Ring(max_rows, ts="d", pid="i", state="B", wait="H", query="I", seconds="f")
+        self.waits = _Interner(1000)
+        self.queries = _Interner(5000)
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._conn = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="pg-activity-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _connect(self):
+        conn = psycopg2.connect(**{**self.config, "application_name": "database-inspector-sampler"})
+        conn.autocommit = True
+        return conn
+
+    def _run(self):
+        while not self._stop.is_set():
+            began = time.monotonic()
+            try:
+                if self._conn is None or self._conn.closed:
+                    self._conn = self._connect()
+                with self._conn.cursor() as cursor:
+                    cursor.execute(SAMPLE_SQL)
+                    self._record(time.time(), cursor.fetchall())
+            except psycopg2.Error as e:
+                self.errors += 1
+                if self.errors == 1 or self.errors % 60 == 0:
+                    print(f"DEBUG: Activity sample failed ({self.errors}): {e}", file=sys.stderr)
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+            except Exception as e:
+                # A bug in recording must not silently end the sampler thread
+                self.errors += 1
+                if self.errors == 1 or self.errors % 60 == 0:
+                    print(f"DEBUG: Activity sample could not be recorded ({self.errors}): {e!r}",
+                          file=sys.stderr)
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - began)))
+
+    def _record(self, ts: float, rows):
+        with self._lock:
+            active = waiting = idle_in_xact = 0
+            for pid, state, wait_type, wait_event, seconds, query in rows:
+                if self.rows.size == self.rows.capacity:
+                    # The oldest row is about to be overwritten: drop its string references
+                    self.waits.release(self.rows.get("wait", 0))
+                    self.queries.release(self.rows.get("query", 0))
+                state_id = STATES.index(state) if state in STATES else len(STATES) - 1
+                if state == "active":
+                    active += 1
+                elif state and state.startswith("idle in transaction"):
+                    idle_in_xact += 1
+                if wait_type and wait_type not in ("Client", "Activity"):
+                    waiting += 1
+                # Active with no wait event means on CPU (or waiting on something untracked)
+                wait = f"{wait_type}:{wait_event}" if wait_type else ("CPU" if state == "active" else "-")
+                self.rows.append(ts=ts, pid=pid, state=state_id, wait=self.waits.id(wait),
+                                 query=self.queries.id(fingerprint(query), query or ""),
+                                 seconds=float(seconds or 0.0))
+            self.samples.append(ts=ts, active=active, waiting=waiting, idle_in_xact=idle_in_xact)
+
+    # --------------------------------------------------------------------------
+    # Queries over the history
+    # --------------------------------------------------------------------------
+    def timeline(self, minutes: float, bucket_seconds: int) -> List[dict]:
+        """Active / waiting / idle-in-transaction session counts per time bucket."""
+        cutoff = time.time() - minutes * 60
+        buckets: Dict[int, List[float]] = {}
+        with self._lock:
+            for i in self.samples.since(cutoff):
+                b = int(self.samples.get("ts", i) // bucket_seconds)
+                acc = buckets.setdefault(b, [0, 0, 0, 0, 0])
+                active = self.samples.get("active", i)
+                acc[0] += 1
+                acc[1] += active
+                acc[2] = max(acc[2], active)
+                acc[3] += self.samples.get("waiting", i)
+                acc[4] = max(acc[4], self.samples.get("idle_in_xact", i))
+        return [
+            {
+                "bucket": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(b * bucket_seconds)),
+                "samples": n,
+                "avg_active": round(active / n, 2),
+                "max_active": max_active,
+                "avg_waiting": round(waiting / n, 2),
+                "max_idle_in_transaction": idle_max,
+            }
+            for b, (n, active, max_active, waiting, idle_max) in sorted(buckets.items())
+        ]
+
+    def top_waits(self, minutes: float, limit: int) -> List[dict]:
+        """Wait events ranked by sampled session time (samples x interval)."""
+        cutoff = time.time() - minutes * 60
+        counts: Dict[int, int] = {}
+        with self._lock:
+            for i in self.rows.since(cutoff):
+                w = self.rows.get("wait", i)
+                counts[w] = counts.get(w, 0) + 1
+            total = sum(counts.values())
+            ranked = sorted(counts.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+            return [
+                {"wait_event": self.waits.values[w], "session_seconds": round(n * self.interval, 1),
+                 "share": round(n / total, 3)}
+                for w, n in ranked
+            ]
+
+    def top_queries(self, minutes: float, limit: int) -> List[dict]:
+        """Query fingerprints ranked by the longest run seen, with sampled session time."""
+        cutoff = time.time() - minutes * 60
+        stats: Dict[int, list] = {}  # query id -> [samples, longest seconds, pids]
+        with self._lock:
+            for i in self.rows.since(cutoff):
+                q = self.rows.get("query", i)
+                entry = stats.get(q)
+                if entry is None:
+                    entry = stats[q] = [0, 0.0, set()]
+                entry[0] += 1
+                entry[1] = max(entry[1], self.rows.get("seconds", i))
+                entry[2].add(self.rows.get("pid", i))
+            ranked = sorted(stats.items(), key=lambda kv: kv[1][1], reverse=True)[:limit]
+            return [
+                {"fingerprint": self.queries.values[q], "longest_seconds": round(longest, 1),
+                 "session_seconds": round(n * self.interval, 1), "sessions": len(pids),
+                 "example": self.queries.examples[q][:300]}
+                for q, (n, longest, pids) in ranked
+            ]
+
+    def status(self) -> dict:
+        with self._lock:
+            oldest = self.samples.get("ts", 0) if self.samples.size else None
+            return {
+                "interval_s": self.interval,
+                "samples": self.samples.size,
+                "session_rows": self.rows.size,
+                "history_s": round(time.time() - oldest, 1) if oldest else 0,
+                "errors": self.errors,
+                "fingerprints": len(self.queries),
+                # Rows recorded as "(other)" because the fingerprint table was full
+                "fingerprint_overflow": self.queries.overflow,
+            }
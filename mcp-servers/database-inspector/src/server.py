@@ -1,8 +1,20 @@
 from mcp.server.fastmcp import FastMCP
-import psycopg2
-import psycopg2.extras
 import json
 import os
+import sys
+import threading
+from pathlib import Path
+from typing import Optional
+
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent / "shared"))
+from cursors import CursorRegistry
+from locks import BLOCKING_SQL, build_chains
+from pool import ConnectionPool
+from sampler import ActivitySampler
+from statements import StatementProfiler
+from concurrency import offload
+from instrumentation import instrument, snapshot
+from daemon import serve
 
 # Initialize the MCP Server
 mcp = FastMCP("Database Inspector")
@@ -15,22 +27,70 @@ DB_CONFIG = {
     "port": 5432,
     "user": "admin",
     "password": "password123",
-    "dbname": "platform_db"
+    "dbname": "platform_db",
+    "connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", 3)),
+    # Lets check_performance tell our own sessions apart
+    "application_name": "database-inspector",
 }
 
+# Connections are pooled for the life of the server. DB_POOL_SIZE bounds how
+# many this server holds open, plus one reserved for terminate_query.
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 4))
+ACQUIRE_TIMEOUT = float(os.getenv("DB_ACQUIRE_TIMEOUT", 5))
+
+# run_read_query limits: rows per page, total rows per query, and time per call
+QUERY_PAGE_SIZE = int(os.getenv("DB_QUERY_PAGE_SIZE", 100))
+QUERY_MAX_ROWS = int(os.getenv("DB_QUERY_MAX_ROWS", 10_000))
+QUERY_TIMEOUT_MS = int(os.getenv("DB_QUERY_TIMEOUT_MS", 5_000))
+
+# DB_SAMPLER=on snapshots pg_stat_activity in the background (one query per
+# DB_SAMPLE_INTERVAL seconds) so the history tools can look back in time.
+SAMPLER = None
+if os.getenv("DB_SAMPLER", "off").lower() == "on":
+    SAMPLER = ActivitySampler(DB_CONFIG, interval=float(os.getenv("DB_SAMPLE_INTERVAL", 1)),
+                              max_rows=int(os.getenv("DB_SAMPLE_ROWS", 100_000)))
+    SAMPLER.start()
+
+# pg_stat_statements snapshots, kept so windows can be compared without re-querying
+PROFILER = StatementProfiler(max_snapshots=int(os.getenv("DB_STATEMENT_SNAPSHOTS", 100)))
+
+SAMPLER_OFF = "Activity history is unavailable: start the server with DB_SAMPLER=on to record it."
+
+_pool = None
+_cursors = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    """Create the pool on first use, so the server starts even if the database is down."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(DB_CONFIG, maxconn=POOL_SIZE, acquire_timeout=ACQUIRE_TIMEOUT)
+        return _pool
+
+def get_cursors() -> CursorRegistry:
+    global _cursors
+    pool = get_pool()
+    with _pool_lock:
+        if _cursors is None:
+            _cursors = CursorRegistry(pool, max_rows=QUERY_MAX_ROWS)
+        return _cursors
+
 def get_connection():
-    try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        return conn
-    except Exception as e:
-        raise RuntimeError(f"Failed to connect to database: {str(e)}")
+    """``with get_connection() as conn:`` - a pooled connection, returned on exit."""
+    return get_pool().connection()
+
+def dict_cursor(conn):
+    """A cursor whose rows can also be read by column name."""
+    import psycopg2.extras  # not at the top: psycopg2 loads on first use
+    return conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
 
 @mcp.tool()
+@offload
+@instrument
 def list_tables() -> str:
     """List all tables in the public schema of the database."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
+    with get_connection() as conn, conn.cursor() as cursor:
         cursor.execute("""
             SELECT table_name 
             FROM information_schema.tables 
@@ -38,18 +98,17 @@ def list_tables() -> str:
         """)
         tables = [row[0] for row in cursor.fetchall()]
         return json.dumps({"tables": tables}, indent=2)
-    finally:
-        conn.close()
 
 @mcp.tool()
+@offload
+@instrument
 def check_performance() -> str:
     """Check for long-running queries or locks that might be slowing down the system."""
-    conn = get_connection()
-    cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-    try:
+    with get_connection() as conn, dict_cursor(conn) as cursor:
         # Query Postgres internal stats for activities running longer than 1 second
         cursor.execute("""
-            SELECT pid, state, query, age(clock_timestamp(), query_start) as duration
+            SELECT pid, state, wait_event_type, wait_event, pg_blocking_pids(pid) as blocked_by,
+                   query, age(clock_timestamp(), query_start) as duration
             FROM pg_stat_activity 
             WHERE state != 'idle' 
             AND query NOT LIKE '%pg_stat_activity%' 
@@ -66,45 +125,171 @@ def check_performance() -> str:
         if not rows:
             return "No performance issues found. Database is healthy."
             
-        return json.dumps({"long_running_queries": rows}, indent=2)
-    finally:
-        conn.close()
+        result = {"long_running_queries": rows}
+        if any(row['blocked_by'] for row in rows):
+            result["note"] = "Some queries are blocked by others (blocked_by); use get_blocking_chains to find the root blocker."
+        return json.dumps(result, indent=2)
+
+@mcp.tool()
+@offload
+@instrument
+def get_blocking_chains() -> str:
+    """
+    Find lock pile-ups: which sessions are blocked, by whom, and the ROOT blocker of each chain
+    (the session holding the lock everyone is queued behind), with wait times and how many
+    sessions wait behind it. Terminate the root blocker, not the sessions waiting on it.
+    """
+    with get_connection() as conn, dict_cursor(conn) as cursor:
+        cursor.execute(BLOCKING_SQL)
+        rows = [dict(row) for row in cursor.fetchall()]
+
+    if not rows:
+        return "No blocked sessions. No lock contention right now."
+
+    result = build_chains(rows)
+    roots = [c["root_pid"] for c in result["root_blockers"]]
+    result["suggestion"] = f"Root blocker PID(s): {roots}. terminate_query on a root releases everything queued behind it."
+    return json.dumps(result, indent=2, default=str)
+
+@mcp.tool()
+@offload
+@instrument
+def get_activity_history(minutes: int = 15, bucket_seconds: int = 60) -> str:
+    """
+    Session activity over the last N minutes from the background sampler: average/max active
+    sessions, sessions waiting, and idle-in-transaction sessions per time bucket.
+    Use it to see stalls that already cleared or load trends.
+    """
+    if SAMPLER is None:
+        return SAMPLER_OFF
+    series = SAMPLER.timeline(minutes, max(1, bucket_seconds))
+    if not series:
+        return f"No activity samples in the last {minutes} minutes."
+    return json.dumps({"sampler": SAMPLER.status(), "series": series}, indent=2)
+
+@mcp.tool()
+@offload
+@instrument
+def get_top_wait_events(minutes: int = 15, limit: int = 10) -> str:
+    """
+    What sessions spent their time waiting on over the last N minutes (Lock:*, IO:*, LWLock:*,
+    "CPU" for running), ranked by sampled session-seconds.
+    """
+    if SAMPLER is None:
+        return SAMPLER_OFF
+    waits = SAMPLER.top_waits(minutes, limit)
+    if not waits:
+        return f"No non-idle sessions sampled in the last {minutes} minutes."
+    return json.dumps({"window_minutes": minutes, "wait_events": waits}, indent=2)
+
+@mcp.tool()
+@offload
+@instrument
+def get_top_queries(minutes: int = 15, limit: int = 10) -> str:
+    """
+    Longest-running query shapes (literals stripped) seen by the sampler in the last N minutes,
+    with sampled session-seconds and how many sessions ran them.
+    """
+    if SAMPLER is None:
+        return SAMPLER_OFF
+    queries = SAMPLER.top_queries(minutes, limit)
+    if not queries:
+        return f"No non-idle sessions sampled in the last {minutes} minutes."
+    return json.dumps({"window_minutes": minutes, "queries": queries}, indent=2)
+
+@mcp.tool()
+@offload
+@instrument
+def snapshot_query_stats() -> str:
+    """
+    Record per-query statistics (pg_stat_statements, or the slow-statement log if the extension
+    is not installed) as a numbered snapshot. Take one before and after an incident window,
+    then call compare_query_stats.
+    """
+    try:
+        with get_connection() as conn:
+            snap = PROFILER.snapshot(conn)
+    except Exception as e:
+        return f"❌ Failed to snapshot query stats: {str(e)}"
+    return json.dumps({"snapshot": snap, "cached_snapshots": len(PROFILER.snapshots())}, indent=2)
+
+@mcp.tool()
+@offload
+@instrument
+def compare_query_stats(from_snapshot: Optional[int] = None, to_snapshot: Optional[int] = None,
+                        limit: int = 10, order_by: str = "total_time") -> str:
+    """
+    Which query shapes used the database's time between two snapshots: calls, total/mean time,
+    slowdown vs their earlier mean, rows, and shared-buffer hits vs reads.
+    to_snapshot defaults to a new snapshot taken now; from_snapshot defaults to the one before it.
+    order_by: total_time | mean_time | calls | slowdown | reads.
+    """
+    if to_snapshot is None:
+        try:
+            with get_connection() as conn:
+                to_snapshot = PROFILER.snapshot(conn)["id"]
+        except Exception as e:
+            return f"❌ Failed to snapshot query stats: {str(e)}"
+    after = PROFILER.get(to_snapshot)
+    if after is None:
+        return f"Error: snapshot {to_snapshot} is not cached. Available: {PROFILER.snapshots()}"
+    before = PROFILER.get(from_snapshot) if from_snapshot is not None else PROFILER.previous(after.id)
+    if before is None:
+        return (f"Only snapshot {after.id} exists so far. Call compare_query_stats again after some "
+                "traffic to see what changed since it.")
+    return json.dumps(PROFILER.compare(before, after, limit, order_by), indent=2)
 
 @mcp.tool()
-def run_read_query(query: str) -> str:
+@offload
+@instrument
+def run_read_query(query: str, page_size: int = QUERY_PAGE_SIZE, page_token: Optional[str] = None,
+                   timeout_ms: int = QUERY_TIMEOUT_MS) -> str:
     """Run a SAFE, READ-ONLY SQL query to inspect data. 
     Only SELECT queries are allowed.
+    Returns one page of rows as {"columns", "rows", "row_range"}. If more rows remain the result
+    has a "next_page_token": call again with the same query and page_token to get the next page.
+    timeout_ms bounds how long the database may spend on each call.
     """
     if not query.strip().upper().startswith("SELECT"):
         return "Error: Only SELECT queries are allowed for safety."
+    page_size = max(1, min(page_size, QUERY_MAX_ROWS))
 
-    conn = get_connection()
-    cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
     try:
-        cursor.execute(query)
-        rows = [dict(row) for row in cursor.fetchall()]
-        return json.dumps(rows, indent=2, default=str)
+        cursors = get_cursors()
+        if page_token:
+            result = cursors.next(page_token, page_size, timeout_ms)
+            if result is None:
+                return f"Error: page_token '{page_token}' has expired or was fully read. Re-run the query."
+        else:
+            result = cursors.start(query, page_size, timeout_ms)
+        return cursors.encode(result)
     except Exception as e:
         return f"Query Error: {str(e)}"
-    finally:
-        conn.close()
 
 @mcp.tool()
+@offload
+@instrument
 def terminate_query(pid: int) -> str:
     """
     Terminate a specific database query by its Process ID (PID).
     Use this when a query is stuck, locking the database, or running too long.
     """
-    conn = get_connection()
-    cursor = conn.cursor()
     try:
-        # Postgres command to kill a specific process
-        cursor.execute("SELECT pg_terminate_backend(%s);", (pid,))
-        return f"✅ Successfully terminated query with PID {pid}."
+        # Uses the reserved connection, so this works even when the pool is exhausted
+        with get_pool().reserved() as conn, conn.cursor() as cursor:
+            # Postgres command to kill a specific process
+            cursor.execute("SELECT pg_terminate_backend(%s);", (pid,))
+            return f"✅ Successfully terminated query with PID {pid}."
     except Exception as e:
         return f"❌ Failed to terminate query: {str(e)}"
-    finally:
-        conn.close()
+
+@mcp.tool()
+async def get_server_metrics(tool_name: Optional[str] = None) -> str:
+    """
+    Latency of the Database Inspector tools (p50/p95/p99, histogram, errors) and how much of it was
+    spent waiting for a pooled connection (pool_acquire) or fetching rows. Pass tool_name for one tool.
+    """
+    return json.dumps(snapshot(tool_name), indent=2)
 
 if __name__ == "__main__":
-    mcp.run()
\ No newline at end of file
+    serve(mcp, __file__)
\ No newline at end of file
@@ -1,4 +1,6 @@
 import psycopg2
+import sys
+import threading
 import time
 
 # Same config
@@ -28,5 +30,38 @@ def create_hang():
         conn.close()
         print("✅ Simulation ended.")
 
+def create_lock_pileup(waiters: int = 5):
+    print(f"🔒 Holding a row lock on 'payments' for 60 seconds with {waiters} sessions queued behind it...")
+    print("   (Go ask Claude to 'find the blocking chain' NOW!)")
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        cursor = conn.cursor()
+        # Lock a row and sit "idle in transaction" - the classic forgotten transaction
+        cursor.execute("UPDATE payments SET status = status WHERE id = 1;")
+
+        def wait_for_lock():
+            waiter = psycopg2.connect(**DB_CONFIG)
+            try:
+                waiter.cursor().execute("UPDATE payments SET amount = amount WHERE id = 1;")
+                waiter.commit()
+            except Exception:
+                pass
+            finally:
+                waiter.close()
+
+        threads = [threading.Thread(target=wait_for_lock, daemon=True) for _ in range(waiters)]
+        for t in threads:
+            t.start()
+        time.sleep(60)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+    finally:
+        conn.close()
+        print("✅ Simulation ended.")
+
 if __name__ == "__main__":
-    create_hang()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "lock":
+        create_lock_pileup()
+    else:
+        create_hang()
\ No newline at end of file
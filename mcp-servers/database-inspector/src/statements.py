@@ -0,0 +1,228 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from lazy import lazy_import
+from pgsql import StatementLogParser, fingerprint, statement_text
+
+psycopg2 = lazy_import("psycopg2")
+
+# ==============================================================================
+# QUERY PROFILER
+# Snapshots of per-statement counters, kept in memory so any two of them can
+# be diffed without touching the database again. The diff shows which query
+# shapes consumed time between the two snapshots.
+#
+# Source 1: pg_stat_statements (calls, time, rows, shared buffer hits/reads).
+# Source 2 (fallback): the server's statement log, read incrementally through
+# pg_current_logfile() / pg_read_binary_file(). Only statements slower than
+# log_min_duration_statement appear there, and there are no row or buffer
+# counts.
+# ==============================================================================
+
+# Per-fingerprint counters: calls, total_ms, rows, shared_blks_hit, shared_blks_read
+Counters = Tuple[float, float, float, float, float]
+
+STATEMENTS_SQL = """
+    SELECT queryid, left(query, 500), sum(calls), sum({total}), sum(rows),
+           sum(shared_blks_hit), sum(shared_blks_read)
+    FROM pg_stat_statements
+    WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+    GROUP BY queryid, left(query, 500);
+"""
+
+LOG_READ_LIMIT = 16 * 1024 * 1024
+
+
+class _Snapshot:
+    __slots__ = ("id", "taken_at", "source", "counters")
+
+    def __init__(self, snapshot_id: int, source: str, counters: Dict[str, Counters]):
+        self.id = snapshot_id
+        self.taken_at = time.time()
+        self.source = source
+        self.counters = counters
+
+
+class _StatementLog:
+    """Running totals per fingerprint from the Postgres statement log."""
+
+    def __init__(self):
+        self.path = None
+        self.offset = 0
+        self.totals: Dict[str, List[float]] = {}
+        self.texts: Dict[str, str] = {}
+        self._parser = StatementLogParser()
+        self._tail = b""  # partial last line, completed by the next read
+
+    def read(self, cursor):
+        cursor.execute("SELECT pg_current_logfile()")
+        path = cursor.fetchone()[0]
+        if not path:
+            raise RuntimeError("pg_stat_statements is not installed and the server has no log file "
+                               "(logging_collector is off)")
+        cursor.execute("SELECT size FROM pg_stat_file(%s)", (path,))
+        size = cursor.fetchone()[0]
+        if path != self.path or size < self.offset:
+            # Rotated or truncated: continue from the start of the new file
+            self.path, self.offset, self._tail = path, 0, b""
+            self._parser.reset()
+        partial = False
+        if size - self.offset > LOG_READ_LIMIT:
+            # Too far behind (e.g. first read of a big log): only look at the newest part
+            self.offset, self._tail, partial = size - LOG_READ_LIMIT, b"", True
+            self._parser.reset()
+        if size > self.offset:
+            cursor.execute("SELECT pg_read_binary_file(%s, %s, %s)", (path, self.offset, size - self.offset))
+            data = bytes(cursor.fetchone()[0] or b"")
+            if partial:
+                data = data[data.find(b"\n") + 1:]
+            self._consume(data)
+            self.offset = size
+
+    def _consume(self, data: bytes):
+        data = self._tail + data
+        end = data.rfind(b"\n") + 1
+        self._tail = data[end:]
+        if end:
+            for s in self._parser.feed(data[:end]):
+                self._add(statement_text(s.text), s.ms)
+
+    def _add(self, query: str, ms: float):
+        key = fingerprint(query)
+        entry = self.totals.get(key)
+        if entry is None:
+            entry = self.totals[key] = [0.0, 0.0]
+            self.texts[key] = query[:500]
+        entry[0] += 1
+        entry[1] += ms
+
+    def counters(self) -> Dict[str, Counters]:
+        return {key: (calls, ms, None, None, None) for key, (calls, ms) in self.totals.items()}
+
+
+class StatementProfiler:
+    def __init__(self, max_snapshots: int = 100):
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[int, _Snapshot]" = OrderedDict()
+        self._texts: Dict[str, str] = {}
+        self._log = _StatementLog()
+        self._next_id = 1
+        self._total_column = None  # total_exec_time (PG13+) or total_time
+        self._lock = threading.Lock()
+
+    def _from_extension(self, cursor) -> Optional[Dict[str, Counters]]:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'")
+        if cursor.fetchone() is None:
+            return None
+        if self._total_column is None:
+            cursor.execute("SELECT column_name FROM information_schema.columns "
+                           "WHERE table_name = 'pg_stat_statements' AND column_name = 'total_exec_time'")
+            self._total_column = "total_exec_time" if cursor.fetchone() else "total_time"
+        try:
+            cursor.execute(STATEMENTS_SQL.format(total=self._total_column))
+        except psycopg2.Error:
+            # Created but not in shared_preload_libraries, or no permission
+            return None
+        counters = {}
+        for queryid, query, calls, total, rows, hit, read in cursor.fetchall():
+            key = str(queryid)
+            counters[key] = (float(calls), float(total), float(rows), float(hit), float(read))
+            self._texts.setdefault(key, query)
+        return counters
+
+    def snapshot(self, conn) -> dict:
+        """Read current counters (one round trip for pg_stat_statements) and cache them."""
+        with self._lock, conn.cursor() as cursor:
+            counters = self._from_extension(cursor)
+            source = "pg_stat_statements"
+            if counters is None:
+                self._log.read(cursor)
+                counters = self._log.counters()
+                self._texts.update(self._log.texts)
+                source = "statement_log"
+            snap = _Snapshot(self._next_id, source, counters)
+            self._next_id += 1
+            self._snapshots[snap.id] = snap
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+            return self._describe(snap)
+
+    @staticmethod
+    def _describe(snap: _Snapshot) -> dict:
+        return {
+            "id": snap.id,
+            "taken_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(snap.taken_at)),
+            "source": snap.source,
+            "fingerprints": len(snap.counters),
+        }
+
+    def snapshots(self) -> List[dict]:
+        with self._lock:
+            return [self._describe(s) for s in self._snapshots.values()]
+
+    def get(self, snapshot_id: Optional[int]) -> Optional[_Snapshot]:
+        with self._lock:
+            if snapshot_id is None:
+                return next(reversed(self._snapshots.values()), None)
+            return self._snapshots.get(snapshot_id)
+
+    def previous(self, snapshot_id: int) -> Optional[_Snapshot]:
+        with self._lock:
+            earlier = [s for s in self._snapshots.values() if s.id < snapshot_id]
+            return earlier[-1] if earlier else None
+
+    def compare(self, before: _Snapshot, after: _Snapshot, limit: int = 10,
+                order_by: str = "total_time") -> dict:
+        """Per-fingerprint deltas between two snapshots, ranked by ``order_by``."""
+        rows = []
+        for key, now in after.counters.items():
+            old = before.counters.get(key)
+            if old is None or now[0] < old[0]:
+                # New since the first snapshot, or its stats were reset
+                old = (0.0, 0.0, None, None, None) if old is None else tuple(0.0 for _ in old)
+            calls = now[0] - old[0]
+            if calls <= 0:
+                continue
+            total = now[1] - old[1]
+            mean = total / calls
+            # Mean over everything before the window, to spot a shape that got slower
+            baseline = old[1] / old[0] if old[0] else None
+            row = {
+                "query": self._texts.get(key, key)[:300],
+                "calls": int(calls),
+                "total_ms": round(total, 1),
+                "mean_ms": round(mean, 2),
+                "baseline_mean_ms": round(baseline, 2) if baseline is not None else None,
+                "slowdown": round(mean / baseline, 2) if baseline else None,
+            }
+            if now[2] is not None:
+                hit, read = now[3] - (old[3] or 0), now[4] - (old[4] or 0)
+                row.update({
+                    "rows": int(now[2] - (old[2] or 0)),
+                    "shared_blks_hit": int(hit),
+                    "shared_blks_read": int(read),
+                    "cache_hit_ratio": round(hit / (hit + read), 3) if hit + read else None,
+                })
+            rows.append(row)
+
+        keys = {
+            "total_time": lambda r: r["total_ms"],
+            "mean_time": lambda r: r["mean_ms"],
+            "calls": lambda r: r["calls"],
+            "slowdown": lambda r: r["slowdown"] or 0,
+            "reads": lambda r: r.get("shared_blks_read") or 0,
+        }
+        rows.sort(key=keys.get(order_by, keys["total_time"]), reverse=True)
+        window_ms = sum(r["total_ms"] for r in rows)
+        for r in rows:
+            r["share_of_time"] = round(r["total_ms"] / window_ms, 3) if window_ms else None
+        return {
+            "from": self._describe(before),
+            "to": self._describe(after),
+            "window_seconds": round(after.taken_at - before.taken_at, 1),
+            "source": after.source,
+            "total_ms": round(window_ms, 1),
+            "top": rows[:limit],
+        }
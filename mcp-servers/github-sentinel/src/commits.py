@@ -0,0 +1,118 @@
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, List
+
+from http_cache import HttpCache
+
+# ==============================================================================
+# LOCAL COMMIT INDEX
+# sha -> (date, author, message, changed paths) for the repository's recent
+# commits, saved next to the HTTP cache. A sync lists the newest commits with
+# a conditional request (free when nothing was pushed) and fetches details
+# only for SHAs it has not seen. Those are immutable, so each is downloaded
+# once. "Which commits touched this file" is then answered from memory.
+# ==============================================================================
+
+
+class CommitIndex:
+    def __init__(self, path: Path, max_commits: int = 5000):
+        self.path = Path(path)
+        self.max_commits = max_commits
+        self.commits: Dict[str, dict] = {}
+        self._by_path: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            self.commits = json.loads(self.path.read_text()).get("commits", {})
+        except (OSError, ValueError) as e:
+            print(f"DEBUG: Ignoring unreadable commit index: {e}", file=sys.stderr)
+            return
+        for sha, commit in self.commits.items():
+            self._add_paths(sha, commit)
+
+    def _save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"commits": self.commits}))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"DEBUG: Could not save commit index: {e}", file=sys.stderr)
+
+    def _add_paths(self, sha: str, commit: dict):
+        for path in commit["files"]:
+            self._by_path.setdefault(path, []).append(sha)
+
+    def sync(self, cache: HttpCache, repo_url: str, max_age: float = 0.0, max_details: int = 30) -> dict:
+        """Index commits from the first page of history that are not indexed yet."""
+        listing = cache.get(f"{repo_url}/commits?per_page=100", max_age=max_age)
+        if listing.status_code != 200:
+            raise RuntimeError(f"Failed to list commits ({listing.status_code}): {listing.text[:200]}")
+        with self._lock:
+            missing = [c["sha"] for c in listing.json() if c["sha"] not in self.commits]
+        fetched = 0
+        for sha in missing[:max_details]:
+            detail = cache.get(f"{repo_url}/commits/{sha}", immutable=True)
+            if detail.status_code != 200:
+                continue
+            data = detail.json()
+            files = []
+            for f in data.get("files", []):
+                files.append(f["filename"])
+                if f.get("previous_filename"):
+                    files.append(f["previous_filename"])
+            commit = {
+                "date": data["commit"]["author"]["date"],
+                "author": data["commit"]["author"]["name"],
+                "message": data["commit"]["message"].split("\n")[0],
+                "files": files,
+            }
+            with self._lock:
+                self.commits[sha] = commit
+                self._add_paths(sha, commit)
+            fetched += 1
+        if fetched:
+            with self._lock:
+                self._trim()
+                self._save()
+        return {"listed_from": listing.source, "new_commits": fetched,
+                "pending": max(0, len(missing) - fetched), "indexed": len(self.commits)}
+
+    def _trim(self):
+        if len(self.commits) <= self.max_commits:
+            return
+        newest = sorted(self.commits, key=lambda sha: self.commits[sha]["date"], reverse=True)
+        self.commits = {sha: self.commits[sha] for sha in newest[:self.max_commits]}
+        self._by_path = {}
+        for sha, commit in self.commits.items():
+            self._add_paths(sha, commit)
+
+    def touching(self, file_path: str, limit: int = 10) -> List[dict]:
+        """Indexed commits that changed ``file_path`` (or anything under it, for a directory), newest first."""
+        prefix = file_path.rstrip("/") + "/"
+        with self._lock:
+            shas = set(self._by_path.get(file_path, []))
+            for path, path_shas in self._by_path.items():
+                if path.startswith(prefix):
+                    shas.update(path_shas)
+            found = sorted(shas, key=lambda sha: self.commits[sha]["date"], reverse=True)[:limit]
+            return [
+                {
+                    "sha": sha[:7],
+                    "date": self.commits[sha]["date"],
+                    "author": self.commits[sha]["author"],
+                    "message": self.commits[sha]["message"],
+                    "files": [p for p in self.commits[sha]["files"] if p == file_path or p.startswith(prefix)],
+                }
+                for sha in found
+            ]
+
+    def __len__(self) -> int:
+        return len(self.commits)
@@ -0,0 +1,140 @@
+import argparse
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# ==============================================================================
+# FAKE GITHUB API
+# Serves the handful of endpoints GitHub Sentinel uses (commits, commit
+# details, file contents, issues) for a generated repository. Responses carry
+# ETags and honour If-None-Match with 304s, and rate-limit headers count only
+# non-304 responses, as on GitHub. Every request is printed, so cache hits are easy to see.
+#
+#   python fake_github.py --port 8765 --push-every 30
+#   GITHUB_API_URL=http://localhost:8765 GITHUB_TOKEN=test REPO_OWNER=acme REPO_NAME=shop python server.py
+# ==============================================================================
+
+FILES = [
+    "services/payment/main.py", "services/inventory/main.py", "services/auth/main.py",
+    "services/common/metrics.py", "docker-compose.yml", "README.md", "config/limits.yaml",
+]
+AUTHORS = ["alice", "bob", "carol", "dave"]
+
+
+class FakeRepo:
+    def __init__(self, commits: int, seed: int):
+        self.rng = random.Random(seed)
+        self.commits = []  # newest first
+        self.contents = {path: f"# {path}\nversion = 0\n" for path in FILES}
+        self._lock = threading.Lock()
+        start = datetime.now(timezone.utc) - timedelta(hours=commits)
+        for i in range(commits):
+            self.push(start + timedelta(hours=i))
+
+    def push(self, when=None):
+        with self._lock:
+            n = len(self.commits)
+            changed = self.rng.sample(FILES, self.rng.randint(1, 3))
+            for path in changed:
+                self.contents[path] = f"# {path}\nversion = {n}\n"
+            sha = hashlib.sha1(f"commit-{n}".encode()).hexdigest()
+            date = (when or datetime.now(timezone.utc)).strftime("%Y-%m-%dT%H:%M:%SZ")
+            self.commits.insert(0, {
+                "sha": sha,
+                "commit": {"author": {"name": self.rng.choice(AUTHORS), "date": date},
+                           "message": f"Change {n}: update {', '.join(changed)}"},
+                "files": [{"filename": path, "status": "modified"} for path in changed],
+            })
+            return sha
+
+
+def make_handler(repo: FakeRepo, limit: int):
+    state = {"remaining": limit, "issues": 0, "not_modified": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, payload=None):
+            body = json.dumps(payload).encode() if payload is not None else b""
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            if status == 200 and self.headers.get("If-None-Match") == etag:
+                status, body = 304, b""
+                state["not_modified"] += 1
+            elif status != 304:
+                state["remaining"] = max(0, state["remaining"] - 1)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("X-RateLimit-Limit", str(limit))
+            self.send_header("X-RateLimit-Remaining", str(state["remaining"]))
+            self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+            self.end_headers()
+            self.wfile.write(body)
+            print(f"{status} {self.command} {self.path}  (remaining {state['remaining']})")
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+            if len(parts) < 4 or parts[0] != "repos":
+                return self._send(404, {"message": "Not Found"})
+            kind, rest = parts[3], parts[4:]
+            if kind == "commits" and not rest:
+                per_page = int(parse_qs(url.query).get("per_page", ["30"])[0])
+                listing = [{"sha": c["sha"], "commit": c["commit"]} for c in repo.commits[:per_page]]
+                return self._send(200, listing)
+            if kind == "commits" and len(rest) == 1:
+                commit = next((c for c in repo.commits if c["sha"] == rest[0]), None)
+                return self._send(200, commit) if commit else self._send(404, {"message": "No commit found"})
+            if kind == "contents" and rest:
+                path = "/".join(rest)
+                if path not in repo.contents:
+                    return self._send(404, {"message": "Not Found"})
+                content = base64.b64encode(repo.contents[path].encode()).decode()
+                return self._send(200, {"path": path, "encoding": "base64", "content": content})
+            self._send(404, {"message": "Not Found"})
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            state["issues"] += 1
+            self._send(201, {"html_url": f"http://localhost/issues/{state['issues']}"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the GitHub REST API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--commits", type=int, default=50)
+    parser.add_argument("--push-every", type=float, default=0, help="seconds between new commits (0 = never)")
+    parser.add_argument("--rate-limit", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    repo = FakeRepo(args.commits, args.seed)
+    if args.push_every:
+        def pusher():
+            while True:
+                time.sleep(args.push_every)
+                print(f"📦 pushed {repo.push()[:7]}")
+        threading.Thread(target=pusher, daemon=True).start()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(repo, args.rate_limit))
+    print(f"🐙 Fake GitHub API on http://localhost:{args.port} ({args.commits} commits)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
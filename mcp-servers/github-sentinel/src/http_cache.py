@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from instrumentation import span
+from lazy import lazy_import
+
+# Loaded on the first request rather than at server start
+requests = lazy_import("requests")
+
+# ==============================================================================
+# CONDITIONAL-REQUEST CACHE
+# Every successful GET is saved to disk, keyed by URL, with its ETag and
+# Last-Modified. The next request for the URL sends If-None-Match /
+# If-Modified-Since. GitHub answers an unchanged resource with a 304, which
+# does not count against the rate limit, and the saved body is served. All
+# requests share one keep-alive session.
+# ==============================================================================
+
+# Recently used entries kept decoded in memory
+MEMORY_ENTRIES = 256
+
+
+class CachedResponse:
+    __slots__ = ("status_code", "text", "headers", "source")
+
+    def __init__(self, status_code: int, text: str, headers: dict, source: str):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers
+        # "fresh" (no request), "revalidated" (304) or "network"
+        self.source = source
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class HttpCache:
+    def __init__(self, root: Path, headers: dict, timeout=(3.05, 15.0), max_entries: int = 5000):
+        self.root = Path(root)
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        self.stats = {"requests": 0, "not_modified": 0, "fresh": 0, "stored": 0}
+        self.rate_limit: dict = {}
+        self._memory: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, url: str) -> Path:
+        return self.root / (hashlib.sha256(url.encode()).hexdigest()[:40] + ".json")
+
+    def _load(self, url: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._memory.get(url)
+            if entry is not None:
+                self._memory.move_to_end(url)
+                return entry
+        try:
+            entry = json.loads(self._path(url).read_text())
+        except (OSError, ValueError):
+            return None
+        if entry.get("url") != url:
+            return None
+        self._remember(url, entry)
+        return entry
+
+    def _remember(self, url: str, entry: dict):
+        with self._lock:
+            self._memory[url] = entry
+            self._memory.move_to_end(url)
+            while len(self._memory) > MEMORY_ENTRIES:
+                self._memory.popitem(last=False)
+
+    def _save(self, url: str, entry: dict):
+        self._remember(url, entry)
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            path = self._path(url)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(entry))
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"DEBUG: Could not write GitHub cache entry: {e}", file=sys.stderr)
+            return
+        self.stats["stored"] += 1
+        if self.stats["stored"] % 100 == 0:
+            self._prune()
+
+    def _prune(self):
+        """Drop the least recently written entries beyond ``max_entries``."""
+        files = sorted(self.root.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for path in files[:max(0, len(files) - self.max_entries)]:
+            path.unlink(missing_ok=True)
+
+    def get(self, url: str, max_age: float = 0.0, immutable: bool = False) -> CachedResponse:
+        """GET ``url``, served from the cache when it is younger than ``max_age`` seconds
+        (or at all, for ``immutable`` resources such as a commit by SHA) and revalidated
+        with a conditional request otherwise."""
+        with span("cache_lookup"):
+            entry = self._load(url)
+        if entry is not None and (immutable or time.time() - entry["fetched_at"] < max_age):
+            self.stats["fresh"] += 1
+            return CachedResponse(200, entry["body"], entry["headers"], "fresh")
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        with span("http_get"):
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        self.stats["requests"] += 1
+        self._track_rate_limit(response)
+
+        if response.status_code == 304 and entry is not None:
+            self.stats["not_modified"] += 1
+            entry["fetched_at"] = time.time()
+            self._save(url, entry)
+            return CachedResponse(200, entry["body"], entry["headers"], "revalidated")
+        if response.status_code == 200:
+            kept = {k: response.headers[k] for k in ("Link", "Content-Type") if k in response.headers}
+            self._save(url, {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched_at": time.time(),
+                "headers": kept,
+                "body": response.text,
+            })
+            return CachedResponse(200, response.text, kept, "network")
+        return CachedResponse(response.status_code, response.text, dict(response.headers), "network")
+
+    def post(self, url: str, **kwargs) -> "requests.Response":
+        with span("http_post"):
+            response = self.session.post(url, timeout=self.timeout, **kwargs)
+        self._track_rate_limit(response)
+        return response
+
+    def _track_rate_limit(self, response: "requests.Response"):
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining is not None:
+            reset = response.headers.get("X-RateLimit-Reset", "")
+            self.rate_limit = {
+                "remaining": int(remaining),
+                "limit": int(response.headers.get("X-RateLimit-Limit", 0)),
+                "resets_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(int(reset))) if reset.isdigit() else None,
+            }
+
+    def status(self) -> dict:
+        try:
+            entries = sum(1 for _ in self.root.glob("*.json"))
+        except OSError:
+            entries = 0
+        return {"cache_dir": str(self.root), "entries": entries, **self.stats, "rate_limit": self.rate_limit}
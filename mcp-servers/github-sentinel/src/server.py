@@ -1,32 +1,84 @@
 from mcp.server.fastmcp import FastMCP
-import requests
+import base64
+import json
 import os
-from dotenv import load_dotenv
+import sys
+import threading
+from pathlib import Path
+from typing import Optional
 
-# 1. Load environment variables from the .env file
-load_dotenv()
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent / "shared"))
+from commits import CommitIndex
+from http_cache import HttpCache
+from concurrency import offload
+from instrumentation import instrument, snapshot
+from daemon import serve
 
 # Initialize
 mcp = FastMCP("GitHub Sentinel")
 
-# 2. Get variables safely
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-REPO_OWNER = os.getenv("REPO_OWNER")
-REPO_NAME = os.getenv("REPO_NAME")
+# ==============================================================================
+# CONFIGURATION
+# Read on the first tool call, not at start-up: the server always completes
+# the MCP handshake quickly, and a missing token is reported by the tool that
+# needed it instead of as a server that failed to start.
+# ==============================================================================
+project_root = Path(__file__).resolve().parent.parent.parent.parent
 
-# Safety Check: Warn if token is missing
-if not GITHUB_TOKEN:
-    raise ValueError("❌ Error: GITHUB_TOKEN not found. Did you create the .env file?")
+GITHUB_TOKEN = REPO_OWNER = REPO_NAME = REPO_URL = None
+CACHE: Optional[HttpCache] = None
+COMMITS: Optional[CommitIndex] = None
+CACHE_MAX_AGE = 30.0
+_config_lock = threading.Lock()
 
-HEADERS = {
-    "Authorization": f"token {GITHUB_TOKEN}",
-    "Accept": "application/vnd.github.v3+json"
-}
+def configure() -> Optional[str]:
+    """Load settings and open the cache once. Returns an error message if GitHub is not configured."""
+    global GITHUB_TOKEN, REPO_OWNER, REPO_NAME, REPO_URL, CACHE, COMMITS, CACHE_MAX_AGE
+    with _config_lock:
+        if CACHE is not None:
+            return None
+
+        # 1. Load environment variables from the .env file
+        from dotenv import load_dotenv
+        load_dotenv()
+
+        # 2. Get variables safely
+        GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+        REPO_OWNER = os.getenv("REPO_OWNER")
+        REPO_NAME = os.getenv("REPO_NAME")
+
+        # Safety Check: the token is required for every call
+        if not GITHUB_TOKEN:
+            return "❌ Error: GITHUB_TOKEN not found. Did you create the .env file?"
+
+        headers = {
+            "Authorization": f"token {GITHUB_TOKEN}",
+            "Accept": "application/vnd.github.v3+json"
+        }
+
+        # 3. API location (point GITHUB_API_URL at a local fake server for testing)
+        github_api_url = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+        REPO_URL = f"{github_api_url}/repos/{REPO_OWNER}/{REPO_NAME}"
+
+        # 4. Responses are cached on disk and revalidated with ETags (a 304 costs no
+        # rate limit). Within GITHUB_CACHE_MAX_AGE seconds they are reused without asking.
+        cache_dir = Path(os.getenv("GITHUB_CACHE_DIR", project_root / "github-cache"))
+        CACHE_MAX_AGE = float(os.getenv("GITHUB_CACHE_MAX_AGE", 30))
+
+        COMMITS = CommitIndex(cache_dir / "commit-index.json")
+        CACHE = HttpCache(cache_dir / "http", headers)
+        print(f"DEBUG: GitHub Sentinel configured for {REPO_OWNER}/{REPO_NAME}", file=sys.stderr)
+        return None
 
 @mcp.tool()
+@offload
+@instrument
 def create_incident_issue(title: str, description: str, severity: str = "High") -> str:
     """Creates a GitHub Issue to report an incident."""
-    url = f"https://api.github.com/repos/{REPO_OWNER}/{REPO_NAME}/issues"
+    error = configure()
+    if error:
+        return error
+    url = f"{REPO_URL}/issues"
     
     body = f"**Severity:** {severity}\n\n{description}\n\n_Reported by Autonomous AI Agent_"
     
@@ -37,7 +89,7 @@ def create_incident_issue(title: str, description: str, severity: str = "High")
     }
     
     try:
-        response = requests.post(url, headers=HEADERS, json=data)
+        response = CACHE.post(url, json=data)
         if response.status_code == 201:
             return f"✅ Incident Report Created: {response.json()['html_url']}"
         else:
@@ -46,12 +98,17 @@ def create_incident_issue(title: str, description: str, severity: str = "High")
         return f"Error: {str(e)}"
 
 @mcp.tool()
+@offload
+@instrument
 def check_recent_commits(limit: int = 5) -> str:
     """Fetches the last N commits."""
-    url = f"https://api.github.com/repos/{REPO_OWNER}/{REPO_NAME}/commits?per_page={limit}"
+    error = configure()
+    if error:
+        return error
+    url = f"{REPO_URL}/commits?per_page={limit}"
     
     try:
-        response = requests.get(url, headers=HEADERS)
+        response = CACHE.get(url, max_age=CACHE_MAX_AGE)
         if response.status_code == 200:
             commits = response.json()
             summary = []
@@ -67,15 +124,22 @@ def check_recent_commits(limit: int = 5) -> str:
         return f"Error: {str(e)}"
 
 @mcp.tool()
-def get_file_content(file_path: str) -> str:
+@offload
+@instrument
+def get_file_content(file_path: str, ref: Optional[str] = None) -> str:
     """
     Fetches the actual code/content of a file from the repository.
     Use this to audit code logic or check configuration files.
+    ref is an optional branch, tag or commit SHA (default: the default branch).
     """
-    url = f"https://api.github.com/repos/{REPO_OWNER}/{REPO_NAME}/contents/{file_path}"
+    error = configure()
+    if error:
+        return error
+    url = f"{REPO_URL}/contents/{file_path}" + (f"?ref={ref}" if ref else "")
     
     try:
-        response = requests.get(url, headers=HEADERS)
+        # Content at a full commit SHA never changes
+        response = CACHE.get(url, max_age=CACHE_MAX_AGE, immutable=bool(ref) and len(ref) == 40)
         if response.status_code == 200:
             data = response.json()
             # GitHub returns file content as a base64 encoded string
@@ -90,5 +154,44 @@ def get_file_content(file_path: str) -> str:
     except Exception as e:
         return f"Error: {str(e)}"
 
+@mcp.tool()
+@offload
+@instrument
+def find_commits_touching(file_path: str, limit: int = 10) -> str:
+    """
+    Which recent commits changed this file (or anything under it, for a directory), newest first.
+    Answered from a local commit index that is brought up to date first; use it to find the
+    change behind a regression.
+    """
+    error = configure()
+    if error:
+        return error
+    try:
+        sync = COMMITS.sync(CACHE, REPO_URL, max_age=CACHE_MAX_AGE)
+    except Exception as e:
+        return f"Error: {str(e)}"
+    commits = COMMITS.touching(file_path, limit)
+    if not commits:
+        return f"No indexed commits touched '{file_path}' ({sync['indexed']} recent commits indexed)."
+    return json.dumps({"file_path": file_path, "index": sync, "commits": commits}, indent=2)
+
+@mcp.tool()
+@offload
+@instrument
+def get_github_cache_status() -> str:
+    """Cache hit counts (fresh, 304 revalidated, network), indexed commits and the remaining GitHub rate limit."""
+    error = configure()
+    if error:
+        return error
+    return json.dumps({**CACHE.status(), "indexed_commits": len(COMMITS)}, indent=2)
+
+@mcp.tool()
+async def get_server_metrics(tool_name: Optional[str] = None) -> str:
+    """
+    Latency of the GitHub Sentinel tools (p50/p95/p99, histogram, errors), split into cache lookups
+    and GitHub API round-trips. Pass tool_name for one tool.
+    """
+    return json.dumps(snapshot(tool_name), indent=2)
+
 if __name__ == "__main__":
-    mcp.run()
\ No newline at end of file
+    serve(mcp, __file__)
\ No newline at end of file
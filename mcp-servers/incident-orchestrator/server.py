@@ -0,0 +1,219 @@
+from mcp.server.fastmcp import FastMCP
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "shared"))
+from instrumentation import instrument, is_error, snapshot
+from daemon import serve
+
+# ==============================================================================
+# CONFIGURATION
+# ==============================================================================
+mcp = FastMCP("Incident Orchestrator")
+
+# server.py -> incident-orchestrator -> mcp-servers -> project root
+project_root = Path(__file__).resolve().parent.parent.parent
+servers_dir = project_root / "mcp-servers"
+
+# 1. The specialist servers, launched over stdio on first use and kept running
+# so later calls skip their start-up (and the Log Analyst keeps its ingested logs).
+# INVESTIGATE_SERVERS can override any of them: {"name": ["command", "arg", ...]}
+UPSTREAMS: Dict[str, List[str]] = {
+    "log-analyst": [sys.executable, str(servers_dir / "log-analyst" / "server.py")],
+    "database-inspector": [sys.executable, str(servers_dir / "database-inspector" / "src" / "server.py")],
+    "infrastructure-manager": ["node", str(servers_dir / "infrastructure-manager" / "dist" / "index.js")],
+    "github-sentinel": [sys.executable, str(servers_dir / "github-sentinel" / "src" / "server.py")],
+}
+# INVESTIGATE_ATTACH=on reaches the Python servers through shared/attach.py,
+# so a restarted orchestrator reattaches to their warm daemons.
+if os.getenv("INVESTIGATE_ATTACH", "off").lower() == "on":
+    UPSTREAMS = {name: [command[0], str(servers_dir / "shared" / "attach.py"), *command[1:]]
+                 if command[0] == sys.executable else command for name, command in UPSTREAMS.items()}
+UPSTREAMS.update(json.loads(os.getenv("INVESTIGATE_SERVERS", "{}")))
+
+# 2. Seconds each source may take (including its start-up on first use) before
+# the snapshot is returned without it
+SOURCE_TIMEOUT = float(os.getenv("INVESTIGATE_TIMEOUT", 15))
+
+# 3. Characters of the merged snapshot; each source gets an equal share
+SNAPSHOT_CHARS = int(os.getenv("INVESTIGATE_MAX_CHARS", 12_000))
+
+print(f"DEBUG: Incident Orchestrator initialized. Upstreams: {', '.join(UPSTREAMS)}", file=sys.stderr)
+
+
+# ==============================================================================
+# UPSTREAM SESSIONS
+# Each MCP client session lives in its own background task: the stdio
+# transport has to be opened and closed by the same task, while tool calls
+# come from whichever request task needs them. If a server dies, the next call
+# starts it again.
+# ==============================================================================
+class Upstream:
+    def __init__(self, name: str, command: List[str]):
+        self.name = name
+        self.params = StdioServerParameters(command=command[0], args=command[1:],
+                                            cwd=str(Path(command[-1]).parent), env=dict(os.environ))
+        self.session: Optional[ClientSession] = None
+        self._ready: Optional[asyncio.Future] = None
+        self._stop: Optional[asyncio.Event] = None
+        # The loop keeps only a weak reference to a task: hold it while it runs
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        try:
+            async with stdio_client(self.params, errlog=sys.stderr) as (read, write), \
+                    ClientSession(read, write) as session:
+                await session.initialize()
+                self.session = session
+                self._ready.set_result(session)
+                await self._stop.wait()
+        except BaseException as e:
+            if not self._ready.done():
+                self._ready.set_exception(RuntimeError(f"could not start {self.name}: {e}"))
+            print(f"DEBUG: Upstream {self.name} stopped: {e!r}", file=sys.stderr)
+        finally:
+            self.session = None
+            self._ready = None
+            self._task = None
+
+    async def call(self, tool: str, arguments: dict) -> str:
+        if self._ready is None:
+            self._ready = asyncio.get_running_loop().create_future()
+            self._stop = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run(), name=f"upstream-{self.name}")
+        session = await asyncio.shield(self._ready)
+        try:
+            result = await session.call_tool(tool, arguments)
+        except Exception:
+            # Most likely the server went away; start a fresh one next time
+            self._stop.set()
+            raise
+        text = "\n".join(block.text for block in result.content if getattr(block, "text", None))
+        if result.isError:
+            raise RuntimeError(text or f"{tool} failed")
+        return text
+
+
+_upstreams = {name: Upstream(name, command) for name, command in UPSTREAMS.items()}
+
+
+# ==============================================================================
+# SNAPSHOT HELPERS
+# ==============================================================================
+def _parse(text: str):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _size(value) -> int:
+    return len(value) if isinstance(value, str) else len(json.dumps(value, separators=(",", ":"), default=str))
+
+
+def _shrink(value, limit: int):
+    """Halve the longest lists (keeping their head) until ``value`` fits in ``limit`` chars."""
+    for _ in range(30):
+        if _size(value) <= limit:
+            return value
+        lists = []
+
+        def collect(node):
+            if isinstance(node, list):
+                lists.append(node)
+            children = node.values() if isinstance(node, dict) else node if isinstance(node, list) else []
+            for child in children:
+                collect(child)
+
+        collect(value)
+        longest = max(lists, key=len, default=None)
+        if not longest or len(longest) <= 1:
+            break
+        dropped = len(longest) - len(longest) // 2
+        del longest[len(longest) // 2:]
+        longest.append(f"...{dropped} more")
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    return text if len(text) <= limit else text[:limit] + f"...(+{len(text) - limit} chars)"
+
+
+async def _run_source(name: str, tool: str, arguments: dict, timeout: float) -> dict:
+    started = time.perf_counter()
+    entry = {"server": name, "tool": tool}
+    try:
+        text = await asyncio.wait_for(_upstreams[name].call(tool, arguments), timeout)
+        if is_error(text):
+            # Upstream tools report most failures as a "❌ ..." result, not as an MCP error
+            entry.update(status="error", error=text[:500])
+        else:
+            entry.update(status="ok", result=_parse(text))
+    except asyncio.TimeoutError:
+        entry.update(status="timeout", error=f"no answer within {timeout:g}s")
+    except Exception as e:
+        entry.update(status="error", error=str(e)[:500])
+    entry["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return entry
+
+
+def _matching_containers(result, service_name: str):
+    if isinstance(result, list):
+        matches = [c for c in result if isinstance(c, dict) and service_name in str(c.get("name", ""))]
+        return matches or result
+    return result
+
+
+@mcp.tool()
+@instrument
+async def investigate_service(service_name: str, include_commits: bool = True,
+                              timeout_seconds: float = SOURCE_TIMEOUT) -> str:
+    """
+    First-look incident snapshot for one service, gathered in parallel: log error stats, database
+    performance (long-running/blocked queries), container status and recent commits.
+    Each source has its own timeout; slow or failing sources are reported as such and the rest is
+    still returned, so the answer takes as long as the slowest source, not the sum of all of them.
+    """
+    started = time.perf_counter()
+    plan = [
+        ("logs", "log-analyst", "get_error_stats", {"service_name": service_name}),
+        ("database", "database-inspector", "check_performance", {}),
+        ("containers", "infrastructure-manager", "list_containers", {}),
+    ]
+    if include_commits:
+        plan.append(("commits", "github-sentinel", "check_recent_commits", {"limit": 5}))
+    plan = [step for step in plan if step[1] in _upstreams]
+
+    results = await asyncio.gather(*(_run_source(server, tool, args, timeout_seconds)
+                                     for _, server, tool, args in plan))
+    sources = dict(zip((key for key, *_ in plan), results))
+    if sources.get("containers", {}).get("status") == "ok":
+        sources["containers"]["result"] = _matching_containers(sources["containers"]["result"], service_name)
+
+    budget = SNAPSHOT_CHARS // max(1, len(sources))
+    for entry in sources.values():
+        if "result" in entry:
+            entry["result"] = _shrink(entry["result"], budget)
+
+    slowest = max(sources.items(), key=lambda kv: kv[1]["elapsed_ms"], default=(None, None))[0]
+    return json.dumps({
+        "service": service_name,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "slowest_source": slowest,
+        "complete": all(e["status"] == "ok" for e in sources.values()),
+        "sources": sources,
+    }, indent=2, default=str)
+
+
+@mcp.tool()
+async def get_server_metrics(tool_name: Optional[str] = None) -> str:
+    """Latency (p50/p95/p99, histogram) of investigate_service calls. Per-source times are in each snapshot."""
+    return json.dumps(snapshot(tool_name), indent=2)
+
+
+if __name__ == "__main__":
+    serve(mcp, __file__)
@@ -0,0 +1,511 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import span
+from templates import TemplateMiner, mask
+from traces import NAT, TraceIndex
+
+try:
+    import pyarrow as pa
+except ImportError:  # Workers fall back to returning pickled DataFrames
+    pa = None
+
+# ==============================================================================
+# INCREMENTAL LOG INGESTION
+# Keeps a byte-offset cursor per log file so each tool call only parses the
+# lines appended since the previous call. Parsed rows live in an in-memory
+# columnar cache: per file, a short list of newest-first sorted chunks that
+# queries slice and filter before combining only the matching rows.
+# ==============================================================================
+
+# Bytes hashed from the start of a file to notice it was replaced or rewritten
+HEAD_BYTES = 64
+# New data smaller than this is parsed inline; larger reads are split across
+# the worker pool in pieces of at least this size
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+# No single read holds more than this many bytes in memory at once
+MAX_READ_BYTES = 64 * 1024 * 1024
+# Columns added by the parser: the masked message, so the template miner can
+# skip re-masking, and each line's byte offset for the trace index
+MASKED = "_masked"
+OFFSET = "_offset"
+
+
+def _parse_columns(data: bytes, base: int = 0) -> Dict[str, list]:
+    """Decode a block of complete JSON lines into per-column lists.
+
+    Malformed lines are skipped. Keys missing from a record are padded with
+    None so every column has the same length. The byte offset of each line
+    (``base`` + position in ``data``) goes in the OFFSET column.
+    """
+    columns: Dict[str, list] = {}
+    offsets: List[int] = []
+    n = 0
+    loads = json.JSONDecoder().decode
+    pos = base
+    for line in data.split(b"\n"):
+        line_start = pos
+        pos += len(line) + 1
+        if not line.strip():
+            continue
+        try:
+            record = loads(line.decode('utf-8', 'replace'))
+        except ValueError:
+            continue
+        if not isinstance(record, dict):
+            continue
+        for key, value in record.items():
+            col = columns.get(key)
+            if col is None:
+                col = columns[key] = [None] * n
+            col.append(value)
+        offsets.append(line_start)
+        n += 1
+        if len(record) != len(columns):
+            for col in columns.values():
+                if len(col) < n:
+                    col.append(None)
+    if n:
+        columns[OFFSET] = offsets
+    return columns
+
+
+def _to_frame(columns: Dict[str, list]) -> pd.DataFrame:
+    if 'message' in columns:
+        columns[MASKED] = [mask(m) if isinstance(m, str) else "" for m in columns['message']]
+    df = pd.DataFrame(columns)
+    if not df.empty and 'timestamp' in df.columns:
+        df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True, errors='coerce', format='ISO8601')
+    return df
+
+
+def parse_range(path: str, start: int, end: int, ipc: bool = False):
+    """Parse bytes [start, end) of ``path``, which must begin and end on line boundaries.
+
+    Pool workers read the file themselves and pass ``ipc=True`` to hand back
+    an Arrow IPC buffer (when pyarrow is installed) instead of pickling
+    Python objects row by row.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    with span("decode"):
+        columns = _parse_columns(data, start)
+    with span("to_frame"):
+        df = _to_frame(columns)
+    if not ipc or pa is None or df.empty:
+        return df
+    sink = pa.BufferOutputStream()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def _from_worker(result) -> pd.DataFrame:
+    if isinstance(result, pd.DataFrame):
+        return result
+    return pa.ipc.open_stream(result).read_all().to_pandas()
+
+
+def _split_range(f, start: int, end: int, step: int) -> List[Tuple[int, int]]:
+    """Cut [start, end) into ranges of about ``step`` bytes that end on newlines."""
+    bounds = [start]
+    pos = start + step
+    while pos < end:
+        f.seek(pos)
+        f.readline()
+        pos = f.tell()
+        if pos >= end:
+            break
+        bounds.append(pos)
+        pos += step
+    bounds.append(end)
+    return list(zip(bounds, bounds[1:]))
+
+
+def last_newline(f, start: int, end: int) -> int:
+    """Offset just past the last newline in [start, end), or ``start`` if none."""
+    block = 64 * 1024
+    pos = end
+    while pos > start:
+        lo = max(start, pos - block)
+        f.seek(lo)
+        idx = f.read(pos - lo).rfind(b"\n")
+        if idx != -1:
+            return lo + idx + 1
+        pos = lo
+    return start
+
+
+def _tag_templates(chunk: pd.DataFrame, miner: TemplateMiner, fallback_service: str):
+    """Run every message through the miner and record its template ID."""
+    n = len(chunk)
+    services = chunk['service'].fillna(fallback_service).tolist() if 'service' in chunk.columns else [fallback_service] * n
+    levels = chunk['level'].fillna("").tolist() if 'level' in chunk.columns else [""] * n
+    if MASKED in chunk.columns:
+        masked = chunk.pop(MASKED).tolist()
+    else:
+        masked = [mask(str(m)) for m in chunk['message'].fillna("").tolist()]
+    chunk['template_id'] = [miner.add_masked(m, s, lvl) for m, s, lvl in zip(masked, services, levels)]
+
+
+def _index_traces(chunk: pd.DataFrame, index: TraceIndex, path: str):
+    """Add every row that carries a trace_id to the trace index."""
+    n = len(chunk)
+
+    def column(name, default=None):
+        if name not in chunk.columns:
+            return [default] * n
+        return chunk[name].astype(object).where(chunk[name].notna(), default).tolist()
+
+    timestamps = (chunk['timestamp'].values.astype('datetime64[ns]').view('i8').tolist()
+                  if 'timestamp' in chunk.columns else [NAT] * n)
+    failed = [code is not None for code in column('error_code')]
+    index.add_records(path, column('trace_id'), chunk[OFFSET].tolist(), timestamps,
+                      column('service', Path(path).stem), column('level'), column('latency'), failed)
+
+
+def _sort_newest_first(df: pd.DataFrame) -> pd.DataFrame:
+    if 'timestamp' not in df.columns or df['timestamp'].is_monotonic_decreasing:
+        return df
+    return df.sort_values('timestamp', ascending=False, ignore_index=True)
+
+
+def slice_window(df: pd.DataFrame, start=None, end=None) -> pd.DataFrame:
+    """Rows of a newest-first frame inside [start, end], found by binary search.
+
+    ``start``/``end`` must be UTC-aware Timestamps (or None for open ends).
+    """
+    if df.empty or 'timestamp' not in df.columns or (start is None and end is None):
+        return df
+    values = df['timestamp'].values
+    # Reversed int64 view is ascending; NaT is the smallest value so it stays sorted
+    asc = values.view('i8')[::-1]
+
+    def _key(ts):
+        return np.datetime64(ts.tz_convert(None)).astype(values.dtype).view('i8')
+
+    n = len(asc)
+    lo = n - asc.searchsorted(_key(end), side='right') if end is not None else 0
+    hi = n - asc.searchsorted(_key(start), side='left') if start is not None else n
+    return df.iloc[lo:hi]
+
+
+class FileCursor:
+    """Read position and identity of a single log file."""
+
+    __slots__ = ("path", "dev", "ino", "head", "offset", "chunks")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.dev = None
+        self.ino = None
+        self.head = b""
+        self.offset = 0
+        # Oldest first; each chunk sorted newest first. Chunks are never
+        # modified, only replaced, so a query can use a copy of the list.
+        self.chunks: List[pd.DataFrame] = []
+
+    def reset(self):
+        self.offset = 0
+        self.head = b""
+        self.chunks = []
+
+    def add(self, chunk: pd.DataFrame):
+        """Append a parsed chunk, merging tail chunks of similar size.
+
+        Like a binary counter, this keeps O(log n) chunks per file while each
+        row is copied O(log n) times over its life, never the whole history
+        per append.
+        """
+        chunks = self.chunks + [_sort_newest_first(chunk)]
+        while len(chunks) > 1 and len(chunks[-1]) >= len(chunks[-2]):
+            newer = chunks.pop()
+            chunks[-1] = _sort_newest_first(pd.concat([newer, chunks[-1]], ignore_index=True))
+        self.chunks = chunks
+
+    def checkpoint(self) -> dict:
+        return {"dev": self.dev, "ino": self.ino, "head": self.head.hex(), "offset": self.offset}
+
+    def restore(self, state: dict):
+        self.dev = state.get("dev")
+        self.ino = state.get("ino")
+        self.head = bytes.fromhex(state.get("head", ""))
+        self.offset = state.get("offset", 0)
+
+
+class LogIngestor:
+    """Incrementally tails every ``*.log`` file in ``log_dir``.
+
+    By default parsed chunks are kept in memory for :meth:`frame`. When a
+    ``sink`` is given, each new chunk is handed to ``sink(path, chunk)``
+    instead and nothing is retained. With a ``miner``, every row gets a
+    ``template_id`` column as it is ingested.
+
+    A ``range_sink`` skips DataFrames entirely: it is called as
+    ``range_sink(path, start, end)`` for each new byte range and returns the
+    number of records it consumed (see ``streaming.stream_range``).
+
+    With a ``traces`` index, the location of every line carrying a trace_id
+    is recorded as it is ingested.
+
+    Large reads are parsed by ``workers`` processes. Pass an already started
+    ``pool`` to use it instead of forking one on the first large read (see
+    :meth:`start_workers`).
+    """
+
+    def __init__(self, log_dir: Path, pattern: str = "*.log",
+                 sink: Optional[Callable[[str, pd.DataFrame], None]] = None,
+                 miner: Optional[TemplateMiner] = None, workers: int = 1,
+                 range_sink: Optional[Callable[[str, int, int], int]] = None,
+                 traces: Optional[TraceIndex] = None,
+                 pool: Optional[ProcessPoolExecutor] = None):
+        self.log_dir = Path(log_dir)
+        self.pattern = pattern
+        self.sink = sink
+        self.range_sink = range_sink
+        self.miner = miner
+        self.traces = traces
+        self.workers = max(1, workers)
+        self._pool = pool
+        self._cursors: Dict[str, FileCursor] = {}
+        self.last_stats: dict = {}
+        self._lock = threading.Lock()
+
+    # --------------------------------------------------------------------------
+    # Reading
+    # --------------------------------------------------------------------------
+    def refresh(self) -> dict:
+        """Pick up new bytes from every log file. Returns ingestion stats."""
+        stats = {"files": 0, "new_bytes": 0, "new_rows": 0, "resets": 0}
+        started = time.perf_counter()
+        with self._lock, span("refresh"):
+            if not self.log_dir.exists():
+                self._cursors.clear()
+                return stats
+
+            seen = set()
+            work = []
+            with span("scan_files"):
+                for path in self.log_dir.glob(self.pattern):
+                    key = str(path)
+                    seen.add(key)
+                    cursor = self._cursors.get(key)
+                    if cursor is None:
+                        cursor = self._cursors[key] = FileCursor(key)
+                    try:
+                        ranges = self._plan(cursor, stats)
+                    except OSError as e:
+                        print(f"Error reading {path.name}: {e}", file=sys.stderr)
+                        ranges = []
+                    if ranges:
+                        work.append((cursor, ranges))
+                    stats["files"] += 1
+
+            # Files that disappeared take their rows with them
+            dropped = stats["resets"]
+            for key in list(self._cursors):
+                if key not in seen:
+                    del self._cursors[key]
+                    dropped += 1
+
+            if self.range_sink is not None:
+                with span("stream"):
+                    for cursor, ranges in work:
+                        for a, b in ranges:
+                            stats["new_rows"] += self.range_sink(cursor.path, a, b)
+            else:
+                for cursor, chunk in self._parse(work):
+                    with span("consume"):
+                        self._consume(cursor, chunk, stats)
+                if dropped and self.sink is None and self.miner is not None:
+                    # The miner counted rows that are no longer held
+                    with span("recount"):
+                        self._recount()
+
+        elapsed = time.perf_counter() - started
+        stats["seconds"] = round(elapsed, 4)
+        stats["lines_per_sec"] = int(stats["new_rows"] / elapsed) if elapsed > 0 else 0
+        stats["workers"] = self.workers
+        if stats["new_bytes"]:
+            self.last_stats = stats
+        return stats
+
+    def _plan(self, cursor: FileCursor, stats: dict) -> List[Tuple[int, int]]:
+        """Check the file's identity and return the byte ranges left to parse."""
+        with open(cursor.path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            head = f.read(HEAD_BYTES)
+
+            replaced = cursor.ino is not None and (st.st_dev, st.st_ino) != (cursor.dev, cursor.ino)
+            truncated = st.st_size < cursor.offset
+            rewritten = cursor.head and head[:len(cursor.head)] != cursor.head
+            if replaced or truncated or rewritten:
+                cursor.reset()
+                if self.traces is not None:
+                    self.traces.forget_file(cursor.path)
+                stats["resets"] += 1
+
+            cursor.dev, cursor.ino = st.st_dev, st.st_ino
+            if len(cursor.head) < HEAD_BYTES:
+                cursor.head = head
+            if st.st_size == cursor.offset:
+                return []
+
+            # Only consume whole lines; a partially written line waits for next time
+            end = last_newline(f, cursor.offset, st.st_size)
+            if end == cursor.offset:
+                return []
+            start, cursor.offset = cursor.offset, end
+            stats["new_bytes"] += end - start
+
+            step = MAX_READ_BYTES
+            if self.workers > 1 and self.range_sink is None:
+                step = min(step, max((end - start) // self.workers, PARALLEL_MIN_BYTES))
+            if end - start > step:
+                return _split_range(f, start, end, step)
+            return [(start, end)]
+
+    def _parse(self, work: List[Tuple[FileCursor, List[Tuple[int, int]]]]):
+        """Yield (cursor, frame) per range in file order, fanning out to the pool."""
+        jobs = [(cursor, a, b) for cursor, ranges in work for a, b in ranges]
+        if self.workers == 1 or all(b - a <= PARALLEL_MIN_BYTES for _, a, b in jobs):
+            for cursor, a, b in jobs:
+                with span("parse"):
+                    chunk = parse_range(cursor.path, a, b)
+                yield cursor, chunk
+            return
+
+        self.start_workers()
+        # Keep a bounded number of results in flight so memory doesn't grow
+        # with the size of the backlog being parsed
+        in_flight = deque()
+        for cursor, a, b in jobs:
+            in_flight.append((cursor, self._pool.submit(parse_range, cursor.path, a, b, True)))
+            if len(in_flight) >= 2 * self.workers:
+                cursor, future = in_flight.popleft()
+                with span("parse_wait"):
+                    chunk = _from_worker(future.result())
+                yield cursor, chunk
+        while in_flight:
+            cursor, future = in_flight.popleft()
+            with span("parse_wait"):
+                chunk = _from_worker(future.result())
+            yield cursor, chunk
+
+    def start_workers(self):
+        """Fork the parser pool now rather than on the first large read.
+
+        Call this before the process starts other threads. A worker forked while
+        another thread holds a lock inherits it locked. Under an MCP stdio server
+        that thread is the stdin reader, and each worker hangs in
+        multiprocessing's sys.stdin.close().
+        """
+        if self.workers > 1 and self.range_sink is None and self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            # With the fork start method, the first submit launches every worker
+            self._pool.submit(int)
+
+    def _recount(self):
+        """Rebuild the miner's line counts from the cached rows' template IDs."""
+        counts: Counter = Counter()
+        for key, cursor in self._cursors.items():
+            fallback = Path(key).stem
+            for chunk in cursor.chunks:
+                if 'template_id' not in chunk.columns:
+                    continue
+                services = (chunk['service'].fillna(fallback) if 'service' in chunk.columns
+                            else pd.Series(fallback, index=chunk.index))
+                levels = chunk['level'].fillna("") if 'level' in chunk.columns else pd.Series("", index=chunk.index)
+                for (service, level, template_id), n in chunk.groupby(
+                        [services, levels, chunk['template_id']]).size().items():
+                    counts[(str(service), str(level), int(template_id))] += int(n)
+        self.miner.reset_counts(counts.items())
+
+    def _consume(self, cursor: FileCursor, chunk: pd.DataFrame, stats: dict):
+        if chunk.empty:
+            return
+        if self.miner is not None and 'message' in chunk.columns:
+            _tag_templates(chunk, self.miner, Path(cursor.path).stem)
+        elif MASKED in chunk.columns:
+            del chunk[MASKED]
+        if OFFSET in chunk.columns:
+            if self.traces is not None and 'trace_id' in chunk.columns:
+                _index_traces(chunk, self.traces, cursor.path)
+            del chunk[OFFSET]
+        stats["new_rows"] += len(chunk)
+        if self.sink is not None:
+            self.sink(cursor.path, chunk)
+            return
+        cursor.add(chunk)
+
+    def checkpoints(self) -> Dict[str, dict]:
+        """Serializable read positions, for persisting between restarts."""
+        with self._lock:
+            return {key: c.checkpoint() for key, c in self._cursors.items()}
+
+    def restore_checkpoints(self, checkpoints: Dict[str, dict]):
+        with self._lock:
+            for key, state in checkpoints.items():
+                cursor = self._cursors[key] = FileCursor(key)
+                cursor.restore(state)
+
+    # --------------------------------------------------------------------------
+    # Querying
+    # --------------------------------------------------------------------------
+    def frame(self, service_name: Optional[str] = None, columns: Optional[Sequence[str]] = None,
+              start=None, end=None, levels: Optional[Sequence[str]] = None,
+              equals: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        """Rows for files matching ``service_name``, newest first.
+
+        ``start``/``end`` (UTC-aware Timestamps), ``levels`` and ``equals``
+        (column == value) are applied to each cached chunk before anything is
+        combined, so a query copies only the rows it returns.
+        """
+        self.refresh()
+        with self._lock:
+            chunks = [
+                chunk for key, c in self._cursors.items()
+                if not service_name or service_name in os.path.basename(key)
+                for chunk in c.chunks
+            ]
+        with span("frame"):
+            parts = []
+            for chunk in chunks:
+                part = slice_window(chunk, start, end)
+                if levels and 'level' in part.columns:
+                    part = part[part['level'].isin(levels)]
+                for col, value in (equals or {}).items():
+                    part = part[part[col] == value] if col in part.columns else part.iloc[0:0]
+                if not part.empty:
+                    parts.append(part)
+            if not parts:
+                return pd.DataFrame(columns=list(columns) if columns else None)
+            df = parts[0] if len(parts) == 1 else _sort_newest_first(pd.concat(parts, ignore_index=True))
+            if columns:
+                df = df[[c for c in columns if c in df.columns]]
+            return df
+
+    def status(self) -> List[dict]:
+        """Current cursor position of every tracked file."""
+        with self._lock:
+            return [
+                {
+                    "file": os.path.basename(c.path),
+                    "offset": c.offset,
+                    "inode": c.ino,
+                    "cached_rows": sum(len(chunk) for chunk in c.chunks),
+                }
+                for c in self._cursors.values()
+            ]
@@ -0,0 +1,288 @@
+import bisect
+import os
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from ingest import HEAD_BYTES, MAX_READ_BYTES, FileCursor, last_newline
+from instrumentation import span
+from pgsql import STATEMENT_MARKERS, StatementLogParser, fingerprint, header_at, next_header, statement_text
+from traces import NAT
+
+# ==============================================================================
+# POSTGRES STATEMENT LOG
+# Tails the server log (log_statement=all + log_min_duration_statement) with
+# the same byte-offset cursor as the service logs. With log_statement=all
+# nearly every line is a statement, so nothing is done per line in Python:
+# each read gets one regex pass that keeps the latest statement per session
+# and byte counts for statement volume per minute. Only the duration lines
+# (statements slower than log_min_duration_statement) are visited one by one.
+# Each is paired with its session's statement (shared/pgsql.py), normalised into a fingerprint
+# and stored in time-ordered typed arrays, so a time window is two binary searches.
+# ==============================================================================
+
+# Length of the "YYYY-MM-DD HH:MM" line prefix
+MINUTE = 16
+
+# Sessions whose last statement is remembered while waiting for a duration line
+MAX_SESSIONS = 10_000
+# Per-minute statement counts kept (one week)
+MAX_MINUTES = 7 * 24 * 60
+
+
+def _timestamp(stamp: bytes, zone: Optional[bytes]) -> int:
+    """Header timestamp -> epoch nanoseconds. Named zones other than UTC/GMT are taken as UTC."""
+    try:
+        dt = datetime.fromisoformat(stamp.decode())
+    except ValueError:
+        return NAT
+    offset = timedelta(0)
+    if zone and zone[:1] in b"+-":
+        sign = -1 if zone[:1] == b"-" else 1
+        digits = zone[1:].replace(b":", b"")
+        offset = sign * timedelta(hours=int(digits[:2]), minutes=int(digits[2:4] or 0))
+    dt = dt.replace(tzinfo=timezone(offset))
+    return int(dt.timestamp() * 1_000_000) * 1000
+
+
+def _iso(ns: int) -> str:
+    return datetime.fromtimestamp(ns / 1e9, tz=timezone.utc).isoformat()
+
+
+class PostgresLog:
+    """Slow statements and statement volume from one Postgres log file."""
+
+    def __init__(self, path, max_entries: int = 500_000, max_fingerprints: int = 5000):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.max_fingerprints = max_fingerprints
+        self._cursor = FileCursor(self.path)
+        # One record per slow statement, in log order
+        self.ts = array("q")
+        self.ms = array("d")
+        self.fp = array("I")
+        self.pid = array("i")
+        # Fingerprint id -> text, an example statement and running totals
+        self._fp_ids: Dict[str, int] = {}
+        self.fingerprints: List[str] = []
+        self.examples: List[str] = []
+        self.totals: List[List[float]] = []  # [calls, total_ms, max_ms]
+        # Statement lines per minute ("YYYY-MM-DD HH:MM" header prefix -> count)
+        self.per_minute: Dict[bytes, int] = {}
+        self._parser = StatementLogParser(MAX_SESSIONS)
+        self.lines = 0
+        self.statements = 0
+        self.errors = 0
+        self.last_stats: dict = {}
+        self._lock = threading.Lock()
+
+    # --------------------------------------------------------------------------
+    # Reading
+    # --------------------------------------------------------------------------
+    def refresh(self) -> dict:
+        """Parse whatever was appended to the log since the last call."""
+        stats = {"new_bytes": 0, "statements": 0, "slow": 0, "resets": 0}
+        started = time.perf_counter()
+        with self._lock, span("pg_log"):
+            try:
+                with open(self.path, 'rb') as f:
+                    for data in self._read(f, stats):
+                        self._consume(data, stats)
+            except FileNotFoundError:
+                return stats
+            except OSError as e:
+                print(f"Error reading {self.path}: {e}", file=sys.stderr)
+                return stats
+        elapsed = time.perf_counter() - started
+        stats["seconds"] = round(elapsed, 4)
+        stats["mb_per_sec"] = round(stats["new_bytes"] / elapsed / 1e6, 1) if elapsed > 0 else 0
+        if stats["new_bytes"]:
+            self.last_stats = stats
+        return stats
+
+    def _read(self, f, stats: dict):
+        """Yield new whole-line blocks, resetting on rotation or truncation."""
+        cursor = self._cursor
+        st = os.fstat(f.fileno())
+        head = f.read(HEAD_BYTES)
+        replaced = cursor.ino is not None and (st.st_dev, st.st_ino) != (cursor.dev, cursor.ino)
+        rewritten = cursor.head and head[:len(cursor.head)] != cursor.head
+        if replaced or rewritten or st.st_size < cursor.offset:
+            # Statements already recorded stay; only the read position starts over
+            cursor.reset()
+            self._parser.reset()
+            stats["resets"] += 1
+        cursor.dev, cursor.ino = st.st_dev, st.st_ino
+        if len(cursor.head) < HEAD_BYTES:
+            cursor.head = head
+
+        while cursor.offset < st.st_size:
+            end = last_newline(f, cursor.offset, min(st.st_size, cursor.offset + MAX_READ_BYTES))
+            if end == cursor.offset:
+                # A single line longer than the read limit, or a partial last line
+                if st.st_size - cursor.offset <= MAX_READ_BYTES:
+                    return
+                end = last_newline(f, cursor.offset, st.st_size)
+                if end == cursor.offset:
+                    return
+            f.seek(cursor.offset)
+            data = f.read(end - cursor.offset)
+            stats["new_bytes"] += len(data)
+            cursor.offset = end
+            yield data
+
+    def _consume(self, data: bytes, stats: dict):
+        for s in self._parser.feed(data):
+            self._add(_timestamp(s.stamp, s.zone), s.ms, s.pid, s.text)
+            stats["slow"] += 1
+
+        statements = self._count_minutes(data)
+        self.lines += data.count(b"\n")
+        self.statements += statements
+        self.errors += data.count(b" ERROR:  ") + data.count(b" FATAL:  ")
+        stats["statements"] += statements
+
+    def _count_minutes(self, data: bytes) -> int:
+        """Add statement lines per minute. Lines are in time order, so each minute's
+        boundary is found by binary search and its lines are counted by ``bytes.count``."""
+        total = 0
+        pos = header_at(data, 0)
+        while pos < len(data):
+            minute = data[pos:pos + MINUTE]
+            # First header line after ``pos`` that starts a later minute
+            lo, hi = pos + 1, len(data)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                probe = next_header(data, mid)
+                if probe >= len(data) or data[probe:probe + MINUTE] != minute:
+                    hi = mid
+                else:
+                    lo = mid + 1
+            end = next_header(data, lo)
+            count = sum(data.count(marker, pos, end) for marker in STATEMENT_MARKERS)
+            if count:
+                self.per_minute[minute] = self.per_minute.get(minute, 0) + count
+                total += count
+            pos = end
+        if len(self.per_minute) > MAX_MINUTES:
+            for minute in sorted(self.per_minute)[:len(self.per_minute) - MAX_MINUTES]:
+                del self.per_minute[minute]
+        return total
+
+    def _add(self, ts: int, ms: float, pid: int, raw: bytes):
+        query = statement_text(raw)
+        key = fingerprint(query)
+        fp_id = self._fp_ids.get(key)
+        if fp_id is None:
+            if len(self.fingerprints) >= self.max_fingerprints:
+                key = "(other)"
+            fp_id = self._fp_ids.get(key)
+            if fp_id is None:
+                fp_id = self._fp_ids[key] = len(self.fingerprints)
+                self.fingerprints.append(key)
+                self.examples.append(query[:500])
+                self.totals.append([0, 0.0, 0.0])
+        totals = self.totals[fp_id]
+        totals[0] += 1
+        totals[1] += ms
+        totals[2] = max(totals[2], ms)
+
+        self.ts.append(ts)
+        self.ms.append(ms)
+        self.fp.append(fp_id)
+        self.pid.append(pid)
+        # Drop the oldest quarter at once rather than shifting on every append
+        if len(self.ts) > self.max_entries:
+            cut = self.max_entries // 4
+            for column in (self.ts, self.ms, self.fp, self.pid):
+                del column[:cut]
+
+    # --------------------------------------------------------------------------
+    # Queries
+    # --------------------------------------------------------------------------
+    def _range(self, start: int, end: int) -> range:
+        return range(bisect.bisect_left(self.ts, start), bisect.bisect_right(self.ts, end))
+
+    def slow(self, start: int, end: int, limit: int = 10) -> dict:
+        """Slow statements in [start, end] (epoch ns): per fingerprint and the slowest single runs."""
+        with self._lock:
+            rows = self._range(start, end)
+            by_fp: Dict[int, List[float]] = {}
+            for i in rows:
+                entry = by_fp.get(self.fp[i])
+                if entry is None:
+                    entry = by_fp[self.fp[i]] = [0, 0.0, 0.0, self.ts[i], self.ts[i]]
+                ms = self.ms[i]
+                entry[0] += 1
+                entry[1] += ms
+                entry[2] = max(entry[2], ms)
+                entry[4] = self.ts[i]
+            slowest = sorted(rows, key=lambda i: self.ms[i], reverse=True)[:limit]
+            total_ms = sum(e[1] for e in by_fp.values())
+            ranked = sorted(by_fp.items(), key=lambda kv: kv[1][1], reverse=True)[:limit]
+            return {
+                "slow_statements": len(rows),
+                "total_ms": round(total_ms, 1),
+                "fingerprints": [
+                    {
+                        "fingerprint": self.fingerprints[fp],
+                        "calls": calls,
+                        "total_ms": round(total, 1),
+                        "mean_ms": round(total / calls, 1),
+                        "max_ms": round(worst, 1),
+                        "share_of_time": round(total / total_ms, 3) if total_ms else None,
+                        "first_seen": _iso(first),
+                        "last_seen": _iso(last),
+                        "all_time_calls": int(self.totals[fp][0]),
+                        "example": self.examples[fp][:300],
+                    }
+                    for fp, (calls, total, worst, first, last) in ranked
+                ],
+                "slowest": [
+                    {"timestamp": _iso(self.ts[i]), "duration_ms": round(self.ms[i], 1), "pid": self.pid[i],
+                     "fingerprint": self.fingerprints[self.fp[i]]}
+                    for i in slowest
+                ],
+            }
+
+    def buckets(self, start: int, end: int, bucket_ns: int) -> Dict[int, Dict[int, List[float]]]:
+        """Bucket start (epoch ns) -> fingerprint id -> [slow calls, total ms]."""
+        out: Dict[int, Dict[int, List[float]]] = {}
+        with self._lock:
+            for i in self._range(start, end):
+                b = self.ts[i] - self.ts[i] % bucket_ns
+                entry = out.setdefault(b, {}).setdefault(self.fp[i], [0, 0.0])
+                entry[0] += 1
+                entry[1] += self.ms[i]
+        return out
+
+    def statement_counts(self, start: int, end: int, bucket_ns: int) -> Dict[int, int]:
+        """Statements logged per bucket (epoch ns), from the per-minute counts."""
+        out: Dict[int, int] = {}
+        with self._lock:
+            minutes = list(self.per_minute.items())
+        for minute, count in minutes:
+            ts = _timestamp(minute + b":00", None)
+            if ts == NAT or ts < start - 60 * 10**9 or ts > end:
+                continue
+            b = ts - ts % bucket_ns
+            out[b] = out.get(b, 0) + count
+        return out
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "file": self.path,
+                "exists": os.path.exists(self.path),
+                "offset": self._cursor.offset,
+                "lines": self.lines,
+                "statements": self.statements,
+                "errors": self.errors,
+                "slow_statements_kept": len(self.ts),
+                "fingerprints": len(self.fingerprints),
+                "oldest": _iso(self.ts[0]) if self.ts else None,
+                "last_ingest": self.last_stats,
+            }
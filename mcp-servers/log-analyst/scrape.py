@@ -0,0 +1,153 @@
+import math
+import re
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+# ==============================================================================
+# PROMETHEUS SCRAPER
+# Reads the services' /metrics pages and merges their request latency
+# histograms. Percentiles come from a few KB of bucket counters instead of
+# from parsing log lines.
+# ==============================================================================
+
+HISTOGRAM = "http_request_duration_seconds"
+_SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_targets(spec: str) -> Dict[str, str]:
+    """"name=url,name=url" -> {name: url}"""
+    targets = {}
+    for item in spec.split(","):
+        name, sep, url = item.strip().partition("=")
+        if sep and url:
+            targets[name.strip()] = url.strip()
+    return targets
+
+
+def parse_samples(text: str) -> List[Tuple[str, Dict[str, str], float]]:
+    """(metric name, labels, value) for every sample line of a text exposition."""
+    samples = []
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        match = _SAMPLE.match(line)
+        if not match:
+            continue
+        name, labels, value = match.groups()
+        try:
+            samples.append((name, dict(_LABEL.findall(labels or "")), float(value)))
+        except ValueError:
+            continue
+    return samples
+
+
+class MergedHistogram:
+    """Cumulative-bucket histogram built by summing scraped series."""
+
+    def __init__(self):
+        self.buckets: Dict[float, float] = {}
+        self.sum = 0.0
+        self.count = 0.0
+
+    def add_bucket(self, le: str, value: float):
+        bound = math.inf if le == "+Inf" else float(le)
+        self.buckets[bound] = self.buckets.get(bound, 0.0) + value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Linear interpolation inside the bucket holding rank q (as Prometheus does)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        previous_bound, previous_count = 0.0, 0.0
+        for bound in sorted(self.buckets):
+            cumulative = self.buckets[bound]
+            if cumulative >= rank:
+                if math.isinf(bound):
+                    return previous_bound
+                width = cumulative - previous_count
+                if width <= 0:
+                    return bound
+                return previous_bound + (bound - previous_bound) * (rank - previous_count) / width
+            previous_bound, previous_count = bound, cumulative
+        return previous_bound
+
+    def summary(self) -> dict:
+        return {
+            "requests": int(self.count),
+            "mean": round(self.sum / self.count, 4) if self.count else None,
+            "p50": _round(self.quantile(0.50)),
+            "p95": _round(self.quantile(0.95)),
+            "p99": _round(self.quantile(0.99)),
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 4)
+
+
+def _series_key(metric: str, labels: Dict[str, str]) -> str:
+    if not labels:
+        return metric
+    return metric + "{" + ",".join(f'{k}="{v}"' for k, v in sorted(labels.items())) + "}"
+
+
+def fetch(url: str, timeout: float) -> str:
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read().decode("utf-8", "replace")
+
+
+def scrape(targets: Dict[str, str], timeout: float = 2.0) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Fetch every target concurrently -> ({name: text}, {name: error})."""
+    pages, errors = {}, {}
+    if not targets:
+        return pages, errors
+    with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+        futures = {name: pool.submit(fetch, url, timeout) for name, url in targets.items()}
+        for name, future in futures.items():
+            try:
+                pages[name] = future.result()
+            except Exception as e:
+                errors[name] = str(e)
+    return pages, errors
+
+
+def merge(pages: Dict[str, str]) -> Dict[str, dict]:
+    """Per service: overall latency, a per-endpoint breakdown and status code counts.
+
+    Any other (non-histogram) samples a service exports are passed through
+    under "counters", one entry per series: 'name{label="value",...}'.
+    """
+    services: Dict[str, dict] = {}
+    for name, text in pages.items():
+        overall = MergedHistogram()
+        endpoints: Dict[str, MergedHistogram] = {}
+        statuses: Dict[str, int] = {}
+        counters: Dict[str, float] = {}
+        for metric, labels, value in parse_samples(text):
+            if not metric.startswith(HISTOGRAM):
+                counters[_series_key(metric, labels)] = value
+                continue
+            hist = endpoints.setdefault(labels.get("endpoint", "unknown"), MergedHistogram())
+            if metric == HISTOGRAM + "_bucket":
+                hist.add_bucket(labels.get("le", "+Inf"), value)
+                overall.add_bucket(labels.get("le", "+Inf"), value)
+            elif metric == HISTOGRAM + "_sum":
+                hist.sum += value
+                overall.sum += value
+            elif metric == HISTOGRAM + "_count":
+                hist.count += value
+                overall.count += value
+                status = labels.get("status", "unknown")
+                statuses[status] = statuses.get(status, 0) + int(value)
+
+        errors = sum(n for code, n in statuses.items() if code[:1] in ("4", "5"))
+        services[name] = {
+            **overall.summary(),
+            "error_rate": round(errors / overall.count, 4) if overall.count else None,
+            "status_codes": dict(sorted(statuses.items())),
+            "endpoints": {path: hist.summary() for path, hist in sorted(endpoints.items())},
+            "counters": counters,
+        }
+    return services
@@ -1,10 +1,30 @@
 from mcp.server.fastmcp import FastMCP
-import pandas as pd
+import functools
 import json
+import multiprocessing
 import os
 import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Sequence
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "shared"))
+import scrape
+from streaming import stream_range
+from templates import TemplateMiner
+from traces import TraceIndex
+from concurrency import offload
+from instrumentation import instrument, snapshot, span
+from daemon import serve
+from lazy import lazy_import
+
+# pandas (and the modules built on it) load on the first tool call, not at start-up
+pd = lazy_import("pandas")
+ingest = lazy_import("ingest")
+store = lazy_import("store")
+pglog = lazy_import("pglog")
 
 # ==============================================================================
 # CONFIGURATION
@@ -19,66 +39,470 @@ current_script_path = Path(__file__).resolve()
 project_root = current_script_path.parent.parent.parent
 
 # 3. Define the absolute path to shared-logs
-LOG_DIR = project_root / "shared-logs"
+LOG_DIR = Path(os.getenv("LOG_DIR", project_root / "shared-logs"))
 
 # Debug: Print to console (visible in Inspector)
 print(f"DEBUG: Log Analyst initialized. Root: {project_root}", file=sys.stderr)
 print(f"DEBUG: Looking for logs at: {LOG_DIR}", file=sys.stderr)
 
-def _load_df(service_name: Optional[str] = None) -> pd.DataFrame:
-    """Helper to load JSON logs into a DataFrame"""
-    all_records = []
-    log_dir_str = str(LOG_DIR) # Convert Path to string for os functions
+# 4. Columnar store (Parquet segments). Set LOG_STORE=off to query the
+# in-memory ingestor only.
+LOG_STORE_DIR = Path(os.getenv("LOG_STORE_DIR", project_root / "log-store"))
+
+# 5. Parser processes for large reads (cold start, big appends). 1 = parse inline.
+# Opt-in: the workers are forked at start-up (see PARSE_POOL below), which every
+# server start pays for even if no call ever needs a large read.
+PARSE_WORKERS = int(os.getenv("LOG_PARSE_WORKERS", 1))
+
+# 6. LOG_STREAMING=on keeps only running counters and heavy-hitter sketches:
+# memory stays flat, but row-level tools (timeseries) are unavailable.
+STREAMING = os.getenv("LOG_STREAMING", "off").lower() == "on"
+
+# 7. Prometheus /metrics endpoints of the services (ports as published by docker-compose)
+METRICS_TARGETS = scrape.parse_targets(os.getenv(
+    "METRICS_TARGETS",
+    "payment-service=http://localhost:8080/metrics,"
+    "inventory-service=http://localhost:8081/metrics,"
+    "auth-service=http://localhost:8082/metrics",
+))
+
+# 8. Postgres server log (log_statement=all + log_min_duration_statement), as
+# mounted from the db container by docker-compose. Set PG_LOG_PATH=off to skip it.
+PG_LOG_PATH = os.getenv("PG_LOG_PATH", str(project_root / "postgres-logs" / "postgresql.log"))
+
+# Parser processes are forked here, while this is still the only thread. A
+# process forked later, once the MCP stdin reader thread runs, inherits that
+# thread's lock on stdin and hangs before it can take any work. This costs
+# about one fork (and its memory) per worker on every start. Without fork
+# (Windows, macOS default), a spawned worker would re-run this module and
+# build its own pool, so large reads are parsed inline instead.
+PARSE_POOL = None
+if PARSE_WORKERS > 1 and not STREAMING:
+    if "fork" in multiprocessing.get_all_start_methods():
+        PARSE_POOL = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context("fork"))
+        PARSE_POOL.submit(int)  # fork starts every worker on the first submit
+    else:
+        print("DEBUG: No fork start method, LOG_PARSE_WORKERS ignored (parsing inline)", file=sys.stderr)
+        PARSE_WORKERS = 1
+
+# Ingestion state lives for the lifetime of the server process, so repeat
+# tool calls only pay for lines appended since the previous call. It is built
+# by _ready() on the first tool call, so the handshake does not wait on pandas.
+PGLOG = None
+TRACES = None
+STORE = None
+MINER = None
+INGESTOR = None
+_ready_lock = threading.Lock()
+
+def _ready():
+    """Open the log store, ingestor and Postgres log reader (once)."""
+    global PGLOG, TRACES, STORE, MINER, INGESTOR
+    with _ready_lock:
+        if INGESTOR is not None:
+            return
+        if PG_LOG_PATH.lower() != "off":
+            PGLOG = pglog.PostgresLog(PG_LOG_PATH)
+
+        # trace_id -> (file, byte offset), filled in during ingestion
+        TRACES = TraceIndex(max_traces=int(os.getenv("LOG_TRACE_INDEX_SIZE", 200_000)))
+
+        if not STREAMING and store.AVAILABLE and os.getenv("LOG_STORE", "on").lower() != "off":
+            STORE = store.SegmentStore(LOG_STORE_DIR, LOG_DIR, workers=PARSE_WORKERS, traces=TRACES,
+                                       pool=PARSE_POOL)
+            print(f"DEBUG: Columnar log store at: {LOG_STORE_DIR}", file=sys.stderr)
+
+        if STORE is not None:
+            MINER, INGESTOR = STORE.miner, STORE.ingestor
+        elif STREAMING:
+            MINER = TemplateMiner()
+            INGESTOR = ingest.LogIngestor(LOG_DIR, range_sink=functools.partial(stream_range, MINER, TRACES))
+            print("DEBUG: Streaming mode, rows are not retained", file=sys.stderr)
+        else:
+            MINER = TemplateMiner()
+            INGESTOR = ingest.LogIngestor(LOG_DIR, miner=MINER, workers=PARSE_WORKERS, traces=TRACES,
+                                          pool=PARSE_POOL)
+
+def _refresh() -> dict:
+    """Ingest whatever was appended since the last call."""
+    _ready()
+    if STORE is not None:
+        return STORE.compact()
+    return INGESTOR.refresh()
+
+def _load_df(service_name: Optional[str] = None, columns: Optional[Sequence[str]] = None,
+             start: Optional[datetime] = None, end: Optional[datetime] = None,
+             levels: Optional[Sequence[str]] = None,
+             equals: Optional[Dict[str, str]] = None) -> "pd.DataFrame":
+    """Helper to load JSON logs into a DataFrame, newest first.
+
+    ``columns``, ``start``/``end``, ``levels`` and ``equals`` (column == value)
+    are pushed down to the columnar store so only matching segments and
+    columns are read.
+    """
+    _ready()
+    with span("load_df"):
+        return _scan(service_name, columns, start, end, levels, equals)
+
+def _scan(service_name, columns, start, end, levels, equals) -> "pd.DataFrame":
+    if STORE is not None:
+        return STORE.scan(service_name, columns=columns, start=start, end=end,
+                          levels=levels, equals=equals)
+    if STREAMING:
+        print("DEBUG: Row-level query skipped in streaming mode", file=sys.stderr)
+        return pd.DataFrame()
 
     # DEBUG CHECK: If folder is missing, return empty
-    if not os.path.exists(log_dir_str):
-        print(f"DEBUG: FOLDER MISSING: {log_dir_str}", file=sys.stderr)
+    if not LOG_DIR.exists():
+        print(f"DEBUG: FOLDER MISSING: {LOG_DIR}", file=sys.stderr)
         return pd.DataFrame()
-    
-    files = [f for f in os.listdir(log_dir_str) if f.endswith('.log')]
-    
-    for file in files:
-        if service_name and service_name not in file: continue
-        try:
-            full_path = os.path.join(log_dir_str, file)
-            with open(full_path, 'r') as f:
-                for line in f:
-                    if line.strip():
-                        try:
-                            all_records.append(json.loads(line))
-                        except: continue
-        except Exception as e:
-            print(f"Error reading {file}: {e}", file=sys.stderr)
-            continue
-        
-    df = pd.DataFrame(all_records)
-    if not df.empty and 'timestamp' in df.columns:
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df = df.sort_values('timestamp', ascending=False)
-    return df
+
+    return INGESTOR.frame(service_name, columns=columns, start=store.to_utc(start), end=store.to_utc(end),
+                          levels=levels, equals=equals)
+
+def _has_logs(service_name: Optional[str] = None) -> bool:
+    _refresh()
+    return MINER.total(service_name) > 0
 
 @mcp.tool()
+@offload
+@instrument
 def get_error_stats(service_name: str) -> str:
     """Get error counts and patterns for a specific service"""
-    df = _load_df(service_name)
-    
     # DEBUG RESPONSE: Tell the user where we looked if empty
-    if df.empty:
+    if not _has_logs(service_name):
         return f"No logs found for '{service_name}'. I searched in: {LOG_DIR}. Is the file 'payment-service.log' there?"
 
-    error_df = df[df['level'] == 'ERROR']
-    total_errors = len(error_df)
-    
+    # Counters are maintained by the template miner during ingestion
+    total_errors = MINER.total(service_name, level='ERROR')
+
     if total_errors == 0:
         return json.dumps({"status": "healthy", "total_errors": 0})
-        
-    patterns = error_df['message'].value_counts().head(3).to_dict()
-    
+
+    # Keyed by template id: two templates can render to the same text
+    patterns = {str(p["template_id"]): {"template": p["template"], "count": p["count"]}
+                for p in MINER.top(service_name, level='ERROR', limit=3)}
+
     return json.dumps({
         "total_errors": total_errors,
         "top_patterns": patterns,
         "checked_path": str(LOG_DIR) # Confirm path in success case too
     }, indent=2)
 
+@mcp.tool()
+@offload
+@instrument
+def get_log_patterns(service_name: str, level: Optional[str] = None, limit: int = 10) -> str:
+    """
+    List the most frequent message templates for a service, e.g.
+    "Slow database query detected: <NUM>". Optionally filter by level (ERROR, WARNING, INFO).
+    """
+    if not _has_logs(service_name):
+        return f"No logs found for '{service_name}'. I searched in: {LOG_DIR}."
+
+    return json.dumps({
+        "service": service_name,
+        "level": level,
+        "lines": MINER.total(service_name, level=level),
+        "templates_tracked": len(MINER),
+        "patterns": MINER.top(service_name, level=level, limit=limit),
+    }, indent=2)
+
+@mcp.tool()
+@offload
+@instrument
+def get_ingest_status() -> str:
+    """Show ingestion progress: per-file offsets, parser workers and lines/sec of the last ingest."""
+    current = _refresh()
+    if PGLOG is not None:
+        PGLOG.refresh()
+    return json.dumps({
+        "log_dir": str(LOG_DIR),
+        "store": str(LOG_STORE_DIR) if STORE is not None else None,
+        "workers": PARSE_WORKERS,
+        "this_call": current,
+        "last_ingest": INGESTOR.last_stats,
+        "files": INGESTOR.status(),
+        "postgres_log": PGLOG.status() if PGLOG is not None else None,
+    }, indent=2)
+
+STREAMING_UNSUPPORTED = "Timeseries need individual log rows, which are not kept when LOG_STREAMING=on."
+
+def _window(minutes: int, end_time: Optional[str] = None):
+    """[start, end] for the last ``minutes`` before ``end_time`` (default: now, UTC)."""
+    end = store.to_utc(end_time) if end_time else pd.Timestamp.now(tz='UTC')
+    return end - pd.Timedelta(minutes=minutes), end
+
+def _buckets(start, end, bucket: str) -> "pd.DatetimeIndex":
+    return pd.date_range(start.floor(bucket), end.floor(bucket), freq=bucket)
+
+@mcp.tool()
+@offload
+@instrument
+def get_error_timeseries(service_name: str, minutes: int = 30, bucket: str = "1min",
+                         end_time: Optional[str] = None) -> str:
+    """
+    Errors per time bucket for a service over the last N minutes.
+    Returns total lines, ERROR lines and error rate for each bucket (e.g. bucket="1min", "5min").
+    end_time is an ISO timestamp and defaults to now (UTC).
+    """
+    if STREAMING:
+        return STREAMING_UNSUPPORTED
+    start, end = _window(minutes, end_time)
+    df = _load_df(service_name, columns=['timestamp', 'level'], start=start, end=end)
+    if df.empty:
+        return f"No logs for '{service_name}' between {start.isoformat()} and {end.isoformat()}."
+
+    with span("aggregate"):
+        grouped = df.groupby([pd.Grouper(key='timestamp', freq=bucket), 'level']).size().unstack(fill_value=0)
+        grouped = grouped.reindex(_buckets(start, end, bucket), fill_value=0)
+        totals = grouped.sum(axis=1)
+        errors = grouped['ERROR'] if 'ERROR' in grouped.columns else totals * 0
+        rates = (errors / totals.where(totals > 0)).fillna(0.0).round(4)
+
+    series = [
+        {"bucket": ts.isoformat(), "lines": int(t), "errors": int(e), "error_rate": float(r)}
+        for ts, t, e, r in zip(grouped.index, totals, errors, rates)
+    ]
+    return json.dumps({
+        "service": service_name,
+        "window": {"start": start.isoformat(), "end": end.isoformat(), "bucket": bucket},
+        "total_errors": int(errors.sum()),
+        "peak_errors_per_bucket": int(errors.max()),
+        "series": series,
+    }, indent=2)
+
+@mcp.tool()
+@offload
+@instrument
+def get_latency_percentiles(service_name: str = "inventory", minutes: int = 30, bucket: str = "5min",
+                            end_time: Optional[str] = None) -> str:
+    """
+    p50/p95/p99/max of the 'latency' field (seconds) per time bucket over the last N minutes.
+    end_time is an ISO timestamp and defaults to now (UTC).
+    """
+    if STREAMING:
+        return STREAMING_UNSUPPORTED
+    start, end = _window(minutes, end_time)
+    df = _load_df(service_name, columns=['timestamp', 'latency'], start=start, end=end)
+    if df.empty or 'latency' not in df.columns:
+        return f"No latency samples for '{service_name}' between {start.isoformat()} and {end.isoformat()}."
+
+    latency = pd.to_numeric(df['latency'], errors='coerce')
+    latency.index = df['timestamp']
+    latency = latency.dropna().sort_index()
+    if latency.empty:
+        return f"No latency samples for '{service_name}' between {start.isoformat()} and {end.isoformat()}."
+
+    with span("aggregate"):
+        resampled = latency.resample(bucket)
+        table = pd.DataFrame({
+            "samples": resampled.count(),
+            "p50": resampled.quantile(0.50),
+            "p95": resampled.quantile(0.95),
+            "p99": resampled.quantile(0.99),
+            "max": resampled.max(),
+        })
+        table = table[table['samples'] > 0].round(4).astype({"samples": int})
+
+    return json.dumps({
+        "service": service_name,
+        "window": {"start": start.isoformat(), "end": end.isoformat(), "bucket": bucket},
+        "overall": {
+            "samples": int(len(latency)),
+            "p50": round(float(latency.quantile(0.50)), 4),
+            "p95": round(float(latency.quantile(0.95)), 4),
+            "p99": round(float(latency.quantile(0.99)), 4),
+        },
+        "series": [
+            {"bucket": ts.isoformat(), **row}
+            for ts, row in zip(table.index, table.to_dict('records'))
+        ],
+    }, indent=2)
+
+@mcp.tool()
+@offload
+@instrument
+def get_trace(trace_id: str) -> str:
+    """
+    Follow one request end-to-end: every log line (from any service) carrying this trace_id,
+    oldest first. Uses the trace index to seek straight to the matching lines.
+    """
+    _refresh()
+    records = TRACES.lookup(trace_id)
+    source = "index"
+    if not records:
+        # Not indexed (evicted, or ingested before a restart): fall back to a scan
+        df = _load_df(equals={"trace_id": trace_id})
+        records = json.loads(df.iloc[::-1].to_json(orient='records', date_format='iso')) if not df.empty else []
+        source = "scan"
+    if not records:
+        return f"No log lines found for trace_id '{trace_id}'."
+
+    return json.dumps({"trace_id": trace_id, "source": source, "lines": records}, indent=2, default=str)
+
+@mcp.tool()
+@offload
+@instrument
+def get_slow_traces(minutes: int = 30, service_name: Optional[str] = None, failed_only: bool = False,
+                    limit: int = 10, end_time: Optional[str] = None) -> str:
+    """
+    List the slowest traces seen in the last N minutes (by span and logged latency).
+    Set failed_only=True to list only traces with ERROR lines or an error_code.
+    """
+    _refresh()
+    start, end = _window(minutes, end_time)
+    traces = TRACES.slowest(start.value, end.value, service_name=service_name,
+                            failed_only=failed_only, limit=limit)
+    if not traces:
+        return f"No traces between {start.isoformat()} and {end.isoformat()}."
+
+    return json.dumps({
+        "window": {"start": start.isoformat(), "end": end.isoformat()},
+        "indexed_traces": len(TRACES),
+        "traces": traces,
+    }, indent=2)
+
+PG_LOG_OFF = "The Postgres log is not being read (PG_LOG_PATH=off)."
+
+@mcp.tool()
+@offload
+@instrument
+def get_slow_queries(minutes: int = 30, limit: int = 10, end_time: Optional[str] = None) -> str:
+    """
+    Slow SQL from the Postgres server log over the last N minutes (statements slower than
+    log_min_duration_statement), grouped by fingerprint (literals stripped) and ranked by total time,
+    plus the slowest individual runs. end_time is an ISO timestamp and defaults to now (UTC).
+    """
+    _ready()
+    if PGLOG is None:
+        return PG_LOG_OFF
+    PGLOG.refresh()
+    start, end = _window(minutes, end_time)
+    result = PGLOG.slow(start.value, end.value, limit)
+    if not result["slow_statements"]:
+        return (f"No slow statements between {start.isoformat()} and {end.isoformat()} "
+                f"in {PG_LOG_PATH} ({PGLOG.status()['statements']} statements read so far).")
+    return json.dumps({"window": {"start": start.isoformat(), "end": end.isoformat()}, **result}, indent=2)
+
+@mcp.tool()
+@offload
+@instrument
+def correlate_slow_queries(service_name: str = "inventory", minutes: int = 30, bucket: str = "1min",
+                           end_time: Optional[str] = None, limit: int = 5) -> str:
+    """
+    Line a service's logs up with slow SQL from the Postgres log, per time bucket: service lines,
+    errors, warnings and p95 latency next to statement volume and slow-statement time.
+    "suspects" ranks SQL fingerprints by how much of their slow time fell in buckets where the
+    service was degraded (errors, warnings, or p95 latency over twice its usual level).
+    """
+    _ready()
+    if PGLOG is None:
+        return PG_LOG_OFF
+    if STREAMING:
+        return STREAMING_UNSUPPORTED
+    PGLOG.refresh()
+    start, end = _window(minutes, end_time)
+    bucket_ns = pd.Timedelta(bucket).value
+    index = _buckets(start, end, bucket)
+
+    df = _load_df(service_name, columns=['timestamp', 'level', 'latency'], start=start, end=end)
+    service = pd.DataFrame(index=index, data={"lines": 0, "errors": 0, "warnings": 0, "p95_latency": float('nan')})
+    if not df.empty:
+        with span("aggregate"):
+            keys = df['timestamp'].dt.floor(bucket)
+            levels = df['level'] if 'level' in df.columns else pd.Series("", index=df.index)
+            grouped = pd.DataFrame({
+                "lines": keys.value_counts(),
+                "errors": keys[levels == 'ERROR'].value_counts(),
+                "warnings": keys[levels == 'WARNING'].value_counts(),
+            })
+            if 'latency' in df.columns:
+                latency = pd.to_numeric(df['latency'], errors='coerce')
+                grouped["p95_latency"] = latency.groupby(keys).quantile(0.95)
+            service.update(grouped.reindex(index))
+
+    p95 = service['p95_latency'].dropna()
+    usual = float(p95.median()) if not p95.empty else None
+    degraded = (service['errors'] > 0) | (service['warnings'] > 0)
+    if usual:
+        degraded |= service['p95_latency'] > 2 * usual
+
+    slow = PGLOG.buckets(start.value, end.value, bucket_ns)
+    statements = PGLOG.statement_counts(start.value, end.value, bucket_ns)
+    suspects: Dict[int, list] = {}  # fingerprint id -> [slow calls, total ms, ms in degraded buckets]
+    series = []
+    for ts, row in service.iterrows():
+        sql = slow.get(ts.value, {})
+        bad = bool(degraded.loc[ts])
+        for fp, (calls, ms) in sql.items():
+            entry = suspects.setdefault(fp, [0, 0.0, 0.0])
+            entry[0] += calls
+            entry[1] += ms
+            if bad:
+                entry[2] += ms
+        top = max(sql.items(), key=lambda kv: kv[1][1])[0] if sql else None
+        series.append({
+            "bucket": ts.isoformat(),
+            "degraded": bad,
+            "lines": int(row['lines']),
+            "errors": int(row['errors']),
+            "warnings": int(row['warnings']),
+            "p95_latency": None if pd.isna(row['p95_latency']) else round(float(row['p95_latency']), 4),
+            "statements": statements.get(ts.value, 0),
+            "slow_statements": sum(calls for calls, _ in sql.values()),
+            "slow_ms": round(sum(ms for _, ms in sql.values()), 1),
+            "top_fingerprint": PGLOG.fingerprints[top] if top is not None else None,
+        })
+
+    ranked = sorted(suspects.items(), key=lambda kv: (kv[1][2], kv[1][1]), reverse=True)[:limit]
+    return json.dumps({
+        "service": service_name,
+        "window": {"start": start.isoformat(), "end": end.isoformat(), "bucket": bucket},
+        "degraded_buckets": int(degraded.sum()),
+        "usual_p95_latency": round(usual, 4) if usual else None,
+        "suspects": [
+            {
+                "fingerprint": PGLOG.fingerprints[fp],
+                "slow_calls": calls,
+                "slow_ms": round(ms, 1),
+                "ms_in_degraded_buckets": round(bad_ms, 1),
+                "share_in_degraded": round(bad_ms / ms, 3) if ms else None,
+                "example": PGLOG.examples[fp][:300],
+            }
+            for fp, (calls, ms, bad_ms) in ranked
+        ],
+        "series": series,
+    }, indent=2)
+
+@mcp.tool()
+@offload
+@instrument
+def get_service_metrics(service_name: Optional[str] = None) -> str:
+    """
+    Live request latency (p50/p95/p99), request counts and status codes from each service's
+    /metrics endpoint. Counters are cumulative since the service started.
+    Pass service_name to scrape a single service.
+    """
+    targets = {name: url for name, url in METRICS_TARGETS.items()
+               if not service_name or service_name in name}
+    if not targets:
+        return f"No metrics endpoint configured for '{service_name}'. Known: {', '.join(METRICS_TARGETS)}"
+
+    pages, errors = scrape.scrape(targets)
+    result = {"services": scrape.merge(pages)}
+    if errors:
+        result["unreachable"] = errors
+    return json.dumps(result, indent=2)
+
+@mcp.tool()
+async def get_server_metrics(tool_name: Optional[str] = None) -> str:
+    """
+    Latency of the Log Analyst tools: calls, errors, p50/p95/p99 and a histogram over the recent
+    window, plus where the time goes inside each tool (refresh: file scan, JSON decode, DataFrame
+    build; load_df: segment reads, filtering, sorting; aggregation). Pass tool_name for one tool.
+    """
+    return json.dumps(snapshot(tool_name), indent=2)
+
 if __name__ == "__main__":
-    mcp.run()
\ No newline at end of file
+    serve(mcp, __file__)
\ No newline at end of file
@@ -0,0 +1,299 @@
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from ingest import LogIngestor
+from instrumentation import span
+from templates import TemplateMiner
+from traces import TraceIndex
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    AVAILABLE = True
+except ImportError:  # The analyst falls back to the in-memory ingestor
+    AVAILABLE = False
+
+# ==============================================================================
+# COLUMNAR LOG STORE
+# Compacts the raw JSON logs into Parquet segments partitioned by service and
+# hour. The manifest keeps per-segment min/max timestamps and level counts so
+# a query only opens segments that can match, and only the columns it needs.
+#
+#   <root>/service=payment-service/hour=2024010113/seg-00000.parquet
+#   <root>/manifest.json
+#
+# Segments are an archive: rows survive rotation or truncation of the source.
+#
+# A segment file is never rewritten once the manifest lists it. Each
+# compaction writes its new rows as small delta segments, and the manifest
+# lists them in the same atomic write that advances the source checkpoints, so
+# a crash in between re-ingests into files nobody references. Small segments
+# are later merged per partition into one new file; the old ones are deleted
+# after the manifest stops listing them and no scan is reading.
+# ==============================================================================
+
+# A partition's segments below SEGMENT_ROWS are merged once there are MERGE_SEGMENTS of them
+SEGMENT_ROWS = 50_000
+MERGE_SEGMENTS = 8
+# Columns we always want typed as numbers rather than strings
+NUMERIC_COLUMNS = ("latency",)
+MANIFEST = "manifest.json"
+TEMPLATES = "templates.json"
+
+
+def to_utc(ts) -> Optional[pd.Timestamp]:
+    """Coerce naive (assumed UTC) or aware datetimes to an aware UTC Timestamp."""
+    if ts is None:
+        return None
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
+
+
+def _hour_key(ts) -> str:
+    return "unknown" if pd.isna(ts) else ts.strftime("%Y%m%d%H")
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """Give every column a single Arrow-friendly type."""
+    df = df.copy()
+    for col in df.columns:
+        if col == 'timestamp':
+            continue
+        if col in NUMERIC_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        elif df[col].dtype == object:
+            df[col] = df[col].map(lambda v: v if v is None or isinstance(v, str) else str(v))
+    return df
+
+
+def _ts_filters(start, end) -> list:
+    filters = []
+    if start is not None:
+        filters.append(('timestamp', '>=', start))
+    if end is not None:
+        filters.append(('timestamp', '<=', end))
+    return filters
+
+
+class SegmentStore:
+    """Parquet-backed log archive with manifest-based segment pruning."""
+
+    def __init__(self, root: Path, log_dir: Path, workers: int = 1,
+                 traces: Optional[TraceIndex] = None, pool: Optional[ProcessPoolExecutor] = None):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._segments: List[dict] = []
+        self._next_index = 0
+        # Scans reading segment files right now, and merged-away files waiting for them
+        self._readers = 0
+        self._retired: List[Path] = []
+        self.miner = TemplateMiner()
+        self.ingestor = LogIngestor(log_dir, sink=self._append, miner=self.miner,
+                                    workers=workers, traces=traces, pool=pool)
+        self._load_manifest()
+
+    # --------------------------------------------------------------------------
+    # Manifest
+    # --------------------------------------------------------------------------
+    def _load_manifest(self):
+        path = self.root / MANIFEST
+        if not path.exists():
+            return
+        try:
+            manifest = json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            print(f"DEBUG: Ignoring unreadable log store manifest: {e}", file=sys.stderr)
+            return
+        self._segments = manifest.get("segments", [])
+        self._next_index = manifest.get("next_index", max(
+            (int(s["path"].rsplit("seg-", 1)[1].split(".")[0]) for s in self._segments), default=-1) + 1)
+        self.ingestor.restore_checkpoints(manifest.get("checkpoints", {}))
+        templates = self.root / TEMPLATES
+        if templates.exists():
+            self.miner.load(json.loads(templates.read_text()))
+
+    def _save_manifest(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._write_json(TEMPLATES, self.miner.to_dict())
+        # Written last: checkpoints only advance once the data they cover is saved
+        self._write_json(MANIFEST, {
+            "segments": self._segments,
+            "next_index": self._next_index,
+            "checkpoints": self.ingestor.checkpoints(),
+        })
+
+    def _write_json(self, name: str, payload: dict):
+        tmp = self.root / (name + ".tmp")
+        tmp.write_text(json.dumps(payload))
+        os.replace(tmp, self.root / name)
+
+    # --------------------------------------------------------------------------
+    # Compaction
+    # --------------------------------------------------------------------------
+    def compact(self) -> dict:
+        """Move newly appended log lines into segments."""
+        with self._lock:
+            stats = self.ingestor.refresh()
+            if stats["new_rows"] or stats["resets"]:
+                self._save_manifest()
+                if self._merge_small_segments():
+                    self._save_manifest()
+                    self._drop_retired()
+            return stats
+
+    def _append(self, source: str, chunk: pd.DataFrame):
+        if 'timestamp' not in chunk.columns:
+            return
+        fallback = Path(source).stem
+        if 'service' in chunk.columns:
+            services = chunk['service'].fillna(fallback)
+        else:
+            services = pd.Series(fallback, index=chunk.index)
+        hours = chunk['timestamp'].map(_hour_key)
+
+        for (service, hour), part in chunk.groupby([services, hours], sort=False):
+            self._write_partition(str(service), hour, part)
+
+    def _write_partition(self, service: str, hour: str, rows: pd.DataFrame):
+        seg = {"service": service, "hour": hour, "path": self._new_path(service, hour)}
+        self._write_segment(seg, rows)
+        self._segments.append(seg)
+
+    def _new_path(self, service: str, hour: str) -> str:
+        index = self._next_index
+        self._next_index += 1
+        return f"service={service}/hour={hour}/seg-{index:05d}.parquet"
+
+    def _write_segment(self, seg: dict, rows: pd.DataFrame):
+        rows = _normalize(rows.sort_values('timestamp', ignore_index=True))
+        path = self.root / seg["path"]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        pq.write_table(pa.Table.from_pandas(rows, preserve_index=False), tmp)
+        os.replace(tmp, path)
+
+        ts = rows['timestamp'].dropna()
+        seg["rows"] = len(rows)
+        seg["min_ts"] = ts.min().isoformat() if not ts.empty else None
+        seg["max_ts"] = ts.max().isoformat() if not ts.empty else None
+        seg["levels"] = rows['level'].value_counts().to_dict() if 'level' in rows.columns else {}
+
+    def _merge_small_segments(self) -> int:
+        """Fold each partition's small segments into one new segment; returns how many were merged."""
+        partitions: Dict[tuple, List[dict]] = {}
+        for seg in self._segments:
+            if seg["rows"] < SEGMENT_ROWS:
+                partitions.setdefault((seg["service"], seg["hour"]), []).append(seg)
+        merged = 0
+        for (service, hour), small in partitions.items():
+            if len(small) < MERGE_SEGMENTS:
+                continue
+            with span("merge"):
+                rows = pd.concat([pq.read_table(self.root / s["path"]).to_pandas() for s in small],
+                                 ignore_index=True)
+                seg = {"service": service, "hour": hour, "path": self._new_path(service, hour)}
+                self._write_segment(seg, rows)
+            gone = {s["path"] for s in small}
+            self._segments = [s for s in self._segments if s["path"] not in gone] + [seg]
+            self._retired.extend(self.root / path for path in gone)
+            merged += len(small)
+        return merged
+
+    def _drop_retired(self):
+        """Delete merged-away segment files once no scan can still be reading them."""
+        if self._readers:
+            return
+        for path in self._retired:
+            path.unlink(missing_ok=True)
+        self._retired = []
+
+    # --------------------------------------------------------------------------
+    # Querying
+    # --------------------------------------------------------------------------
+    def segments(self, service_name: Optional[str] = None, start: Optional[datetime] = None,
+                 end: Optional[datetime] = None, levels: Optional[Sequence[str]] = None) -> List[dict]:
+        """Segments whose manifest stats can satisfy the given predicates."""
+        start, end = to_utc(start), to_utc(end)
+        selected = []
+        for seg in self._segments:
+            if service_name and service_name not in seg["service"]:
+                continue
+            if levels and not any(seg["levels"].get(level) for level in levels):
+                continue
+            if seg["min_ts"] is not None:
+                if end is not None and pd.Timestamp(seg["min_ts"]) > end:
+                    continue
+                if start is not None and pd.Timestamp(seg["max_ts"]) < start:
+                    continue
+            selected.append(seg)
+        return selected
+
+    def scan(self, service_name: Optional[str] = None, columns: Optional[Sequence[str]] = None,
+             start: Optional[datetime] = None, end: Optional[datetime] = None,
+             levels: Optional[Sequence[str]] = None,
+             equals: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        """Read matching rows, newest first, touching only the needed segments and columns.
+
+        ``equals`` adds column == value predicates; segments lacking one of
+        those columns are skipped.
+        """
+        self.compact()
+        with self._lock, span("select_segments"):
+            segments = self.segments(service_name, start, end, levels)
+            self._readers += 1
+        try:
+            frames = self._read(segments, columns, to_utc(start), to_utc(end), levels, equals)
+        finally:
+            with self._lock:
+                self._readers -= 1
+                self._drop_retired()
+
+        if not frames:
+            return pd.DataFrame()
+        with span("sort"):
+            df = pd.concat(frames, ignore_index=True)
+            if 'timestamp' in df.columns:
+                df = df.sort_values('timestamp', ascending=False, ignore_index=True)
+        return df
+
+    def _read(self, segments: List[dict], columns, start, end, levels, equals) -> List[pd.DataFrame]:
+        frames = []
+        for seg in segments:
+            path = self.root / seg["path"]
+            with span("read_segment"):
+                schema = pq.read_schema(path)
+                wanted = [c for c in columns if c in schema.names] if columns else None
+                filters = _ts_filters(start, end)
+                if levels and 'level' in schema.names:
+                    filters.append(('level', 'in', list(levels)))
+                if equals:
+                    if not all(col in schema.names for col in equals):
+                        continue
+                    filters.extend((col, '==', value) for col, value in equals.items())
+                table = pq.read_table(path, columns=wanted, filters=filters or None)
+            if table.num_rows:
+                with span("to_pandas"):
+                    frames.append(table.to_pandas())
+        return frames
+
+    def has_service(self, service_name: Optional[str] = None) -> bool:
+        with self._lock:
+            return any(not service_name or service_name in s["service"] for s in self._segments)
+
+    def summary(self) -> Dict[str, dict]:
+        """Row and segment counts per service."""
+        out: Dict[str, dict] = {}
+        with self._lock:
+            for seg in self._segments:
+                entry = out.setdefault(seg["service"], {"segments": 0, "rows": 0})
+                entry["segments"] += 1
+                entry["rows"] += seg["rows"]
+        return out
@@ -0,0 +1,116 @@
+import json
+from pathlib import Path
+from typing import Dict, Hashable, Iterator, List, Tuple
+
+from traces import ts_ns
+
+# ==============================================================================
+# CONSTANT-MEMORY STREAMING AGGREGATION
+# Generators that walk log bytes line by line, and a Space-Saving sketch for
+# heavy hitters. Nothing here holds more than one read block and a fixed
+# number of counters, however large the logs get.
+# ==============================================================================
+
+READ_BLOCK = 1024 * 1024
+
+
+def iter_lines(path: str, start: int, end: int, block: int = READ_BLOCK) -> Iterator[Tuple[int, bytes]]:
+    """Yield (byte offset, line) for bytes [start, end) of ``path`` without loading the range."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        tail = b""
+        pos = start
+        while remaining > 0:
+            data = f.read(min(block, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            lines = (tail + data).split(b"\n")
+            tail = lines.pop()
+            for line in lines:
+                yield pos, line
+                pos += len(line) + 1
+        if tail:
+            yield pos, tail
+
+
+def iter_records(path: str, start: int, end: int) -> Iterator[Tuple[int, dict]]:
+    """(byte offset, decoded JSON record) from a byte range, skipping malformed lines."""
+    decode = json.JSONDecoder().decode
+    for offset, line in iter_lines(path, start, end):
+        if not line.strip():
+            continue
+        try:
+            record = decode(line.decode('utf-8', 'replace'))
+        except ValueError:
+            continue
+        if isinstance(record, dict):
+            yield offset, record
+
+
+class SpaceSaving:
+    """Space-Saving heavy-hitter sketch (Metwally et al.) over at most ``capacity`` keys.
+
+    Counts are exact while fewer than ``capacity`` distinct keys have been
+    seen; after that a key's count overestimates by at most its ``error``.
+    """
+
+    __slots__ = ("capacity", "_counts")
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        # key -> [count, overestimation]
+        self._counts: Dict[Hashable, List[int]] = {}
+
+    def add(self, key: Hashable, n: int = 1):
+        entry = self._counts.get(key)
+        if entry is not None:
+            entry[0] += n
+            return
+        if len(self._counts) < self.capacity:
+            self._counts[key] = [n, 0]
+            return
+        # Replace the smallest counter; O(capacity) but only on a miss
+        victim = min(self._counts, key=lambda k: self._counts[k][0])
+        floor = self._counts.pop(victim)[0]
+        self._counts[key] = [floor + n, floor]
+
+    def items(self) -> List[Tuple[Hashable, int, int]]:
+        """(key, count, error) for every monitored key, largest first."""
+        return sorted(
+            ((k, c, e) for k, (c, e) in self._counts.items()),
+            key=lambda item: item[1], reverse=True,
+        )
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def to_list(self) -> list:
+        return [[k, c, e] for k, (c, e) in self._counts.items()]
+
+    @classmethod
+    def from_list(cls, capacity: int, entries: list) -> "SpaceSaving":
+        sketch = cls(capacity)
+        sketch._counts = {k: [c, e] for k, c, e in entries}
+        return sketch
+
+
+def stream_range(miner, traces, path: str, start: int, end: int) -> int:
+    """Feed every record in a byte range to ``miner`` (and ``traces``) without building rows.
+
+    Used as the ingestor's ``range_sink`` in streaming mode. Returns the
+    number of records consumed.
+    """
+    fallback = Path(path).stem
+    rows = 0
+    for offset, record in iter_records(path, start, end):
+        message, service, level = record.get('message'), record.get('service'), record.get('level')
+        service = fallback if service is None else service
+        level = "" if level is None else level
+        miner.add("" if message is None else str(message), service, level)
+        if traces is not None and 'trace_id' in record:
+            traces.add(path, record['trace_id'], offset, ts_ns(record.get('timestamp')), service,
+                       level, record.get('latency'), failed=record.get('error_code') is not None)
+        rows += 1
+    return rows
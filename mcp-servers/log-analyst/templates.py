@@ -0,0 +1,226 @@
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from streaming import SpaceSaving
+
+# ==============================================================================
+# LOG TEMPLATE MINING (Drain)
+# Groups messages like "Slow database query detected: 1.734s" into one
+# template "Slow database query detected: <NUM>" as they are ingested.
+# Messages are masked, then routed through a fixed-depth prefix tree keyed by
+# token count and leading tokens; each leaf holds a few candidate templates
+# that are matched by token similarity and generalised with <*> on mismatch.
+# ==============================================================================
+
+PARAM = "<*>"
+
+# Applied in order before tokenizing, so variable values never reach the tree
+MASKS = [
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<UUID>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<IP>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b"), "<HEX>"),
+    (re.compile(r"(?<![\w.])[-+]?\d+(?:\.\d+)?(?:ms|s|%)?(?![\w.])"), "<NUM>"),
+]
+
+
+def mask(message: str) -> str:
+    for pattern, token in MASKS:
+        message = pattern.sub(token, message)
+    return message
+
+
+class _Template:
+    __slots__ = ("id", "tokens", "leaf")
+
+    def __init__(self, template_id: int, tokens: List[str], leaf: list):
+        self.id = template_id
+        self.tokens = tokens
+        self.leaf = leaf
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.tokens)
+
+
+class TemplateMiner:
+    """Incremental Drain template miner with bounded memory.
+
+    At most ``max_templates`` templates are kept; the least recently matched
+    one is evicted when a new template would exceed the limit. Line totals per
+    (service, level) are exact, and template counts per (service, level) are
+    tracked by a Space-Saving sketch of ``top_k`` entries, so memory stays
+    fixed however many lines are seen.
+    """
+
+    def __init__(self, depth: int = 4, similarity: float = 0.5,
+                 max_children: int = 100, max_templates: int = 1000, top_k: int = 200):
+        self.depth = depth
+        self.similarity = similarity
+        self.max_children = max_children
+        self.max_templates = max_templates
+        self.top_k = top_k
+        self._root: Dict[int, dict] = {}
+        self._templates: "OrderedDict[int, _Template]" = OrderedDict()
+        self._next_id = 1
+        self.totals: Counter = Counter()
+        # (service, level) -> heavy-hitter template IDs
+        self._heavy: Dict[Tuple[str, str], SpaceSaving] = {}
+        # Text of templates that were evicted while still counted by a sketch
+        self._retired: Dict[int, str] = {}
+        # Masked message -> template ID, so repeated shapes skip the tree walk
+        self._seen: "OrderedDict[str, int]" = OrderedDict()
+        # Tools read counts from other threads while ingestion adds lines
+        self._lock = threading.RLock()
+
+    # --------------------------------------------------------------------------
+    # Matching
+    # --------------------------------------------------------------------------
+    def add(self, message: str, service: str = "", level: str = "") -> int:
+        """Assign ``message`` to a template and count it. Returns the template ID."""
+        return self.add_masked(mask(str(message)), service, level)
+
+    def add_masked(self, masked: str, service: str = "", level: str = "") -> int:
+        """Like :meth:`add` for a message that has already been through :func:`mask`."""
+        with self._lock:
+            return self._add_masked(masked, service, level)
+
+    def _add_masked(self, masked: str, service: str, level: str) -> int:
+        self.totals[(service, level)] += 1
+
+        template = self._templates.get(self._seen.get(masked, 0))
+        if template is None:
+            tokens = masked.split()
+            leaf = self._leaf(tokens)
+            template = self._match(leaf, tokens)
+            if template is None:
+                template = self._create(leaf, tokens)
+            else:
+                template.tokens = [t if t == n else PARAM for t, n in zip(template.tokens, tokens)]
+            self._seen[masked] = template.id
+            if len(self._seen) > self.max_templates * 10:
+                self._seen.popitem(last=False)
+
+        self._templates.move_to_end(template.id)
+        sketch = self._heavy.get((service, level))
+        if sketch is None:
+            sketch = self._heavy[(service, level)] = SpaceSaving(self.top_k)
+        sketch.add(template.id)
+        return template.id
+
+    def _leaf(self, tokens: List[str]) -> list:
+        node = self._root.setdefault(len(tokens), {})
+        for token in tokens[:self.depth]:
+            if any(ch.isdigit() for ch in token):
+                token = PARAM
+            if token not in node:
+                if len(node) >= self.max_children:
+                    token = PARAM
+                node = node.setdefault(token, {})
+            else:
+                node = node[token]
+        return node.setdefault(None, [])
+
+    def _match(self, leaf: list, tokens: List[str]) -> Optional[_Template]:
+        best, best_score = None, -1.0
+        for template in leaf:
+            same = sum(1 for t, n in zip(template.tokens, tokens) if t == n or t == PARAM)
+            score = same / len(tokens) if tokens else 1.0
+            if score > best_score:
+                best, best_score = template, score
+        return best if best is not None and best_score >= self.similarity else None
+
+    def _create(self, leaf: list, tokens: List[str]) -> _Template:
+        template = _Template(self._next_id, list(tokens), leaf)
+        self._next_id += 1
+        leaf.append(template)
+        self._templates[template.id] = template
+        if len(self._templates) > self.max_templates:
+            _, evicted = self._templates.popitem(last=False)
+            evicted.leaf.remove(evicted)
+            self._retired[evicted.id] = evicted.text
+            if len(self._retired) > self.max_templates:
+                self._retired.pop(next(iter(self._retired)))
+        return template
+
+    def reset_counts(self, counts: Iterable[Tuple[Tuple[str, str, int], int]]):
+        """Replace every line count with ``counts``: ((service, level, template ID), lines) pairs.
+
+        Templates are kept. Used when rows are dropped (a log file truncated,
+        rotated or deleted), so counts match the rows still held.
+        """
+        with self._lock:
+            self.totals = Counter()
+            self._heavy = {}
+            for (service, level, template_id), n in counts:
+                self.totals[(service, level)] += n
+                sketch = self._heavy.get((service, level))
+                if sketch is None:
+                    sketch = self._heavy[(service, level)] = SpaceSaving(self.top_k)
+                sketch.add(template_id, n)
+
+    # --------------------------------------------------------------------------
+    # Queries (cost is proportional to the number of templates, not lines)
+    # --------------------------------------------------------------------------
+    def top(self, service_name: Optional[str] = None, level: Optional[str] = None,
+            limit: int = 10) -> List[dict]:
+        merged: Counter = Counter()
+        with self._lock:
+            for (service, lvl), sketch in self._heavy.items():
+                if (not service_name or service_name in service) and (not level or lvl == level):
+                    for template_id, count, _ in sketch.items():
+                        merged[template_id] += count
+            return [
+                {"template_id": template_id, "template": self.template(template_id), "count": count}
+                for template_id, count in merged.most_common(limit)
+            ]
+
+    def total(self, service_name: Optional[str] = None, level: Optional[str] = None) -> int:
+        with self._lock:
+            return sum(
+                n for (service, lvl), n in self.totals.items()
+                if (not service_name or service_name in service) and (not level or lvl == level)
+            )
+
+    def template(self, template_id: int) -> Optional[str]:
+        found = self._templates.get(template_id)
+        return found.text if found else self._retired.get(template_id)
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    # --------------------------------------------------------------------------
+    # Persistence
+    # --------------------------------------------------------------------------
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "next_id": self._next_id,
+                "totals": [[s, lvl, n] for (s, lvl), n in self.totals.items()],
+                "templates": [{"id": t.id, "tokens": list(t.tokens)} for t in self._templates.values()],
+                "retired": [[i, text] for i, text in self._retired.items()],
+                "heavy": [[s, lvl, sketch.to_list()] for (s, lvl), sketch in self._heavy.items()],
+            }
+
+    def load(self, state: dict):
+        with self._lock:
+            self._load(state)
+
+    def _load(self, state: dict):
+        self._root.clear()
+        self._templates.clear()
+        self._seen.clear()
+        self._next_id = state.get("next_id", 1)
+        self.totals = Counter({(s, lvl): n for s, lvl, n in state.get("totals", [])})
+        self._retired = {i: text for i, text in state.get("retired", [])}
+        self._heavy = {
+            (s, lvl): SpaceSaving.from_list(self.top_k, entries)
+            for s, lvl, entries in state.get("heavy", [])
+        }
+        for entry in state.get("templates", []):
+            tokens = entry["tokens"]
+            leaf = self._leaf(tokens)
+            template = _Template(entry["id"], tokens, leaf)
+            leaf.append(template)
+            self._templates[template.id] = template
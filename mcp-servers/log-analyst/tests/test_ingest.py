@@ -0,0 +1,56 @@
+import importlib
+import json
+import sys
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path[:0] = [str(HERE.parent), str(HERE.parent.parent / "shared")]
+
+
+def _line(i: int) -> str:
+    level = "ERROR" if i % 2 else "INFO"
+    return json.dumps({"timestamp": f"2026-10-17T08:{i // 60 % 60:02d}:{i % 60:02d}Z", "level": level,
+                       "service": "payment-service", "message": f"Request {i} finished in {i}ms"}) + "\n"
+
+
+def _write(path: Path, lines: int):
+    path.write_text("".join(_line(i) for i in range(lines)))
+
+
+def test_truncation_drops_template_counts(tmp_path):
+    from ingest import LogIngestor
+    from templates import TemplateMiner
+
+    log = tmp_path / "payment-service.log"
+    _write(log, 5011)
+    miner = TemplateMiner()
+    ingestor = LogIngestor(tmp_path, miner=miner)
+    assert len(ingestor.frame("payment")) == 5011
+    assert miner.total("payment") == 5011
+
+    _write(log, 10)
+    assert len(ingestor.frame("payment")) == 10
+    assert miner.total("payment") == 10
+    assert miner.total("payment", level="ERROR") == 5
+
+    log.unlink()
+    assert ingestor.frame("payment").empty
+    assert miner.total("payment") == 0
+
+
+def test_get_error_stats_matches_rows_after_truncation(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOG_DIR", str(tmp_path))
+    monkeypatch.setenv("LOG_STORE", "off")
+    monkeypatch.setenv("PG_LOG_PATH", "off")
+    sys.modules.pop("server", None)
+    server = importlib.import_module("server")
+    # The undecorated tool body (offload turns the tool into a coroutine)
+    get_error_stats = server.get_error_stats.__wrapped__
+
+    log = tmp_path / "payment-service.log"
+    _write(log, 5011)
+    assert json.loads(get_error_stats("payment"))["total_errors"] == 2505
+
+    _write(log, 10)
+    errors = server._load_df("payment", levels=["ERROR"])
+    assert json.loads(get_error_stats("payment"))["total_errors"] == len(errors) == 5
@@ -0,0 +1,179 @@
+import heapq
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+# ==============================================================================
+# TRACE INDEX
+# Maps trace_id -> (file, byte offset) for every line that carries one, plus a
+# small per-trace summary (time span, errors, worst latency). Lookups then seek
+# straight to the matching lines instead of scanning every log file.
+# Only the most recently seen ``max_traces`` traces are kept.
+# ==============================================================================
+
+# Values services write when a record has no real trace
+NO_TRACE = {"", "null", "None"}
+NAT = -(2 ** 63)
+
+
+def ts_ns(value) -> int:
+    """ISO timestamp string -> epoch nanoseconds (NAT when unparseable)."""
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return NAT
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1_000_000) * 1000
+
+
+class _Trace:
+    __slots__ = ("locations", "first", "last", "lines", "errors", "max_latency", "services")
+
+    def __init__(self):
+        # (file id, byte offset) of every line in the trace
+        self.locations: List[Tuple[int, int]] = []
+        self.first = NAT
+        self.last = NAT
+        self.lines = 0
+        self.errors = 0
+        self.max_latency: Optional[float] = None
+        self.services: set = set()
+
+    def summary(self, trace_id: str) -> dict:
+        span = (self.last - self.first) / 1e9 if self.first != NAT else None
+        return {
+            "trace_id": trace_id,
+            "start": _iso(self.first),
+            "end": _iso(self.last),
+            "duration_s": span,
+            "max_latency_s": self.max_latency,
+            "lines": self.lines,
+            "errors": self.errors,
+            "services": sorted(self.services),
+        }
+
+    @property
+    def cost(self) -> float:
+        """How slow the trace looks: the larger of its span and logged latency."""
+        span = (self.last - self.first) / 1e9 if self.first != NAT else 0.0
+        return max(span, self.max_latency or 0.0)
+
+
+def _iso(ns: int) -> Optional[str]:
+    if ns == NAT:
+        return None
+    return datetime.fromtimestamp(ns / 1e9, tz=timezone.utc).isoformat()
+
+
+class TraceIndex:
+    """Bounded in-memory index of trace_id -> log line locations."""
+
+    def __init__(self, max_traces: int = 200_000):
+        self.max_traces = max_traces
+        self._files: List[str] = []
+        self._file_ids: Dict[str, int] = {}
+        self._traces: "OrderedDict[str, _Trace]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _file_id(self, path: str) -> int:
+        file_id = self._file_ids.get(path)
+        if file_id is None:
+            file_id = self._file_ids[path] = len(self._files)
+            self._files.append(path)
+        return file_id
+
+    def add(self, path: str, trace_id, offset: int, ts: int, service: str,
+            level: Optional[str] = None, latency=None, failed: bool = False):
+        """Record one log line. ``ts`` is epoch nanoseconds."""
+        if trace_id is None or trace_id in NO_TRACE:
+            return
+        trace_id = str(trace_id)
+        with self._lock:
+            trace = self._traces.get(trace_id)
+            if trace is None:
+                trace = self._traces[trace_id] = _Trace()
+                if len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            else:
+                self._traces.move_to_end(trace_id)
+
+            trace.locations.append((self._file_id(path), offset))
+            trace.lines += 1
+            if ts != NAT:
+                trace.first = ts if trace.first == NAT else min(trace.first, ts)
+                trace.last = max(trace.last, ts)
+            if level == "ERROR" or failed:
+                trace.errors += 1
+            if isinstance(latency, (int, float)) and latency == latency:
+                trace.max_latency = latency if trace.max_latency is None else max(trace.max_latency, latency)
+            if service:
+                trace.services.add(service)
+
+    def add_records(self, path: str, trace_ids, offsets, timestamps, services, levels, latencies, failed):
+        """Bulk :meth:`add` over parallel column sequences of one chunk."""
+        for trace_id, offset, ts, service, level, latency, fail in zip(
+                trace_ids, offsets, timestamps, services, levels, latencies, failed):
+            self.add(path, trace_id, offset, ts, service, level, latency, failed=fail)
+
+    def forget_file(self, path: str):
+        """Drop locations in a file that was rotated or truncated (offsets are stale)."""
+        with self._lock:
+            file_id = self._file_ids.get(path)
+            if file_id is None:
+                return
+            for trace_id in list(self._traces):
+                trace = self._traces[trace_id]
+                trace.locations = [loc for loc in trace.locations if loc[0] != file_id]
+                if not trace.locations:
+                    del self._traces[trace_id]
+
+    # --------------------------------------------------------------------------
+    # Queries
+    # --------------------------------------------------------------------------
+    def lookup(self, trace_id: str) -> Optional[List[dict]]:
+        """Every indexed line of a trace, read by seeking to its offsets."""
+        with self._lock:
+            trace = self._traces.get(trace_id)
+            if trace is None:
+                return None
+            by_file: Dict[str, List[int]] = {}
+            for file_id, offset in trace.locations:
+                by_file.setdefault(self._files[file_id], []).append(offset)
+
+        records = []
+        for path, offsets in by_file.items():
+            try:
+                with open(path, 'rb') as f:
+                    for offset in sorted(offsets):
+                        f.seek(offset)
+                        try:
+                            record = json.loads(f.readline())
+                        except ValueError:
+                            continue
+                        if isinstance(record, dict) and str(record.get("trace_id")) == trace_id:
+                            records.append(record)
+            except OSError:
+                continue
+        records.sort(key=lambda r: str(r.get("timestamp", "")))
+        return records
+
+    def slowest(self, start: int, end: int, service_name: Optional[str] = None,
+                failed_only: bool = False, limit: int = 10) -> List[dict]:
+        """Traces that overlap [start, end] (epoch ns), slowest first."""
+        with self._lock:
+            matches = (
+                (trace_id, trace)
+                for trace_id, trace in self._traces.items()
+                if trace.last >= start and trace.first <= end
+                and (not failed_only or trace.errors)
+                and (not service_name or any(service_name in s for s in trace.services))
+            )
+            # Summaries only for the winners, not for every trace in the window
+            slowest = heapq.nlargest(limit, matches, key=lambda m: m[1].cost)
+            return [trace.summary(trace_id) for trace_id, trace in slowest]
+
+    def __len__(self) -> int:
+        return len(self._traces)
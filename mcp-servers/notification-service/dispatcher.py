@@ -0,0 +1,231 @@
+import queue
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from lazy import lazy_import
+
+# Loaded on the first alert rather than at server start
+requests = lazy_import("requests")
+
+# ==============================================================================
+# ALERT DISPATCHER
+# send_alert only puts the message on a bounded queue; one background thread
+# delivers it over a keep-alive session. The thread waits on a token bucket
+# before each request (Slack allows about one message per second per
+# webhook). Whatever piles up while it waits, or while it backs off after a
+# failure, goes out as a single digest message, so an alert storm becomes a
+# few posts instead of hitting 429s and losing messages.
+# ==============================================================================
+
+# Slack truncates long messages; digests stay below this many characters
+MAX_TEXT = 3500
+SEVERITY_ORDER = {"CRITICAL": 0, "ERROR": 1, "WARNING": 2, "INFO": 3}
+
+
+class TokenBucket:
+    """``rate`` tokens per second, holding at most ``burst``."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.wait_time()
+        self.tokens -= 1
+
+
+class _Alert:
+    __slots__ = ("text", "severity", "queued_at")
+
+    def __init__(self, text: str, severity: str):
+        self.text = text
+        self.severity = severity
+        self.queued_at = time.time()
+
+
+def render(alerts: List[_Alert]) -> str:
+    """One alert as-is, or several as a digest, identical messages counted once."""
+    if len(alerts) == 1:
+        return alerts[0].text
+    counts = Counter(a.text for a in alerts)
+    severities = Counter(a.severity for a in alerts)
+    ordered = sorted(counts, key=lambda text: min(SEVERITY_ORDER.get(a.severity, 9)
+                                                for a in alerts if a.text == text))
+    summary = ", ".join(f"{n} {s}" for s, n in sorted(severities.items(),
+                                                       key=lambda kv: SEVERITY_ORDER.get(kv[0], 9)))
+    lines = [f"📦 **Digest: {len(alerts)} alerts** ({summary})"]
+    used = len(lines[0])
+    for i, text in enumerate(ordered):
+        line = f"• {text}" + (f" (x{counts[text]})" if counts[text] > 1 else "")
+        if used + len(line) + 1 > MAX_TEXT:
+            lines.append(f"…and {len(ordered) - i} more distinct alerts")
+            break
+        lines.append(line)
+        used += len(line) + 1
+    return "\n".join(lines)
+
+
+class Dispatcher:
+    def __init__(self, url: str, queue_size: int = 1000, rate: float = 1.0, burst: int = 3,
+                 timeout: Tuple[float, float] = (3.05, 10.0), max_retries: int = 5,
+                 backoff: float = 1.0, max_backoff: float = 60.0, digest_max: int = 50,
+                 session: Optional["requests.Session"] = None):
+        self.url = url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # Most alerts one digest carries; the rest go in the next one
+        self.digest_max = digest_max
+        self.bucket = TokenBucket(rate, burst)
+        self.queue: "queue.Queue[_Alert]" = queue.Queue(maxsize=queue_size)
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1))
+            session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self.session = session
+        self.stats = Counter()
+        self.last_error: Optional[str] = None
+        self.last_delivery: Optional[float] = None
+        self._idle = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+            self._thread.start()
+
+    def submit(self, text: str, severity: str = "INFO") -> bool:
+        """Queue an alert without blocking. False if the queue is full and it was dropped."""
+        self.start()
+        try:
+            self.queue.put_nowait(_Alert(text, severity))
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+        self.stats["queued"] += 1
+        return True
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until everything queued so far was delivered or given up on."""
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self.queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 5.0):
+        self.flush(timeout)
+        self._stop.set()
+        self.session.close()
+
+    # --------------------------------------------------------------------------
+    # Delivery
+    # --------------------------------------------------------------------------
+    def _drain(self, batch: List[_Alert]):
+        while len(batch) < self.digest_max:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                return
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                batch = [self.queue.get(timeout=1.0)]
+            except queue.Empty:
+                continue
+            self._drain(batch)
+            # Messages arriving while we wait for the rate limit join this batch
+            wait = self.bucket.wait_time()
+            while wait > 0:
+                time.sleep(wait)
+                self._drain(batch)
+                wait = self.bucket.wait_time()
+            self.bucket.take()
+            try:
+                self._deliver(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+                with self._idle:
+                    self._idle.notify_all()
+
+    def _deliver(self, batch: List[_Alert]):
+        for attempt in range(self.max_retries + 1):
+            payload = {"text": render(batch)}
+            delay, error = self._post(payload)
+            if error is None:
+                self.stats["requests"] += 1
+                self.stats["delivered"] += len(batch)
+                if len(batch) > 1:
+                    self.stats["digests"] += 1
+                self.last_delivery = time.time()
+                return
+            self.last_error = error
+            if delay is None or attempt == self.max_retries:
+                break
+            self.stats["retries"] += 1
+            time.sleep(delay if delay > 0 else self._backoff(attempt))
+            # Alerts that came in during the backoff ride along with the retry
+            self._drain(batch)
+        self.stats["failed"] += len(batch)
+        print(f"DEBUG: Gave up on {len(batch)} alert(s): {self.last_error}", file=sys.stderr)
+
+    def _backoff(self, attempt: int) -> float:
+        # Exponential with full jitter
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _post(self, payload: dict) -> Tuple[Optional[float], Optional[str]]:
+        """POST once. Returns (retry delay, error): delay 0 = use backoff, None = don't retry."""
+        try:
+            response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            return 0.0, f"Connection Error: {e}"
+        if response.status_code == 200:
+            return None, None
+        error = f"Slack Error {response.status_code}: {response.text[:200]}"
+        if response.status_code == 429:
+            retry_after = response.headers.get("Retry-After", "")
+            # Slack says when to come back; hold off the bucket until then too
+            delay = min(self.max_backoff, float(retry_after)) if retry_after.isdigit() else 0.0
+            self.bucket.tokens = min(self.bucket.tokens, 0.0)
+            return delay, error
+        if response.status_code >= 500:
+            return 0.0, error
+        # 4xx (bad payload, revoked webhook...) won't succeed on retry
+        return None, error
+
+    def status(self) -> dict:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "queued": self.stats["queued"],
+            "delivered": self.stats["delivered"],
+            "requests": self.stats["requests"],
+            "digests": self.stats["digests"],
+            "retries": self.stats["retries"],
+            "failed": self.stats["failed"],
+            "dropped": self.stats["dropped"],
+            "last_delivery": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.last_delivery))
+            if self.last_delivery else None,
+            "last_error": self.last_error,
+            "rate_per_sec": self.bucket.rate,
+        }
@@ -1,7 +1,16 @@
 from mcp.server.fastmcp import FastMCP
-import requests
+import atexit
+import json
 import os
 import sys
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "shared"))
+from dispatcher import Dispatcher
+from instrumentation import instrument, snapshot
+from daemon import serve
 
 # Initialize
 mcp = FastMCP("Notification Service")
@@ -23,10 +32,40 @@ except Exception:
 # We don't need load_dotenv() anymore because Claude injects this variable for us!
 WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
 
+# ==============================================================================
+# 3. DELIVERY SETTINGS
+# ==============================================================================
+# Alerts are queued and sent in the background: at most NOTIFY_RATE messages
+# per second (bursts of NOTIFY_BURST), anything beyond that is merged into
+# digest messages. Slack allows about 1 message/second per webhook.
+NOTIFY_QUEUE_SIZE = int(os.getenv("NOTIFY_QUEUE_SIZE", 1000))
+NOTIFY_RATE = float(os.getenv("NOTIFY_RATE", 1.0))
+NOTIFY_BURST = int(os.getenv("NOTIFY_BURST", 3))
+NOTIFY_TIMEOUT = float(os.getenv("NOTIFY_TIMEOUT", 10))
+NOTIFY_MAX_RETRIES = int(os.getenv("NOTIFY_MAX_RETRIES", 5))
+
+# A stub webhook on this machine (see stub_webhook.py) is accepted for testing
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+_dispatcher: Optional[Dispatcher] = None
+
+def get_dispatcher() -> Dispatcher:
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = Dispatcher(WEBHOOK_URL, queue_size=NOTIFY_QUEUE_SIZE, rate=NOTIFY_RATE,
+                                 burst=NOTIFY_BURST, timeout=(3.05, NOTIFY_TIMEOUT),
+                                 max_retries=NOTIFY_MAX_RETRIES)
+        # Give queued alerts a moment to go out when the server stops
+        atexit.register(_dispatcher.close, 5.0)
+    return _dispatcher
+
 @mcp.tool()
-def send_alert(message: str, severity: str = "INFO") -> str:
+@instrument
+async def send_alert(message: str, severity: str = "INFO") -> str:
     """
     Sends a notification to the DevOps team chat (Slack).
+    Returns as soon as the message is queued; delivery is rate limited and retried in the
+    background, and bursts are merged into digest messages. See get_notification_status.
     """
     # Format message with emojis
     try:
@@ -39,20 +78,31 @@ def send_alert(message: str, severity: str = "INFO") -> str:
     if not WEBHOOK_URL:
         return "⚠️ CONFIG ERROR: SLACK_WEBHOOK_URL is missing from claude_desktop_config.json."
 
-    if "hooks.slack.com" not in WEBHOOK_URL:
+    host = urlparse(WEBHOOK_URL).hostname or ""
+    if host != "hooks.slack.com" and host not in LOCAL_HOSTS:
          return "⚠️ CONFIG ERROR: The URL in your config does not look like a Slack webhook."
 
-    # SEND REAL ALERT
-    payload = {"text": formatted_msg}
-    
-    try:
-        response = requests.post(WEBHOOK_URL, json=payload)
-        if response.status_code == 200:
-            return "✅ SUCCESS: Message sent to Slack!"
-        else:
-            return f"❌ Slack Error {response.status_code}: {response.text}"
-    except Exception as e:
-        return f"❌ Connection Error: {str(e)}"
+    # QUEUE REAL ALERT
+    dispatcher = get_dispatcher()
+    if not dispatcher.submit(formatted_msg, severity):
+        return f"❌ Alert queue is full ({NOTIFY_QUEUE_SIZE} pending); message dropped. Slack may be unreachable: {dispatcher.last_error}"
+    return f"✅ QUEUED: Message will be sent to Slack ({dispatcher.queue.qsize()} pending)."
+
+@mcp.tool()
+@instrument
+async def get_notification_status() -> str:
+    """Delivery status of queued alerts: pending, delivered, digests, retries, failures and the last Slack error."""
+    if _dispatcher is None:
+        return "No alerts have been sent since the server started."
+    return json.dumps(_dispatcher.status(), indent=2)
+
+@mcp.tool()
+async def get_server_metrics(tool_name: Optional[str] = None) -> str:
+    """
+    Call counts and latency of the notification tools. Slack delivery happens in the background;
+    see get_notification_status for that.
+    """
+    return json.dumps(snapshot(tool_name), indent=2)
 
 if __name__ == "__main__":
-    mcp.run()
\ No newline at end of file
+    serve(mcp, __file__)
\ No newline at end of file
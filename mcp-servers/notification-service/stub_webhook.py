@@ -0,0 +1,81 @@
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ==============================================================================
+# STUB SLACK WEBHOOK
+# Stands in for hooks.slack.com so the notification service can be tried
+# locally: prints every message it receives, and can be slow, flaky or rate
+# limited like the real thing.
+#
+#   python stub_webhook.py --port 9999 --rate-limit 1 --fail-rate 0.2
+#   SLACK_WEBHOOK_URL=http://localhost:9999/services/T000/B000/XXX python server.py
+# ==============================================================================
+
+
+def make_handler(args):
+    state = {"messages": 0, "connections": set(), "last": 0.0}
+
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-alive, like Slack, so connection reuse is visible
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, status: int, body: str, headers: dict = None):
+            data = body.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            state["connections"].add(self.client_address)
+            if args.delay:
+                time.sleep(args.delay)
+
+            now = time.monotonic()
+            if args.rate_limit and now - state["last"] < 1.0 / args.rate_limit:
+                print(f"⏳ 429 (faster than {args.rate_limit}/s)")
+                return self._reply(429, "rate_limited", {"Retry-After": "1"})
+            if random.random() < args.fail_rate:
+                print("💥 500 (simulated failure)")
+                return self._reply(500, "internal_error")
+            try:
+                text = json.loads(body)["text"]
+            except (ValueError, KeyError):
+                return self._reply(400, "invalid_payload")
+
+            state["last"] = now
+            state["messages"] += 1
+            print(f"📨 #{state['messages']} (connections seen: {len(state['connections'])})\n{text}\n")
+            self._reply(200, "ok")
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for a Slack incoming webhook")
+    parser.add_argument("--port", type=int, default=9999)
+    parser.add_argument("--rate-limit", type=float, default=1.0, help="messages/second before 429s (0 = off)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before answering")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args))
+    print(f"🪝 Stub webhook on http://localhost:{args.port}/services/T000/B000/XXX")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
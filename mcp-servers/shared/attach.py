@@ -0,0 +1,147 @@
+import argparse
+import hashlib
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+# ==============================================================================
+# WARM DAEMON ATTACH
+# An MCP host starts a stdio server for every session and kills it when the
+# session ends, so each reconnect pays the full start-up again (imports,
+# connection pools, log ingestion). Point the host at this launcher instead:
+#
+#   python mcp-servers/shared/attach.py mcp-servers/log-analyst/server.py
+#
+# It connects to a daemon of that server (``server.py --daemon``, started on
+# first use) over a unix socket and relays the host's stdin/stdout to it. The
+# daemon keeps running between sessions and exits after MCP_DAEMON_IDLE
+# seconds without one. The daemon keeps the environment it was started with:
+# stop it (--stop) after changing the configuration. This file uses the
+# standard library only, so the launcher itself starts in milliseconds.
+#
+#   python mcp-servers/shared/attach.py <server.py> --status
+#   python mcp-servers/shared/attach.py <server.py> --stop
+# ==============================================================================
+
+# One directory per user (mode 0700): whoever can open a socket can call its tools
+_USER = os.getuid() if hasattr(os, "getuid") else os.getenv("USERNAME", "user")
+DAEMON_DIR = Path(os.getenv("MCP_DAEMON_DIR", Path(tempfile.gettempdir()) / f"mcp-daemons-{_USER}"))
+# Seconds to wait for a freshly started daemon to accept connections
+START_TIMEOUT = float(os.getenv("MCP_DAEMON_START_TIMEOUT", 30))
+
+
+def socket_path(script) -> Path:
+    """Socket of the daemon for ``script``: named after its server folder, unique per path."""
+    script = Path(script).resolve()
+    folder = script.parent.parent if script.parent.name == "src" else script.parent
+    digest = hashlib.sha1(str(script).encode()).hexdigest()[:10]
+    return DAEMON_DIR / f"{folder.name}-{digest}.sock"
+
+
+def _connect(path: Path) -> Optional[socket.socket]:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        return None
+    return sock
+
+
+def _start(script: Path, path: Path) -> socket.socket:
+    DAEMON_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    log_path = path.with_suffix(".log")
+    with open(log_path, "ab") as log:
+        proc = subprocess.Popen([sys.executable, str(script), "--daemon"], cwd=str(script.parent),
+                                stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                                start_new_session=True)
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        sock = _connect(path)
+        if sock is not None:
+            return sock
+        # Exit code 0: another launcher won the race and its daemon is starting
+        if proc.poll():
+            break
+        time.sleep(0.05)
+    sys.exit(f"❌ Could not start {script.name} as a daemon, see {log_path}")
+
+
+def _pump(sock: socket.socket):
+    """Relay stdin to the daemon and its replies to stdout until either side closes."""
+
+    def upstream():
+        try:
+            while True:
+                data = os.read(sys.stdin.fileno(), 65536)
+                if not data:
+                    break
+                sock.sendall(data)
+        except OSError:
+            pass
+        finally:
+            try:
+                sock.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+    threading.Thread(target=upstream, daemon=True).start()
+    out = sys.stdout.buffer
+    while True:
+        try:
+            data = sock.recv(65536)
+        except OSError:
+            break
+        if not data:
+            break
+        out.write(data)
+        out.flush()
+
+
+def _pid(path: Path) -> Optional[int]:
+    try:
+        return int(path.with_suffix(".pid").read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Attach stdio to a warm daemon of an MCP server.")
+    parser.add_argument("script", help="The server's server.py")
+    parser.add_argument("--status", action="store_true", help="Show whether the daemon is running")
+    parser.add_argument("--stop", action="store_true", help="Stop the daemon")
+    args = parser.parse_args()
+
+    script = Path(args.script).resolve()
+    if not hasattr(socket, "AF_UNIX"):
+        # No unix sockets (Windows): run the server directly
+        sys.exit(subprocess.call([sys.executable, str(script)], cwd=str(script.parent)))
+    path = socket_path(script)
+
+    if args.status or args.stop:
+        sock = _connect(path)
+        pid = _pid(path)
+        if sock is None:
+            print(f"⚪ No daemon for {script} ({path})")
+            return
+        sock.close()
+        if args.stop and pid is not None:
+            os.kill(pid, signal.SIGTERM)
+            print(f"🛑 Stopped daemon {pid} ({path})")
+        else:
+            print(f"🟢 Daemon {pid} serving {script}\n   socket: {path}\n   log: {path.with_suffix('.log')}")
+        return
+
+    sock = _connect(path) or _start(script, path)
+    _pump(sock)
+
+
+if __name__ == "__main__":
+    main()
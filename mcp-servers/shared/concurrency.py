@@ -0,0 +1,43 @@
+import functools
+import os
+from typing import Callable
+
+import anyio
+import anyio.to_thread
+
+# ==============================================================================
+# NON-BLOCKING TOOLS
+# FastMCP calls a plain ``def`` tool directly on its event loop, so one slow
+# tool (a database query, an HTTP request, parsing a large log append) stalls
+# every other request to that server. ``offload`` turns such a tool into an
+# ``async def`` that runs the body on a worker thread. Concurrent calls then
+# overlap, up to MCP_TOOL_THREADS at a time per server. The original
+# signature and docstring are kept, so the tool schema does not change.
+#
+#   @mcp.tool()
+#   @offload
+#   def check_performance() -> str: ...
+# ==============================================================================
+
+TOOL_THREADS = int(os.getenv("MCP_TOOL_THREADS", 16))
+
+_limiter = None
+
+
+def _get_limiter() -> anyio.CapacityLimiter:
+    # Created lazily: a limiter belongs to the event loop that first uses it
+    global _limiter
+    if _limiter is None:
+        _limiter = anyio.CapacityLimiter(TOOL_THREADS)
+    return _limiter
+
+
+def offload(fn: Callable) -> Callable:
+    """Wrap a blocking tool function so it runs in a worker thread."""
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await anyio.to_thread.run_sync(functools.partial(fn, *args, **kwargs),
+                                              limiter=_get_limiter())
+
+    return wrapper
@@ -0,0 +1,138 @@
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+
+import anyio
+from anyio.abc import SocketStream
+from anyio.streams.buffered import BufferedByteReceiveStream
+from mcp.server.fastmcp import FastMCP
+from mcp.server.stdio import stdio_server
+
+from attach import DAEMON_DIR, socket_path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no unix sockets either, daemon mode is off
+    fcntl = None
+
+# ==============================================================================
+# WARM DAEMON
+# ``serve`` replaces ``mcp.run()`` at the bottom of each server. Started
+# normally, the server speaks MCP over stdio as before. Started with
+# ``--daemon`` (which attach.py does), it stays up and serves one MCP session
+# per connection on a unix socket, so a reconnecting host finds its imports,
+# pools and ingested logs already loaded. Sessions share the server's state
+# exactly as concurrent tool calls in one stdio session do.
+#
+#   if __name__ == "__main__":
+#       serve(mcp, __file__)
+# ==============================================================================
+
+# Seconds without any session before the daemon exits (0 = never)
+IDLE_SECONDS = float(os.getenv("MCP_DAEMON_IDLE", 1800))
+# Longest JSON-RPC message accepted from a client
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+
+class _LineReader:
+    """The client's messages as text lines, the way stdio_server reads stdin."""
+
+    def __init__(self, stream: SocketStream):
+        self._stream = BufferedByteReceiveStream(stream)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        try:
+            line = await self._stream.receive_until(b"\n", MAX_MESSAGE_BYTES)
+        except (anyio.IncompleteRead, anyio.EndOfStream, anyio.BrokenResourceError):
+            raise StopAsyncIteration
+        return line.decode("utf-8", errors="replace")
+
+
+class _Writer:
+    """The write/flush half of a text file, the way stdio_server writes stdout."""
+
+    def __init__(self, stream: SocketStream):
+        self._stream = stream
+
+    async def write(self, text: str):
+        await self._stream.send(text.encode("utf-8"))
+
+    async def flush(self):
+        pass
+
+
+class _Daemon:
+    def __init__(self, mcp: FastMCP):
+        self.server = mcp._mcp_server
+        self.sessions = 0
+        self.last_active = time.monotonic()
+
+    async def handle(self, stream: SocketStream):
+        self.sessions += 1
+        try:
+            async with stream, stdio_server(_LineReader(stream), _Writer(stream)) as (read, write):
+                await self.server.run(read, write, self.server.create_initialization_options())
+        except Exception as e:
+            # A client that goes away mid-session must not take the daemon down
+            print(f"DEBUG: Session ended: {e!r}", file=sys.stderr)
+        finally:
+            self.sessions -= 1
+            self.last_active = time.monotonic()
+
+    async def exit_when_idle(self, scope: anyio.CancelScope):
+        while True:
+            await anyio.sleep(min(IDLE_SECONDS, 30))
+            if not self.sessions and time.monotonic() - self.last_active >= IDLE_SECONDS:
+                print(f"DEBUG: No session for {IDLE_SECONDS:.0f}s, exiting", file=sys.stderr)
+                scope.cancel()
+                return
+
+    async def exit_on_signal(self, scope: anyio.CancelScope):
+        with anyio.open_signal_receiver(signal.SIGTERM, signal.SIGINT) as signals:
+            async for signum in signals:
+                print(f"DEBUG: Received {signal.Signals(signum).name}, exiting", file=sys.stderr)
+                scope.cancel()
+                return
+
+
+async def _serve_socket(mcp: FastMCP, path: Path):
+    daemon = _Daemon(mcp)
+    listener = await anyio.create_unix_listener(path, mode=0o600)
+    async with listener, anyio.create_task_group() as tg:
+        if IDLE_SECONDS > 0:
+            tg.start_soon(daemon.exit_when_idle, tg.cancel_scope)
+        tg.start_soon(daemon.exit_on_signal, tg.cancel_scope)
+        tg.start_soon(listener.serve, daemon.handle)
+
+
+def serve(mcp: FastMCP, script: str):
+    """Run ``mcp`` over stdio, or as a socket daemon when started with --daemon."""
+    if "--daemon" not in sys.argv[1:] or fcntl is None:
+        mcp.run()
+        return
+
+    path = socket_path(script)
+    DAEMON_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    # Held for the daemon's lifetime: two launchers racing start only one daemon
+    lock = open(path.with_suffix(".lock"), "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        print(f"DEBUG: A daemon already serves {path}", file=sys.stderr)
+        return
+
+    pid_path = path.with_suffix(".pid")
+    path.unlink(missing_ok=True)  # left behind by a daemon that was killed
+    pid_path.write_text(str(os.getpid()))
+    print(f"DEBUG: Daemon {os.getpid()} listening on {path}", file=sys.stderr)
+    try:
+        anyio.run(_serve_socket, mcp, path)
+    finally:
+        path.unlink(missing_ok=True)
+        pid_path.unlink(missing_ok=True)
+        lock.close()
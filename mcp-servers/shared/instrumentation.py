@@ -0,0 +1,330 @@
+import bisect
+import contextvars
+import functools
+import inspect
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not reported
+    resource = None
+
+# ==============================================================================
+# TOOL INSTRUMENTATION
+# ``instrument`` times every call of a tool and keeps a rolling window of
+# recent latencies per tool. ``span`` marks phases inside a call (reading
+# files, decoding JSON, building or sorting a DataFrame). Spans nest, and the
+# time of each is summed per tool under its path, e.g. "refresh/parse".
+# ``snapshot`` feeds each server's get_server_metrics tool.
+#
+#   @mcp.tool()
+#   @offload
+#   @instrument
+#   def get_error_stats(service_name: str) -> str:
+#       with span("refresh"):
+#           ...
+#
+# With MCP_PROFILE=on, a sampling profiler records the stack of every running
+# call. A call slower than MCP_PROFILE_SLOW_MS is written to MCP_PROFILE_DIR
+# as collapsed stacks ("frame;frame;frame count" per line), the input format
+# of flamegraph.pl, speedscope and inferno.
+# ==============================================================================
+
+# Rolling window per tool: at most this many calls, none older than WINDOW_SECONDS
+WINDOW_CALLS = int(os.getenv("MCP_METRICS_CALLS", 2048))
+WINDOW_SECONDS = float(os.getenv("MCP_METRICS_WINDOW", 900))
+# Upper bounds (ms) of the latency histogram buckets
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10_000, 30_000)
+
+PROFILE = os.getenv("MCP_PROFILE", "off").lower() == "on"
+PROFILE_SLOW_MS = float(os.getenv("MCP_PROFILE_SLOW_MS", 1000))
+PROFILE_INTERVAL = float(os.getenv("MCP_PROFILE_INTERVAL_MS", 5)) / 1000
+# shared -> mcp-servers -> project root
+PROFILE_DIR = Path(os.getenv("MCP_PROFILE_DIR", Path(__file__).resolve().parent.parent.parent / "profiles"))
+
+STARTED = time.time()
+
+
+class _Call:
+    """One running tool call: its phase timings and, when profiling, its stack samples."""
+    __slots__ = ("tool", "phases", "path", "thread", "samples")
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.phases: Dict[str, List[float]] = {}  # path -> [count, total ms]
+        self.path: List[str] = []
+        self.thread = threading.get_ident()
+        self.samples: Optional[Counter] = Counter() if PROFILE else None
+
+
+_current: contextvars.ContextVar[Optional[_Call]] = contextvars.ContextVar("mcp_tool_call", default=None)
+
+
+class span:
+    """Time a phase of the current tool call. Does nothing outside a tool call."""
+    __slots__ = ("name", "_call", "_began")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self._call = _current.get()
+        if self._call is not None:
+            self._call.path.append(self.name)
+            self._began = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        call = self._call
+        if call is not None:
+            ms = (time.perf_counter() - self._began) * 1000
+            key = "/".join(call.path)
+            call.path.pop()
+            entry = call.phases.get(key)
+            if entry is None:
+                call.phases[key] = [1, ms]
+            else:
+                entry[0] += 1
+                entry[1] += ms
+        return False
+
+
+# ==============================================================================
+# PER-TOOL STATISTICS
+# ==============================================================================
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class _ToolStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.in_flight = 0
+        # (finished at, ms, ok, phases) of recent calls
+        self.recent: deque = deque(maxlen=WINDOW_CALLS)
+        # phase path -> [calls, total ms, max ms], since start
+        self.phases: Dict[str, List[float]] = {}
+
+    def record(self, ms: float, ok: bool, phases: Dict[str, List[float]]):
+        self.calls += 1
+        self.errors += not ok
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.recent.append((time.time(), ms, ok, phases))
+        for key, (count, total) in phases.items():
+            entry = self.phases.setdefault(key, [0, 0.0, 0.0])
+            entry[0] += count
+            entry[1] += total
+            entry[2] = max(entry[2], total)
+
+    def snapshot(self) -> dict:
+        cutoff = time.time() - WINDOW_SECONDS
+        window = [r for r in self.recent if r[0] >= cutoff]
+        result = {
+            "calls": self.calls,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "mean_ms": round(self.total_ms / self.calls, 2) if self.calls else None,
+            "max_ms": round(self.max_ms, 2),
+            "window": {"seconds": WINDOW_SECONDS, "calls": len(window)},
+        }
+        if window:
+            ordered = sorted(r[1] for r in window)
+            histogram = Counter(bisect.bisect_left(BUCKETS_MS, ms) for ms in ordered)
+            bounds = [f"<={b:g}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]:g}ms"]
+            slowest = max(window, key=lambda r: r[1])
+            result["window"].update({
+                "errors": sum(1 for r in window if not r[2]),
+                "p50_ms": round(_percentile(ordered, 0.50), 2),
+                "p95_ms": round(_percentile(ordered, 0.95), 2),
+                "p99_ms": round(_percentile(ordered, 0.99), 2),
+                "max_ms": round(ordered[-1], 2),
+                "histogram": {bounds[i]: histogram[i] for i in sorted(histogram)},
+                "slowest_call": {
+                    "at": datetime.fromtimestamp(slowest[0]).isoformat(timespec="seconds"),
+                    "ms": round(slowest[1], 2),
+                    "phases_ms": {k: round(total, 2) for k, (_, total) in slowest[3].items()},
+                },
+            })
+        if self.phases:
+            result["phases"] = {
+                key: {
+                    "spans": int(count),
+                    "mean_ms_per_call": round(total / self.calls, 2),
+                    "max_ms_in_one_call": round(worst, 2),
+                    "share_of_tool_time": round(total / self.total_ms, 3) if self.total_ms else None,
+                }
+                for key, (count, total, worst) in sorted(self.phases.items())
+            }
+        return result
+
+
+_stats: Dict[str, _ToolStats] = {}
+_stats_lock = threading.Lock()
+
+
+def _tool_stats(name: str) -> _ToolStats:
+    with _stats_lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = _ToolStats()
+        return stats
+
+
+# ==============================================================================
+# SAMPLING PROFILER
+# One background thread wakes every PROFILE_INTERVAL and records the stack of
+# each thread that is running an instrumented call, up to the tool function.
+# ==============================================================================
+_active: Dict[int, _Call] = {}
+_active_lock = threading.Lock()
+_sampler: Optional[threading.Thread] = None
+_wrapper_codes = set()
+_profiles: deque = deque(maxlen=20)
+_profile_seq = itertools.count()
+
+
+def _frame_name(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _sample_loop():
+    while True:
+        time.sleep(PROFILE_INTERVAL)
+        with _active_lock:
+            calls = list(_active.values())
+        if not calls:
+            continue
+        frames = sys._current_frames()
+        for call in calls:
+            frame = frames.get(call.thread)
+            stack = []
+            while frame is not None and frame.f_code not in _wrapper_codes:
+                stack.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            if frame is None:
+                # An async tool waiting on I/O: the loop thread is elsewhere
+                stack = ["(awaiting)"]
+            call.samples[";".join([call.tool, *reversed(stack)])] += 1
+
+
+def _start_profiling(call: _Call, key: int):
+    global _sampler
+    with _active_lock:
+        _active[key] = call
+        if _sampler is None:
+            _sampler = threading.Thread(target=_sample_loop, name="mcp-profiler", daemon=True)
+            _sampler.start()
+
+
+def _finish_profiling(call: _Call, key: int, ms: float):
+    with _active_lock:
+        _active.pop(key, None)
+    if ms < PROFILE_SLOW_MS or not call.samples:
+        return
+    try:
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        path = PROFILE_DIR / f"{call.tool}-{datetime.now():%Y%m%d-%H%M%S}-{int(ms)}ms.folded"
+        path.write_text("".join(f"{stack} {count}\n" for stack, count in call.samples.most_common()))
+    except OSError as e:
+        print(f"DEBUG: Could not write profile: {e}", file=sys.stderr)
+        return
+    _profiles.append({"tool": call.tool, "ms": round(ms, 1), "samples": sum(call.samples.values()),
+                      "path": str(path)})
+    print(f"DEBUG: {call.tool} took {ms:.0f}ms, profile written to {path}", file=sys.stderr)
+
+
+# ==============================================================================
+# DECORATOR
+# ==============================================================================
+def is_error(result) -> bool:
+    # Tools report most failures as a "❌ ..." string rather than raising
+    return isinstance(result, str) and result.startswith("❌")
+
+
+def instrument(fn: Callable) -> Callable:
+    """Record latency, phases and (when profiling) stack samples for every call of a tool.
+
+    Place it directly above the function, under ``offload``, so the timing and
+    the profile cover the thread that runs the tool body.
+    """
+    name = fn.__name__
+
+    def begin():
+        call = _Call(name)
+        stats = _tool_stats(name)
+        with _stats_lock:
+            stats.in_flight += 1
+        key = next(_profile_seq)
+        if PROFILE:
+            _start_profiling(call, key)
+        return call, stats, key, _current.set(call), time.perf_counter()
+
+    def end(call, stats, key, token, began, ok):
+        ms = (time.perf_counter() - began) * 1000
+        _current.reset(token)
+        with _stats_lock:
+            stats.in_flight -= 1
+            stats.record(ms, ok, call.phases)
+        if PROFILE:
+            _finish_profiling(call, key, ms)
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            state = begin()
+            ok = False
+            try:
+                result = await fn(*args, **kwargs)
+                ok = not is_error(result)
+                return result
+            finally:
+                end(*state, ok)
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            state = begin()
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = not is_error(result)
+                return result
+            finally:
+                end(*state, ok)
+
+    _wrapper_codes.add(wrapper.__code__)
+    return wrapper
+
+
+def snapshot(tool_name: Optional[str] = None) -> dict:
+    """Process stats plus latency and phase breakdowns per tool (or for one tool)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+    with _stats_lock:
+        tools = {name: stats.snapshot() for name, stats in sorted(_stats.items())
+                 if not tool_name or name == tool_name}
+    return {
+        "pid": os.getpid(),
+        "uptime_seconds": round(time.time() - STARTED, 1),
+        # ru_maxrss is KB on Linux, bytes on macOS
+        "peak_rss_mb": round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1) if peak else None,
+        "threads": threading.active_count(),
+        "profiler": {
+            "enabled": PROFILE,
+            "slow_ms": PROFILE_SLOW_MS,
+            "interval_ms": PROFILE_INTERVAL * 1000,
+            "dir": str(PROFILE_DIR),
+            "recent_profiles": list(_profiles),
+        },
+        "tools": tools,
+    }
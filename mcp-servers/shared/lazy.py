@@ -0,0 +1,65 @@
+import importlib.util
+import sys
+import threading
+from types import ModuleType
+from typing import Dict
+
+# ==============================================================================
+# LAZY IMPORTS
+# An MCP host starts these servers on demand and waits for the handshake
+# before it can list any tool. Importing pandas, psycopg2 or requests at
+# module level puts their import time on every (re)start, even when no tool
+# that needs them is called. ``lazy_import`` returns the module at once but
+# runs it only on first attribute access.
+#
+#   pd = lazy_import("pandas")      # nothing imported yet
+#   pd.DataFrame()                  # pandas is imported here
+#
+# The first access is serialised per module: tools run on worker threads
+# (``offload``), and a thread must never see the module half-run. importlib's
+# own LazyLoader does not guarantee that before Python 3.12.
+#
+# Only top-level packages can be deferred: finding ``a.b`` imports ``a``. Use
+# attributes the package sets itself (``psycopg2.extensions``) or import the
+# submodule inside the function that needs it. Annotations are evaluated when
+# the function is defined, so write them as strings ("pd.DataFrame").
+# ==============================================================================
+
+_locks: Dict[str, threading.RLock] = {}
+# Modules whose code is running right now, under their lock
+_loading = set()
+
+
+class _LazyModule(ModuleType):
+    """A module whose code runs on the first attribute access."""
+
+    def __getattribute__(self, attr):
+        name = ModuleType.__getattribute__(self, "__name__")
+        with _locks[name]:
+            if type(self) is _LazyModule:
+                if name in _loading:
+                    # The module's own import machinery (or a submodule) reaching back in
+                    return ModuleType.__getattribute__(self, attr)
+                _loading.add(name)
+                try:
+                    spec = ModuleType.__getattribute__(self, "__spec__")
+                    spec.loader.exec_module(self)
+                    self.__class__ = ModuleType
+                finally:
+                    _loading.discard(name)
+        return getattr(self, attr)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """``import name``, deferred until the module is first used."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    module = importlib.util.module_from_spec(spec)
+    _locks[name] = threading.RLock()
+    module.__class__ = _LazyModule
+    sys.modules[name] = module
+    return module
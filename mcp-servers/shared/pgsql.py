@@ -0,0 +1,144 @@
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+# ==============================================================================
+# POSTGRES STATEMENT LOG PARSING
+# Shared by the Log Analyst (tails the server log file) and the Database
+# Inspector (reads it through pg_read_binary_file), so both pair slow
+# statements with their text and group them by the same fingerprint.
+#
+# With log_statement=all nearly every line is a statement, so nothing is done
+# per line in Python: only the duration lines (statements slower than
+# log_min_duration_statement) are visited one by one, and each is paired with
+# the statement its session logged before it.
+# ==============================================================================
+
+# Default log_line_prefix '%m [%p] ' plus anything else up to the severity:
+# "2024-01-01 10:00:00.123 UTC [4242] LOG:  statement: SELECT ..."
+# Continuation lines of a multi-line statement start with a tab.
+HEADER = re.compile(
+    rb"(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d(?:\.\d+)?)(?: ([A-Za-z][\w/+-]*|[+-]\d\d(?::?\d\d)?))?"
+    rb" \[(\d+)\][^\n]*? ([A-Z]+):  "
+)
+# From a line's "[pid]": the statement text and its continuation lines
+_STATEMENT = re.compile(rb"\[(\d+)\][^\n]*? LOG:  (?:statement|execute [^:\n]*): ([^\n]*(?:\n\t[^\n]*)*)")
+_DURATION = re.compile(rb"duration: ([\d.]+) ms(?:  (?:statement|execute [^:\n]*): ([^\n]*(?:\n\t[^\n]*)*))?")
+STATEMENT_MARKERS = (b" LOG:  statement: ", b" LOG:  execute ")
+_STATEMENT_BODIES = (b"statement: ", b"execute ")
+
+_LITERALS = [
+    (re.compile(r"/\*.*?\*/|--[^\n]*", re.S), " "),                # comments
+    (re.compile(r"'(?:[^']|'')*'"), "?"),                          # string literals
+    (re.compile(r"\$\d+|\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b"), "?"),  # numbers, bind parameters
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)"), "(?)"),            # IN (?, ?, ?)
+    (re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+"), "(?)"),              # VALUES (?), (?), ...
+    (re.compile(r"\s+"), " "),
+]
+
+
+def fingerprint(query: str) -> str:
+    """SQL with comments and literals stripped, so one statement shape groups together."""
+    text = query or ""
+    for pattern, repl in _LITERALS:
+        text = pattern.sub(repl, text)
+    return text.strip().rstrip(";").strip()[:300]
+
+
+def header_at(data: bytes, pos: int, backwards: bool = False) -> int:
+    """Start of the header line at line start ``pos``, skipping tab-continued lines forwards or backwards."""
+    if backwards:
+        while pos > 0 and data.startswith(b"\t", pos):
+            pos = data.rfind(b"\n", 0, pos - 1) + 1
+        return pos
+    while pos < len(data) and data.startswith(b"\t", pos):
+        pos = data.find(b"\n", pos) + 1 or len(data)
+    return pos
+
+
+def next_header(data: bytes, pos: int) -> int:
+    """Start of the first header line at or after byte ``pos``."""
+    if pos > 0 and data[pos - 1:pos] != b"\n":
+        pos = data.find(b"\n", pos) + 1 or len(data)
+    return header_at(data, pos)
+
+
+def statement_text(raw: bytes) -> str:
+    """Logged statement bytes -> SQL text, with the log's continuation tabs removed."""
+    return raw.decode("utf-8", "replace").replace("\n\t", "\n")
+
+
+class SlowStatement(NamedTuple):
+    stamp: bytes           # header timestamp, "YYYY-MM-DD HH:MM:SS[.fff]"
+    zone: Optional[bytes]  # time zone after it, if any
+    pid: int
+    ms: float
+    text: bytes            # statement as logged (see statement_text)
+
+
+class StatementLogParser:
+    """Slow statements from consecutive whole-line blocks of one statement log.
+
+    Keeps the latest statement per session between blocks, so a duration line
+    is paired with a statement logged in an earlier read, and a statement whose
+    continuation lines start the next block is completed there.
+    """
+
+    def __init__(self, max_sessions: int = 10_000):
+        self.max_sessions = max_sessions
+        self._last_statement: Dict[bytes, bytes] = {}  # pid -> statement text
+        self._open_pid: Optional[bytes] = None  # pid whose statement may continue in the next block
+
+    def reset(self):
+        """The next block does not follow the last one (rotation, truncation, skipped bytes)."""
+        self._open_pid = None
+
+    def feed(self, data: bytes) -> List[SlowStatement]:
+        last = self._last_statement
+        # Tab-continued lines at the top belong to the statement the last block ended on
+        if data.startswith(b"\t") and self._open_pid in last:
+            lead_end = header_at(data, 0)
+            last[self._open_pid] += b"\n" + data[:lead_end].rstrip(b"\n")
+
+        found = []
+        pos = data.find(b" LOG:  duration: ")
+        while pos != -1:
+            line = data.rfind(b"\n", 0, pos) + 1
+            header = HEADER.match(data, line)
+            duration = _DURATION.match(data, pos + 7) if header and header.end() == pos + 7 else None
+            if duration:
+                pid = header.group(3)
+                # log_statement off: the text is on the duration line itself.
+                # Otherwise it was logged by the same session on an earlier line.
+                text = duration.group(2) or self._statement_before(data, line, pid)
+                if text:
+                    found.append(SlowStatement(header.group(1), header.group(2), int(pid),
+                                               float(duration.group(1)), text))
+            pos = data.find(b" LOG:  duration: ", pos + 1)
+
+        # Latest statement per session, for durations that arrive in a later block
+        last.update(_STATEMENT.findall(data))
+        while len(last) > self.max_sessions:
+            del last[next(iter(last))]
+        # A statement on the last line may continue at the top of the next block
+        tail = header_at(data, data.rfind(b"\n", 0, len(data) - 1) + 1, backwards=True)
+        header = HEADER.match(data, tail)
+        is_statement = header and header.group(4) == b"LOG" and data.startswith(_STATEMENT_BODIES, header.end())
+        self._open_pid = header.group(3) if is_statement else None
+        return found
+
+    def _statement_before(self, data: bytes, line: int, pid: bytes) -> Optional[bytes]:
+        """The statement session ``pid`` logged before the duration line at ``line``."""
+        marker = b"[" + pid + b"]"
+        pos = data.rfind(marker, 0, line)
+        while pos != -1:
+            start = data.rfind(b"\n", 0, pos) + 1
+            header = HEADER.match(data, start)
+            if header and header.start(3) == pos + 1:
+                if header.group(4) == b"LOG" and data.startswith(_STATEMENT_BODIES, header.end()):
+                    statement = _STATEMENT.match(data, pos)
+                    return statement.group(2) if statement else None
+                if data.startswith(b"duration: ", header.end()):
+                    # The session's previous duration already used its last statement
+                    return None
+            pos = data.rfind(marker, 0, pos)
+        return self._last_statement.pop(pid, None)
@@ -2,8 +2,13 @@ from fastapi import FastAPI, Response
 import logging
 import random
 import os
-import json
-from datetime import datetime
+import sys
+from pathlib import Path
+
+# structured_logging.py and metrics.py are copied next to main.py in the image; locally it lives in services/common
+sys.path.append(str(Path(__file__).resolve().parent.parent / "common"))
+from structured_logging import setup_logger
+from metrics import instrument
 
 app = FastAPI()
 
@@ -12,24 +17,12 @@ LOG_DIR = "/app/shared-logs"
 os.makedirs(LOG_DIR, exist_ok=True)
 LOG_FILE = os.path.join(LOG_DIR, "auth-service.log")
 
-# Configure logging to write raw messages (we will format the JSON ourselves)
-logging.basicConfig(
-    filename=LOG_FILE,
-    level=logging.INFO,
-    format='{"timestamp": "%(asctime)s", "level": "%(levelname)s", "service": "auth-service", "message": "%(message)s"}'
-)
+logger = setup_logger("auth-service", LOG_FILE)
+instrument(app, "auth-service", logger)
 
 def log_event(level: str, message: str, extra: dict = None):
     """Helper to ensure logs are perfectly formatted JSON for the AI"""
-    payload = {
-        "timestamp": datetime.utcnow().isoformat(),
-        "level": level,
-        "service": "auth-service",
-        "message": message
-    }
-    if extra:
-        payload.update(extra)
-    logging.info(json.dumps(payload))
+    logger.log(logging.getLevelName(level), message, extra=extra)
 
 @app.get("/validate")
 def validate_token(response: Response):
@@ -0,0 +1,134 @@
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Tuple
+
+# ==============================================================================
+# REQUEST METRICS
+# Per-endpoint latency histograms with log-spaced buckets (each bound 25% above
+# the previous one, 1ms .. ~60s), recorded by an HTTP middleware and exposed on
+# GET /metrics in Prometheus text format. Recording a request is a bisect and
+# a few integer increments under an uncontended lock.
+#
+#   from metrics import instrument
+#   instrument(app, "inventory-service")
+# ==============================================================================
+
+MIN_BOUND = 0.001
+GROWTH = 1.25
+MAX_BOUND = 60.0
+
+BOUNDS: List[float] = [
+    round(MIN_BOUND * GROWTH ** i, 6)
+    for i in range(int(math.ceil(math.log(MAX_BOUND / MIN_BOUND) / math.log(GROWTH))) + 1)
+]
+
+
+class LatencyHistogram:
+    """Request count and latency distribution for one (endpoint, status) pair."""
+
+    __slots__ = ("counts", "sum", "count", "_lock")
+
+    def __init__(self):
+        self.counts = [0] * (len(BOUNDS) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        i = bisect_left(BOUNDS, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class RequestMetrics:
+    def __init__(self, service_name: str):
+        self.service_name = service_name
+        self.started = time.time()
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        # Extra gauges/counters rendered with every scrape, e.g. dropped log lines
+        self._collectors: List[Callable[[], Dict[str, float]]] = []
+
+    def observe(self, endpoint: str, status: int, seconds: float):
+        key = (endpoint, str(status))
+        hist = self._histograms.get(key)
+        if hist is None:
+            with self._lock:
+                hist = self._histograms.setdefault(key, LatencyHistogram())
+        hist.observe(seconds)
+
+    def add_collector(self, collect: Callable[[], Dict[str, float]]):
+        """``collect()`` returns {metric_name: value}; rendered as untyped samples."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        """All histograms in Prometheus text exposition format (version 0.0.4)."""
+        service = self.service_name
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by endpoint and status code.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (endpoint, status), hist in sorted(self._histograms.items()):
+            counts, total, count = hist.snapshot()
+            labels = f'service="{service}",endpoint="{endpoint}",status="{status}"'
+            cumulative = 0
+            for bound, n in zip(BOUNDS, counts):
+                cumulative += n
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels}}} {total}')
+            lines.append(f'http_request_duration_seconds_count{{{labels}}} {count}')
+
+        lines.append("# TYPE process_start_time_seconds gauge")
+        lines.append(f'process_start_time_seconds{{service="{service}"}} {self.started}')
+        for collect in self._collectors:
+            for name, value in collect().items():
+                lines.append(f'{name}{{service="{service}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+def instrument(app, service_name: str, logger=None) -> RequestMetrics:
+    """Time every request on a FastAPI ``app`` and serve the results on GET /metrics.
+
+    If ``logger`` came from structured_logging.setup_logger, its written and
+    dropped line counts are exported too.
+    """
+    from fastapi import Request
+    from fastapi.responses import PlainTextResponse
+
+    metrics = RequestMetrics(service_name)
+    if logger is not None:
+        from structured_logging import logging_stats
+        metrics.add_collector(lambda: {
+            f"log_records_{name}_total": value for name, value in logging_stats(logger).items()
+            if name != "queued"
+        })
+
+    @app.middleware("http")
+    async def record_latency(request: Request, call_next):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            # Route templates keep label cardinality bounded; unknown paths share one series
+            endpoint = getattr(route, "path", None) or "unmatched"
+            if endpoint != "/metrics":
+                metrics.observe(endpoint, status, time.perf_counter() - start)
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def prometheus_metrics():
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+    return metrics
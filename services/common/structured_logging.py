@@ -0,0 +1,191 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler
+from typing import Dict, List, Optional
+
+# ==============================================================================
+# SHARED STRUCTURED LOGGING
+# One JSON object per line, encoded once. The request path only drops the
+# LogRecord on a bounded queue; a background thread formats records in
+# batches, writes them with a single buffered write + flush per batch, and
+# rotates the file by size. If the queue is full the record is dropped and
+# counted rather than blocking the request.
+#
+#   logger = setup_logger("auth-service", "/app/shared-logs/auth-service.log")
+#   logger.error("Configuration Error: Issuer Mismatch", extra={"error_code": "invalid_issuer_config"})
+# ==============================================================================
+
+# Attributes every LogRecord has; anything else on a record came from `extra`
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as a single JSON line, including any `extra` fields."""
+
+    def __init__(self, service_name: str, static_fields: Optional[Dict] = None):
+        super().__init__()
+        self.service_name = service_name
+        self.static_fields = static_fields or {}
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_record = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc)
+                                 .isoformat(timespec="microseconds").replace("+00:00", "Z"),
+            "level": record.levelname,
+            "service": self.service_name,
+            **self.static_fields,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED:
+                log_record[key] = value
+        if record.exc_info:
+            log_record["exception"] = self.formatException(record.exc_info)
+        return json.dumps(log_record, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks: a full queue drops the record and counts it.
+
+    Records are queued unformatted; formatting happens on the writer thread.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchWriter(threading.Thread):
+    """Background thread that drains the queue into a size-rotated file."""
+
+    _STOP = object()
+
+    def __init__(self, log_queue: queue.Queue, formatter: logging.Formatter, log_file: str,
+                 console: bool = False, max_bytes: int = 100 * 1024 * 1024, backup_count: int = 5,
+                 batch_size: int = 512, flush_interval: float = 0.2):
+        super().__init__(name=f"log-writer:{os.path.basename(log_file)}", daemon=True)
+        self.queue = log_queue
+        self.formatter = formatter
+        self.log_file = log_file
+        self.console = console
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+        self._file = open(log_file, "a", encoding="utf-8", buffering=1024 * 1024)
+
+    def run(self):
+        while True:
+            batch = self._next_batch()
+            stop = batch and batch[-1] is self._STOP
+            if stop:
+                batch.pop()
+            if batch:
+                self._write(batch)
+            if stop:
+                self._file.close()
+                return
+
+    def _next_batch(self) -> List:
+        try:
+            first = self.queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+        batch = [first]
+        while len(batch) < self.batch_size and first is not self._STOP:
+            try:
+                record = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(record)
+            if record is self._STOP:
+                break
+        return batch
+
+    def _write(self, records: List[logging.LogRecord]):
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.formatter.format(record))
+            except Exception:
+                continue
+        if not lines:
+            return
+        data = "\n".join(lines) + "\n"
+        self._file.write(data)
+        self._file.flush()
+        if self.console:
+            sys.stderr.write(data)
+        self.written += len(lines)
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        """payment-service.log -> payment-service.log.1 -> ... -> .log.<backup_count>"""
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.log_file}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.log_file}.{i + 1}")
+        if self.backup_count:
+            os.replace(self.log_file, f"{self.log_file}.1")
+        else:
+            os.remove(self.log_file)
+        self._file = open(self.log_file, "a", encoding="utf-8", buffering=1024 * 1024)
+
+    def stop(self, timeout: float = 5.0):
+        self.queue.put(self._STOP)
+        self.join(timeout)
+
+
+def setup_logger(service_name: str, log_file: str, console: bool = False,
+                 static_fields: Optional[Dict] = None, level: int = logging.INFO,
+                 queue_size: int = 10_000, max_bytes: int = 100 * 1024 * 1024,
+                 backup_count: int = 5) -> logging.Logger:
+    """Logger that writes JSON lines to ``log_file`` (and stderr if ``console``) off the request path."""
+    logger = logging.getLogger(service_name)
+    logger.setLevel(level)
+    logger.propagate = False
+    for handler in logger.handlers:
+        if isinstance(handler, DroppingQueueHandler):
+            handler.writer.stop()
+    logger.handlers = [] # Clear existing handlers to avoid duplicates
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    writer = BatchWriter(log_queue, JsonFormatter(service_name, static_fields), log_file,
+                         console=console, max_bytes=max_bytes, backup_count=backup_count)
+    writer.start()
+    handler = DroppingQueueHandler(log_queue)
+    handler.writer = writer
+    logger.addHandler(handler)
+    atexit.register(writer.stop)
+    return logger
+
+
+def logging_stats(logger: logging.Logger) -> Dict[str, int]:
+    """Written, dropped and currently queued record counts for a logger from setup_logger."""
+    for handler in logger.handlers:
+        if isinstance(handler, DroppingQueueHandler):
+            return {
+                "written": handler.writer.written,
+                "dropped": handler.dropped,
+                "queued": handler.queue.qsize(),
+            }
+    return {"written": 0, "dropped": 0, "queued": 0}
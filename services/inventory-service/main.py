@@ -2,9 +2,14 @@ from fastapi import FastAPI, Response
 import logging
 import random
 import os
-import json
 import time
-from datetime import datetime
+import sys
+from pathlib import Path
+
+# structured_logging.py and metrics.py are copied next to main.py in the image; locally it lives in services/common
+sys.path.append(str(Path(__file__).resolve().parent.parent / "common"))
+from structured_logging import setup_logger
+from metrics import instrument
 
 app = FastAPI()
 
@@ -12,21 +17,11 @@ LOG_DIR = "/app/shared-logs"
 os.makedirs(LOG_DIR, exist_ok=True)
 LOG_FILE = os.path.join(LOG_DIR, "inventory-service.log")
 
-logging.basicConfig(
-        filename=LOG_FILE, 
-        level=logging.INFO, 
-        format='{"timestamp": "%(asctime)s", "level": "%(levelname)s", "service": "inventory-service", "message": "%(message)s"}'
-        )
+logger = setup_logger("inventory-service", LOG_FILE)
+instrument(app, "inventory-service", logger)
 
 def log_event(level: str, message: str, extra: dict = None):
-    payload = {
-        "timestamp": datetime.utcnow().isoformat(),
-        "level": level,
-        "service": "inventory-service",
-        "message": message
-    }
-    if extra: payload.update(extra)
-    logging.info(json.dumps(payload))
+    logger.log(logging.getLevelName(level), message, extra=extra)
 
 @app.get("/check-stock")
 def check_stock(response: Response):